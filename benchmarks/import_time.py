@@ -0,0 +1,86 @@
+"""
+Бенчмарк часу імпорту пакету src
+
+Кожен імпорт виконується в окремому свіжому інтерпретаторі (холодний
+імпорт модулів Python), час вимірюється всередині дочірнього процесу без
+старту інтерпретатора. Також показуються важкі залежності, які потрапили
+в sys.modules.
+
+Запуск з кореня проекту:
+    python benchmarks/import_time.py --repeat 5
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+TARGETS = ['src', 'src.data_loader', 'src.analyzer']
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'plotly', 'clickhouse_connect', 'scipy', 'statsmodels']
+
+CHILD_CODE = """
+import sys, time, json
+start = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed,
+                   'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(target: str, repeat: int = 5) -> dict:
+    """
+    Час холодного імпорту модуля
+
+    Args:
+        target: Ім'я модуля
+        repeat: Кількість свіжих інтерпретаторів
+
+    Returns:
+        Словник {'target', 'median_s', 'min_s', 'max_s', 'heavy'}
+    """
+    runs = []
+    heavy = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD_CODE.format(target=target, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        runs.append(result['seconds'])
+        heavy = result['heavy']
+
+    return {
+        'target': target,
+        'median_s': statistics.median(runs),
+        'min_s': min(runs),
+        'max_s': max(runs),
+        'heavy': heavy
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Час холодного імпорту модулів src')
+    parser.add_argument('--repeat', type=int, default=5, help='Кількість запусків на модуль')
+    parser.add_argument('--targets', nargs='*', default=TARGETS, help='Модулі для вимірювання')
+    parser.add_argument('--json', action='store_true', help='Вивести результат у JSON')
+    args = parser.parse_args()
+
+    results = [measure(target, args.repeat) for target in args.targets]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'module':<20} {'median, s':>10} {'min, s':>8} {'max, s':>8}  heavy deps")
+    for result in results:
+        print(f"{result['target']:<20} {result['median_s']:>10.3f} {result['min_s']:>8.3f} "
+              f"{result['max_s']:>8.3f}  {', '.join(result['heavy']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
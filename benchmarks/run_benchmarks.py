@@ -0,0 +1,512 @@
+"""
+Бенчмарки гарячих шляхів аналізу на синтетичних даних
+
+Для кожного масштабу (100k ... 40M користувачів) генерується синтетичний
+датасет (src.synthetic), готуються проміжні фрейми, а кожен бенчмарк
+запускається в окремому fork-процесі: час - мінімум з --repeat запусків,
+пам'ять - приріст пікового RSS над станом батьківського процесу (fork
+успадковує готові дані, тому рахується лише те, що алокує сам метод).
+
+Бенчмарки з суфіксом _polars - ті самі операції на Polars-рушії
+(DataLoader/PushAnalyzer з engine='polars'); вони пропускаються, якщо polars
+не встановлено. Після таблиці друкується порівняння pandas vs polars.
+
+Результати порівнюються з baselines.json: бенчмарк вважається регресією,
+якщо він повільніший за поріг (--time-threshold) або алокує більше
+(--memory-threshold) і різниця перевищує шум вимірювання. При регресіях
+скрипт завершується з кодом 1.
+
+Запуск з кореня проекту:
+    python benchmarks/run_benchmarks.py --scales 100k 1m
+    python benchmarks/run_benchmarks.py --scales 100k 1m --save-baseline
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import platform
+import importlib.util
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+import pandas as pd
+
+from src.tracing import peak_rss_mb
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+SCALES = {
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+    '40m': 40_000_000
+}
+
+# Суфікс бенчмарків Polars-рушія (пара до бенчмарку без суфікса)
+POLARS_SUFFIX = '_polars'
+
+# Абсолютний шум, нижче якого різниця з baseline не вважається регресією
+MIN_SECONDS_DELTA = 0.02
+MIN_MEMORY_DELTA_MB = 8.0
+
+
+def prepare_context(n_users: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Синтетичні дані та проміжні результати для всіх бенчмарків масштабу
+
+    Args:
+        n_users: Кількість користувачів
+        seed: Насіння генератора
+
+    Returns:
+        Словник фреймів (сирі, оброблені, matched, куб, A/B статистика)
+    """
+    from src.synthetic import generate_dataset
+    from src.data_loader import DataLoader
+    from src.analyzer import PushAnalyzer
+
+    # Ліниві імпорти (scipy, matplotlib/plotly) - до fork, щоб не потрапили в заміри
+    import src.significance
+    import src.rank_tests
+    import src.visualizer
+    if polars_available():
+        import polars
+
+    context = generate_dataset(n_users, seed=seed)
+    loader = DataLoader(cache_enabled=False)
+    analyzer = PushAnalyzer()
+
+    push_df = loader._process_push_data(context['push_df'].copy())
+    control_df = loader._process_control_group_data(context['control_df'].copy())
+    push_all = pd.concat([push_df, loader._align_dataframes(push_df, control_df)], ignore_index=True)
+    conversions_df = loader._process_conversion_data(context['conversions_df'].copy())
+    merged = analyzer.merge_data(push_all, conversions_df)
+    cube = analyzer.build_cube(merged)
+
+    context.update({
+        'loader': loader,
+        'analyzer': analyzer,
+        'polars_loader': DataLoader(cache_enabled=False, engine='polars'),
+        'polars_analyzer': PushAnalyzer(engine='polars'),
+        'push_all': push_all,
+        'processed_conversions': conversions_df,
+        'merged': merged,
+        'cube': cube,
+        'ab_stats': analyzer.ab_analysis(cube)
+    })
+    return context
+
+
+def polars_available() -> bool:
+    return importlib.util.find_spec('polars') is not None
+
+
+def process_merge_aggregate(ctx: Dict[str, Any],
+                            push_df: pd.DataFrame,
+                            control_df: pd.DataFrame,
+                            conversions_df: pd.DataFrame,
+                            engine: str = 'pandas') -> Dict[str, pd.DataFrame]:
+    """Ланцюжок сирі дані → обробка → матчинг → A/B та geo таблиці"""
+    if engine == 'polars':
+        from src.polars_engine import analyze_chain
+        return analyze_chain(push_df, conversions_df, control_df, outputs=['ab_stats', 'geo_stats'])
+
+    loader, analyzer = ctx['loader'], ctx['analyzer']
+    push_df = loader._process_push_data(push_df)
+    control_df = loader._align_dataframes(push_df, loader._process_control_group_data(control_df))
+    push_all = pd.concat([push_df, control_df], ignore_index=True)
+    merged = analyzer.merge_data(push_all, loader._process_conversion_data(conversions_df))
+    return {'ab_stats': analyzer.ab_analysis(merged), 'geo_stats': analyzer.geo_analysis(merged)}
+
+
+# Бенчмарк -> (підготовка аргументів поза заміром, вимірювана функція)
+BENCHMARKS: Dict[str, tuple] = {
+    'process_push_data': (
+        lambda ctx: (ctx['push_df'].copy(),),
+        lambda ctx, df: ctx['loader']._process_push_data(df)
+    ),
+    'process_control_data': (
+        lambda ctx: (ctx['control_df'].copy(),),
+        lambda ctx, df: ctx['loader']._process_control_group_data(df)
+    ),
+    'process_conversion_data': (
+        lambda ctx: (ctx['conversions_df'].copy(),),
+        lambda ctx, df: ctx['loader']._process_conversion_data(df)
+    ),
+    'merge_data': (
+        lambda ctx: (ctx['push_all'], ctx['processed_conversions']),
+        lambda ctx, push_df, conversions_df: ctx['analyzer'].merge_data(push_df, conversions_df)
+    ),
+    'build_cube': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: ctx['analyzer'].build_cube(df)
+    ),
+    'ab_analysis': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: ctx['analyzer'].ab_analysis(df)
+    ),
+    'ab_analysis_cube': (
+        lambda ctx: (ctx['cube'],),
+        lambda ctx, cube: ctx['analyzer'].ab_analysis(cube)
+    ),
+    'geo_analysis': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: ctx['analyzer'].geo_analysis(df)
+    ),
+    'geo_analysis_cube': (
+        lambda ctx: (ctx['cube'],),
+        lambda ctx, cube: ctx['analyzer'].geo_analysis(cube)
+    ),
+    'significance_tests': (
+        lambda ctx: (ctx['cube'].rollup(['ab_group', 'tier']),),
+        lambda ctx, counts: ctx['analyzer'].significance_tests(counts)
+    ),
+    'rank_tests': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: ctx['analyzer'].rank_tests(df, by=['tier'])
+    ),
+    'bootstrap_ci': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: ctx['analyzer'].bootstrap_ci(df, n_boot=200, n_jobs=1)
+    ),
+    'overlap_analysis': (
+        lambda ctx: (ctx['push_all'], ctx['processed_conversions']),
+        lambda ctx, push_df, conversions_df: ctx['analyzer'].overlap_analysis(push_df, conversions_df)
+    ),
+    'push_bucket_conversion': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: sys.modules['src.visualizer'].push_bucket_conversion(df)
+    ),
+    'timeline_stats': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: sys.modules['src.visualizer'].timeline_stats(df)
+    ),
+    'process_merge_aggregate': (
+        lambda ctx: (ctx['push_df'].copy(), ctx['control_df'].copy(), ctx['conversions_df'].copy()),
+        process_merge_aggregate
+    ),
+    'process_push_data_polars': (
+        lambda ctx: (ctx['push_df'],),
+        lambda ctx, df: ctx['polars_loader']._process_push_data(df)
+    ),
+    'process_conversion_data_polars': (
+        lambda ctx: (ctx['conversions_df'],),
+        lambda ctx, df: ctx['polars_loader']._process_conversion_data(df)
+    ),
+    'merge_data_polars': (
+        lambda ctx: (ctx['push_all'], ctx['processed_conversions']),
+        lambda ctx, push_df, conversions_df: ctx['polars_analyzer'].merge_data(push_df, conversions_df)
+    ),
+    'ab_analysis_polars': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: ctx['polars_analyzer'].ab_analysis(df)
+    ),
+    'geo_analysis_polars': (
+        lambda ctx: (ctx['merged'],),
+        lambda ctx, df: ctx['polars_analyzer'].geo_analysis(df)
+    ),
+    'process_merge_aggregate_polars': (
+        lambda ctx: (ctx['push_df'], ctx['control_df'], ctx['conversions_df']),
+        lambda ctx, *frames: process_merge_aggregate(ctx, *frames, engine='polars')
+    )
+}
+
+
+def default_benchmarks() -> List[str]:
+    """Усі бенчмарки (без _polars, якщо polars не встановлено)"""
+    return [name for name in BENCHMARKS if polars_available() or not name.endswith(POLARS_SUFFIX)]
+
+
+def _run_once(context: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """Один замір бенчмарку в поточному процесі"""
+    setup, func = BENCHMARKS[name]
+    args = setup(context)
+    gc.collect()
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    func(context, *args)
+    seconds = time.perf_counter() - start
+    rss_after = peak_rss_mb()
+
+    return {
+        'seconds': seconds,
+        'peak_mb': None if rss_before is None else max(rss_after - rss_before, 0.0)
+    }
+
+
+def _child(context: Dict[str, Any], name: str, connection) -> None:
+    try:
+        connection.send(_run_once(context, name))
+    except Exception as e:
+        connection.send({'error': f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+
+
+def measure(context: Dict[str, Any], name: str, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Час та пам'ять бенчмарку
+
+    Args:
+        context: Результат prepare_context
+        name: Назва бенчмарку з BENCHMARKS
+        repeat: Кількість запусків (кожен - у свіжому fork-процесі)
+
+    Returns:
+        Словник {'seconds': мінімум, 'peak_mb': максимум приросту RSS, 'error'}
+    """
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        # Без fork - заміри в процесі (пік RSS недостовірний після першого запуску)
+        runs = [_run_once(context, name) for _ in range(repeat)]
+    else:
+        fork = multiprocessing.get_context('fork')
+        runs = []
+        for _ in range(repeat):
+            receiver, sender = fork.Pipe(duplex=False)
+            process = fork.Process(target=_child, args=(context, name, sender))
+            process.start()
+            sender.close()
+            try:
+                run = receiver.recv()
+            except EOFError:
+                run = None
+            process.join()
+            if run is None:
+                run = {'error': f"worker exited with code {process.exitcode}"}
+            if 'error' in run:
+                return {'seconds': None, 'peak_mb': None, 'error': run['error']}
+            runs.append(run)
+
+    memory = [run['peak_mb'] for run in runs if run['peak_mb'] is not None]
+    return {
+        'seconds': min(run['seconds'] for run in runs),
+        'peak_mb': max(memory) if memory else None,
+        'error': None
+    }
+
+
+def compare(result: Dict[str, Any],
+            baseline: Optional[Dict[str, Any]],
+            time_threshold: float,
+            memory_threshold: float) -> str:
+    """
+    Статус бенчмарку відносно baseline
+
+    Returns:
+        'ok', 'new' (немає baseline), 'error', 'slower', 'memory' або 'slower+memory'
+    """
+    if result['error']:
+        return 'error'
+    if not baseline:
+        return 'new'
+
+    problems = []
+    base_seconds = baseline.get('seconds')
+    if base_seconds is not None and (
+        result['seconds'] > base_seconds * (1 + time_threshold)
+        and result['seconds'] - base_seconds > MIN_SECONDS_DELTA
+    ):
+        problems.append('slower')
+
+    base_memory = baseline.get('peak_mb')
+    if base_memory is not None and result['peak_mb'] is not None and (
+        result['peak_mb'] > base_memory * (1 + memory_threshold)
+        and result['peak_mb'] - base_memory > MIN_MEMORY_DELTA_MB
+    ):
+        problems.append('memory')
+
+    return '+'.join(problems) or 'ok'
+
+
+def run_suite(scales: List[str],
+              names: List[str],
+              repeat: int = 3,
+              seed: int = 42,
+              baselines: Optional[Dict[str, Any]] = None,
+              time_threshold: float = 0.25,
+              memory_threshold: float = 0.25) -> pd.DataFrame:
+    """
+    Прогнати бенчмарки на всіх масштабах
+
+    Args:
+        scales: Ключі SCALES
+        names: Бенчмарки з BENCHMARKS
+        repeat: Кількість запусків кожного бенчмарку
+        seed: Насіння синтетичних даних
+        baselines: Збережені результати {'results': {scale: {name: {...}}}}
+        time_threshold: Допустиме відносне сповільнення (0.25 = +25%)
+        memory_threshold: Допустимий відносний приріст пікової пам'яті
+
+    Returns:
+        DataFrame [scale, users, benchmark, seconds, baseline_s, peak_mb, baseline_mb, status, error]
+    """
+    stored = (baselines or {}).get('results', {})
+    rows = []
+
+    for scale in scales:
+        start = time.perf_counter()
+        context = prepare_context(SCALES[scale], seed=seed)
+        print(f"{scale}: дані підготовлено за {time.perf_counter() - start:.1f}s "
+              f"({len(context['push_all'])} користувачів, "
+              f"{len(context['processed_conversions'])} рядків конверсій)", file=sys.stderr)
+
+        for name in names:
+            result = measure(context, name, repeat=repeat)
+            baseline = stored.get(scale, {}).get(name)
+            rows.append({
+                'scale': scale,
+                'users': SCALES[scale],
+                'benchmark': name,
+                'seconds': result['seconds'],
+                'baseline_s': (baseline or {}).get('seconds'),
+                'peak_mb': result['peak_mb'],
+                'baseline_mb': (baseline or {}).get('peak_mb'),
+                'status': compare(result, baseline, time_threshold, memory_threshold),
+                'error': result['error']
+            })
+
+        del context
+        gc.collect()
+
+    return pd.DataFrame(rows, columns=['scale', 'users', 'benchmark', 'seconds', 'baseline_s',
+                                       'peak_mb', 'baseline_mb', 'status', 'error'])
+
+
+def engine_comparison(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Пари pandas vs polars з одного прогону
+
+    Returns:
+        DataFrame [scale, benchmark, pandas_s, polars_s, speedup, pandas_mb, polars_mb]
+    """
+    columns = ['scale', 'benchmark', 'pandas_s', 'polars_s', 'speedup', 'pandas_mb', 'polars_mb']
+    polars_rows = results[results['benchmark'].str.endswith(POLARS_SUFFIX) & results['error'].isna()]
+    if polars_rows.empty:
+        return pd.DataFrame(columns=columns)
+
+    polars_rows = polars_rows.assign(benchmark=polars_rows['benchmark'].str[:-len(POLARS_SUFFIX)])
+    pairs = results.merge(polars_rows, on=['scale', 'benchmark'], suffixes=('_pandas', '_polars'))
+    pairs = pairs[pairs['error_pandas'].isna()]
+    return pd.DataFrame({
+        'scale': pairs['scale'],
+        'benchmark': pairs['benchmark'],
+        'pandas_s': pairs['seconds_pandas'],
+        'polars_s': pairs['seconds_polars'],
+        'speedup': pairs['seconds_pandas'] / pairs['seconds_polars'],
+        'pandas_mb': pairs['peak_mb_pandas'],
+        'polars_mb': pairs['peak_mb_polars']
+    }, columns=columns)
+
+
+def machine_info() -> Dict[str, Any]:
+    """Опис машини та версій, на яких знято baseline"""
+    import numpy as np
+
+    info = {
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count()
+    }
+    if polars_available():
+        import polars
+        info['polars'] = polars.__version__
+    return info
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baselines(path: str, results: pd.DataFrame, baselines: Dict[str, Any]) -> None:
+    """Оновити baseline виміряних бенчмарків (інші масштаби та бенчмарки зберігаються)"""
+    stored = baselines.get('results', {})
+    for row in results[results['error'].isna()].itertuples(index=False):
+        stored.setdefault(row.scale, {})[row.benchmark] = {
+            'seconds': round(row.seconds, 4),
+            'peak_mb': None if pd.isna(row.peak_mb) else round(row.peak_mb, 1)
+        }
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'machine': machine_info(), 'results': stored}, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def _format(value: Any, pattern: str) -> str:
+    return '-' if value is None or pd.isna(value) else format(value, pattern)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Бенчмарки гарячих шляхів на синтетичних даних')
+    parser.add_argument('--scales', nargs='*', default=['100k', '1m'], choices=list(SCALES),
+                        help='Масштаби (кількість користувачів)')
+    parser.add_argument('--benchmarks', nargs='*', default=default_benchmarks(), choices=list(BENCHMARKS),
+                        help='Бенчмарки для запуску')
+    parser.add_argument('--repeat', type=int, default=3, help='Кількість запусків кожного бенчмарку')
+    parser.add_argument('--seed', type=int, default=42, help='Насіння синтетичних даних')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Файл baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='Записати результати як новий baseline')
+    parser.add_argument('--time-threshold', type=float, default=0.25,
+                        help='Допустиме сповільнення відносно baseline (0.25 = +25%%)')
+    parser.add_argument('--memory-threshold', type=float, default=0.25,
+                        help="Допустимий приріст пікової пам'яті відносно baseline")
+    parser.add_argument('--json', action='store_true', help='Вивести результат у JSON')
+    args = parser.parse_args(argv)
+
+    # Емодзі-логи модулів src не потрібні у звіті бенчмарків
+    logging.getLogger('src').setLevel(logging.WARNING)
+
+    baselines = load_baselines(args.baseline)
+    if baselines.get('machine') and baselines['machine'] != machine_info():
+        print(f"⚠️ Baseline знято на іншій машині/версіях: {baselines['machine']}", file=sys.stderr)
+
+    results = run_suite(args.scales, args.benchmarks, repeat=args.repeat, seed=args.seed,
+                        baselines=baselines, time_threshold=args.time_threshold,
+                        memory_threshold=args.memory_threshold)
+
+    if args.json:
+        print(results.to_json(orient='records', indent=2))
+    else:
+        print(f"{'scale':<6} {'benchmark':<32} {'time, s':>9} {'base, s':>9} "
+              f"{'peak, MB':>9} {'base, MB':>9}  status")
+        for row in results.itertuples(index=False):
+            print(f"{row.scale:<6} {row.benchmark:<32} {_format(row.seconds, '9.3f')} "
+                  f"{_format(row.baseline_s, '9.3f')} {_format(row.peak_mb, '9.1f')} "
+                  f"{_format(row.baseline_mb, '9.1f')}  {row.status if not row.error else row.error}")
+
+        comparison = engine_comparison(results)
+        if not comparison.empty:
+            print(f"\n{'scale':<6} {'pandas vs polars':<32} {'pandas, s':>9} {'polars, s':>9} "
+                  f"{'speedup':>8} {'pandas MB':>9} {'polars MB':>9}")
+            for row in comparison.itertuples(index=False):
+                print(f"{row.scale:<6} {row.benchmark:<32} {_format(row.pandas_s, '9.3f')} "
+                      f"{_format(row.polars_s, '9.3f')} {_format(row.speedup, '7.2f')}x "
+                      f"{_format(row.pandas_mb, '9.1f')} {_format(row.polars_mb, '9.1f')}")
+
+    if args.save_baseline:
+        save_baselines(args.baseline, results, baselines)
+        print(f"💾 Baseline збережено: {args.baseline}", file=sys.stderr)
+        return 0
+
+    regressions = results[~results['status'].isin(['ok', 'new'])]
+    if not regressions.empty:
+        print(f"❌ Регресії: {', '.join(regressions['scale'] + '/' + regressions['benchmark'])}",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
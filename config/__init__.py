@@ -12,6 +12,10 @@ from .constants import (
     ANDROID_TYPE,
     PUSH_EVENT_TYPE,
     TARGET_APPS,
+    CONTROL_GROUP,
+    PUSH_BUCKET_BINS,
+    PUSH_BUCKET_LABELS,
+    CONTROL_PUSH_BUCKET,
     TIER_1_COUNTRIES,
     TIER_2_COUNTRIES, 
     TIER_3_COUNTRIES,
@@ -27,6 +31,10 @@ __all__ = [
     'ANDROID_TYPE',
     'PUSH_EVENT_TYPE',
     'TARGET_APPS',
+    'CONTROL_GROUP',
+    'PUSH_BUCKET_BINS',
+    'PUSH_BUCKET_LABELS',
+    'CONTROL_PUSH_BUCKET',
     'TIER_1_COUNTRIES',
     'TIER_2_COUNTRIES', 
     'TIER_3_COUNTRIES',
@@ -11,6 +11,14 @@ ANDROID_TYPE = 1
 PUSH_EVENT_TYPE = 7  # SendPush
 TARGET_APPS = ['Michelangelo', 'Leonardo', 'Raphael', 'Splinter']
 
+# A/B ГРУПИ
+CONTROL_GROUP = '6'  # Контрольна група (0 push-ів)
+
+# БАКЕТИ КІЛЬКОСТІ PUSH-ІВ (для tier-аналізу та куба)
+PUSH_BUCKET_BINS = [0, 1, 2, 3, 5, 10, 20, float('inf')]
+PUSH_BUCKET_LABELS = ['1', '2', '3', '4-5', '6-10', '11-20', '20+']
+CONTROL_PUSH_BUCKET = '0'
+
 # GEO CLASSIFICATION (коди країн)
 TIER_1_COUNTRIES = [
     'US', 'UK', 'CA', 'AU', 'DE', 'FR', 'NL', 
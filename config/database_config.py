@@ -1,6 +1,41 @@
-import clickhouse_connect
+import os
+import glob
+import hashlib
 import pandas as pd
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import clickhouse_connect
+    import duckdb
+
+# Локальні parquet-знімки таблиць statistic та keitaro (для DuckDB-бекенду)
+DEFAULT_SNAPSHOT_DIR = 'data/raw/snapshots'
+SNAPSHOT_TABLES = ['event', 'device', 'keitaro_clicks', 'keitaro_groups']
+
+
+def snapshot_fingerprint(snapshot_dir: str = DEFAULT_SNAPSHOT_DIR) -> str:
+    """Відбиток файлів знімка (шлях, розмір, mtime) - змінюється після повторного експорту"""
+    digest = hashlib.sha1(os.path.abspath(snapshot_dir).encode())
+    for table in SNAPSHOT_TABLES:
+        for path in sorted(glob.glob(os.path.join(snapshot_dir, table, '*.parquet'))):
+            digest.update(f"\n{os.path.relpath(path, snapshot_dir)}:"
+                          f"{os.path.getsize(path)}:{os.path.getmtime(path)}".encode())
+    return digest.hexdigest()[:16]
+
+
+def _clickhouse_connect():
+    """clickhouse_connect імпортується лише під час першого підключення"""
+    import clickhouse_connect
+    return clickhouse_connect
+
+
+def _duckdb():
+    """duckdb - опціональна залежність (pip install duckdb)"""
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("DuckDB-бекенд потребує пакет duckdb: pip install duckdb") from e
+    return duckdb
 
 class DatabaseManager:
     """Менеджер підключень до баз даних"""
@@ -9,10 +44,10 @@ class DatabaseManager:
         self.statistic_client = None
         self.keitaro_client = None
     
-    def connect_statistic(self) -> clickhouse_connect.driver.Client:
+    def connect_statistic(self) -> 'clickhouse_connect.driver.Client':
         """Підключення до бази statistic"""
         if not self.statistic_client:
-            self.statistic_client = clickhouse_connect.get_client(
+            self.statistic_client = _clickhouse_connect().get_client(
                 host='91.99.82.194',
                 port=8123,
                 username='readonly',
@@ -21,10 +56,10 @@ class DatabaseManager:
             print("✅ Підключено до statistic")
         return self.statistic_client
     
-    def connect_keitaro(self) -> clickhouse_connect.driver.Client:
+    def connect_keitaro(self) -> 'clickhouse_connect.driver.Client':
         """Підключення до бази keitaro"""
         if not self.keitaro_client:
-            self.keitaro_client = clickhouse_connect.get_client(
+            self.keitaro_client = _clickhouse_connect().get_client(
                 host='65.108.255.109',
                 port=18123,
                 username='keitaro',
@@ -52,11 +87,73 @@ class DatabaseManager:
         except Exception as e:
             print(f"❌ Помилка підключення: {e}")
     
+    def query(self, client, query: str) -> pd.DataFrame:
+        """Виконати запит (помилки сервера прокидаються далі)"""
+        result = client.query(query)
+        return pd.DataFrame(result.result_rows, columns=result.column_names)
+    
+    def query_to_df(self, client, query: str) -> pd.DataFrame:
+        """Виконати запит та повернути DataFrame"""
+        try:
+            return self.query(client, query)
+        except Exception as e:
+            print(f"❌ Помилка запиту: {e}")
+            return pd.DataFrame()
+
+
+class DuckDBManager:
+    """
+    Локальний двигун DuckDB над parquet-знімками таблиць
+    
+    Має той самий інтерфейс, що й DatabaseManager: обидві "бази" (statistic
+    та keitaro) - це одне in-memory з'єднання з view на кожну таблицю
+    знімка (<snapshot_dir>/<table>/*.parquet).
+    """
+    
+    def __init__(self, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR, threads: Optional[int] = None):
+        """
+        Args:
+            snapshot_dir: Директорія знімків (див. PushDatabase.export_snapshot)
+            threads: Кількість потоків DuckDB (None - всі ядра)
+        """
+        self.snapshot_dir = snapshot_dir
+        self.threads = threads
+        self.connection = None
+    
+    def connect(self) -> 'duckdb.DuckDBPyConnection':
+        """З'єднання з view над наявними таблицями знімка"""
+        if self.connection is None:
+            connection = _duckdb().connect(database=':memory:')
+            if self.threads:
+                connection.execute(f"SET threads = {int(self.threads)}")
+            
+            tables = []
+            for table in SNAPSHOT_TABLES:
+                pattern = os.path.join(self.snapshot_dir, table, '*.parquet')
+                if glob.glob(pattern):
+                    connection.execute(
+                        f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{pattern}', union_by_name = true)"
+                    )
+                    tables.append(table)
+            
+            self.connection = connection
+            print(f"✅ DuckDB: {self.snapshot_dir} ({', '.join(tables) or 'таблиць не знайдено'})")
+        return self.connection
+    
+    def connect_statistic(self) -> 'duckdb.DuckDBPyConnection':
+        return self.connect()
+    
+    def connect_keitaro(self) -> 'duckdb.DuckDBPyConnection':
+        return self.connect()
+    
+    def query(self, client, query: str) -> pd.DataFrame:
+        """Виконати запит (помилки прокидаються далі)"""
+        return client.execute(query).fetchdf()
+    
     def query_to_df(self, client, query: str) -> pd.DataFrame:
         """Виконати запит та повернути DataFrame"""
         try:
-            result = client.query(query)
-            return pd.DataFrame(result.result_rows, columns=result.column_names)
+            return self.query(client, query)
         except Exception as e:
             print(f"❌ Помилка запиту: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
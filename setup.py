@@ -19,8 +19,19 @@ setup(
         "python-dotenv>=1.0.0",
         "openpyxl>=3.1.0",
         "scikit-learn>=1.3.0",
-        "statsmodels>=0.14.0"
+        "statsmodels>=0.14.0",
+        "scipy>=1.10.0"
     ],
+    extras_require={
+        "duckdb": ["duckdb>=0.9.0"],
+        "polars": ["polars>=1.25.0", "pyarrow>=14.0.0"],
+        "export": ["kaleido>=0.2.1"],
+    },
+    entry_points={
+        "console_scripts": [
+            "push-pipeline=src.pipeline:main",
+        ],
+    },
     python_requires=">=3.8",
     classifiers=[
         "Development Status :: 4 - Beta",
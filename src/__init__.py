@@ -1,37 +1,63 @@
 """
 Основні модулі для аналізу push-сповіщень
+
+Класи завантажуються ліниво при першому зверненні, тому `import src` не
+тягне matplotlib/plotly/clickhouse_connect для задач, яким вони не потрібні.
 """
 
-# Імпортуємо тільки після того, як всі файли створені
-try:
-    from .database import PushDatabase
+import importlib
+
+# Публічне ім'я -> модуль, з якого воно завантажується
+_LAZY_ATTRIBUTES = {
+    'PushDatabase': 'src.database',
+    'DataLoader': 'src.data_loader',
+    'PushAnalyzer': 'src.analyzer',
+    'PushVisualizer': 'src.visualizer'
+}
+
+__all__ = [
+    'PushDatabase',
+    'DataLoader',
+    'PushAnalyzer',
+    'PushVisualizer',
+    'get_analysis_suite'
+]
+
+
+def __getattr__(name):
+    """Ліниве завантаження класів пакету (PEP 562)"""
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
+
+
+def get_analysis_suite(cache_enabled=True, memoize=False):
+    """
+    Повертає готовий набір інструментів для аналізу
+
+    Args:
+        cache_enabled: Кеш запитів DataLoader (data/cache)
+        memoize: Мемоізація результатів PushAnalyzer (data/cache/results), за замовчуванням вимкнена
+
+    Returns:
+        tuple: (loader, analyzer, visualizer)
+    """
     from .data_loader import DataLoader
     from .analyzer import PushAnalyzer
     from .visualizer import PushVisualizer
-    
-    __all__ = [
-        'PushDatabase',
-        'DataLoader', 
-        'PushAnalyzer',
-        'PushVisualizer'
-    ]
-    
-    def get_analysis_suite(cache_enabled=True):
-        """
-        Повертає готовий набір інструментів для аналізу
-        
-        Returns:
-            tuple: (loader, analyzer, visualizer)
-        """
-        loader = DataLoader(cache_enabled=cache_enabled)
-        analyzer = PushAnalyzer()
-        visualizer = PushVisualizer()
-        
-        return loader, analyzer, visualizer
-
-except ImportError as e:
-    print(f"Увага: Деякі модулі не завантажені: {e}")
-    __all__ = []
+
+    loader = DataLoader(cache_enabled=cache_enabled)
+    analyzer = PushAnalyzer(cache_enabled=memoize)
+    visualizer = PushVisualizer()
+
+    return loader, analyzer, visualizer
+
 
 __version__ = "1.0.0"
-__author__ = "Nazar Petrashchuk"
\ No newline at end of file
+__author__ = "Nazar Petrashchuk"
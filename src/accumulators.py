@@ -0,0 +1,124 @@
+import pandas as pd
+from typing import Iterable, Iterator, List, Optional
+import logging
+from src.cube import PushCube
+
+logger = logging.getLogger(__name__)
+
+# Колонки matched-датасету, потрібні для акумуляції
+ACCUMULATOR_COLUMNS = [
+    'ab_group', 'tier', 'country', 'push_count', 'first_push',
+    'has_deposit', 'has_registration', 'total_deposits',
+    'total_registrations', 'total_revenue'
+]
+
+
+def iter_parquet_batches(path: str,
+                         batch_size: int = 500_000,
+                         columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Читати parquet-файл пакетами без завантаження в пам'ять повністю
+
+    Args:
+        path: Шлях до parquet-файлу
+        batch_size: Кількість рядків у пакеті
+        columns: Колонки для читання
+
+    Yields:
+        DataFrame-пакети
+    """
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+
+class MetricsAccumulator:
+    """
+    Мергабельний акумулятор групових метрик для потокової обробки
+
+    Зберігає лише адитивні міри (лічильники, суми, суми квадратів,
+    чисельники та знаменники конверсій) у вигляді PushCube, тому пакети
+    можна обробляти послідовно, паралельно або по днях і зливати.
+    """
+
+    def __init__(self, conversions_df: pd.DataFrame = None):
+        """
+        Args:
+            conversions_df: Конверсії по gadid - якщо задані, пакети вважаються
+                            сирими push-даними і матчаться перед акумуляцією
+        """
+        self.conversions_df = conversions_df
+        self.cube = PushCube()
+        self.rows = 0
+        self.batches = 0
+
+    def update(self, batch: pd.DataFrame) -> 'MetricsAccumulator':
+        """
+        Додати пакет записів
+
+        Args:
+            batch: Пакет matched-даних (або push-даних, якщо задано conversions_df)
+
+        Returns:
+            self
+        """
+        if batch.empty:
+            return self
+
+        if self.conversions_df is not None:
+            from src.analyzer import PushAnalyzer
+            batch = PushAnalyzer().merge_data(batch, self.conversions_df)
+
+        self.cube = self.cube.merge(PushCube.from_frame(batch))
+        self.rows += len(batch)
+        self.batches += 1
+        return self
+
+    def consume(self, batches: Iterable[pd.DataFrame]) -> 'MetricsAccumulator':
+        """Обробити всі пакети з ітератора"""
+        for batch in batches:
+            self.update(batch)
+        logger.info(f"📥 Акумульовано {self.rows} записів з {self.batches} пакетів")
+        return self
+
+    def merge(self, other: 'MetricsAccumulator') -> 'MetricsAccumulator':
+        """
+        Злити з акумулятором іншого воркера або дня
+
+        Returns:
+            Новий MetricsAccumulator
+        """
+        merged = MetricsAccumulator(self.conversions_df)
+        merged.cube = self.cube.merge(other.cube)
+        merged.rows = self.rows + other.rows
+        merged.batches = self.batches + other.batches
+        return merged
+
+    def ab_stats(self) -> pd.DataFrame:
+        """Фіналізувати в таблицю A/B аналізу"""
+        return self.cube.ab_stats()
+
+    def geo_stats(self) -> pd.DataFrame:
+        """Фіналізувати в таблицю географічного аналізу"""
+        return self.cube.geo_stats()
+
+
+def accumulate_parquet(path: str,
+                       conversions_df: pd.DataFrame = None,
+                       batch_size: int = 500_000) -> MetricsAccumulator:
+    """
+    Акумулювати один parquet-файл пакетами (одиниця роботи для пулу процесів)
+
+    Args:
+        path: Шлях до parquet-файлу з matched- або push-даними
+        conversions_df: Конверсії для матчингу push-пакетів
+        batch_size: Кількість рядків у пакеті
+
+    Returns:
+        MetricsAccumulator
+    """
+    columns = None if conversions_df is not None else ACCUMULATOR_COLUMNS
+    accumulator = MetricsAccumulator(conversions_df)
+    return accumulator.consume(iter_parquet_batches(path, batch_size, columns))
@@ -0,0 +1,226 @@
+"""
+Адаптивне розбиття агрегуючих запитів на помилках ліміту пам'яті та таймауту
+
+Якщо сервер відхиляє запит (MEMORY_LIMIT_EXCEEDED, TIMEOUT_EXCEEDED, обрив
+з'єднання по таймауту), запит розбивається на частини - діапазони дат та/або
+хеш-бакети gadid - і виконується частинами з паузою між спробами. Часткові
+агрегати зливаються (суми, мінімуми, максимуми, середні через суму й кількість).
+Розбиття, з яким запит пройшов, запам'ятовується у SplitMemory і наступного
+разу застосовується одразу.
+
+Помилка пам'яті ділить навпіл хеш-бакет частини (стан GROUP BY по gadid
+ділиться між частинами), таймаут - її діапазон дат (кожна частина сканує
+менше днів). Успішні частини не перезапускаються.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPLIT_MEMORY = 'data/cache/query_splits.json'
+
+# Ознаки помилок, які лікуються розбиттям запиту (коди та тексти ClickHouse)
+MEMORY_ERRORS = ['MEMORY_LIMIT_EXCEEDED', 'Code: 241', 'Memory limit', 'Out of Memory']
+TIMEOUT_ERRORS = ['TIMEOUT_EXCEEDED', 'Code: 159', 'Timeout exceeded', 'timed out', 'ReadTimeout']
+
+# Межі розбиття та повторів
+MAX_PIECES = 256
+MAX_FAILURES = 32
+BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """
+    Тип помилки, яку можна обійти розбиттям
+
+    Returns:
+        'memory', 'timeout' або None (помилка не лікується розбиттям)
+    """
+    text = f"{type(error).__name__}: {error}"
+    if isinstance(error, TimeoutError) or any(marker in text for marker in TIMEOUT_ERRORS):
+        return 'timeout'
+    if isinstance(error, MemoryError) or any(marker in text for marker in MEMORY_ERRORS):
+        return 'memory'
+    return None
+
+
+def date_ranges(start_date: str, end_date: str, pieces: int) -> List[Tuple[str, str]]:
+    """
+    Розбити [start_date, end_date] на pieces діапазонів цілих днів
+
+    Returns:
+        Список (start, end) у форматі YYYY-MM-DD
+    """
+    days = pd.date_range(start_date, end_date, freq='D')
+    bounds = [round(i * len(days) / pieces) for i in range(pieces + 1)]
+    return [(days[lo].strftime('%Y-%m-%d'), days[hi - 1].strftime('%Y-%m-%d'))
+            for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def window_days(start_date: Optional[str], end_date: Optional[str]) -> int:
+    """Кількість днів у вікні (0, якщо запит не фільтрується по датах)"""
+    if not start_date or not end_date:
+        return 0
+    return len(pd.date_range(start_date, end_date, freq='D'))
+
+
+def split_piece(piece: Tuple[Optional[str], Optional[str], Optional[Tuple[int, int]]],
+                kind: str,
+                max_hash_pieces: int = MAX_PIECES) -> Optional[List[Tuple]]:
+    """
+    Розбити частину запиту навпіл після помилки
+
+    Таймаут ділить діапазон дат, помилка пам'яті - хеш-бакет gadid; якщо
+    потрібний вимір вичерпано, використовується інший.
+
+    Args:
+        piece: (start_date, end_date, partition)
+        kind: Тип помилки ('memory' або 'timeout')
+        max_hash_pieces: Найбільша кількість хеш-бакетів
+
+    Returns:
+        Дві частини або None, якщо ділити більше нікуди
+    """
+    start_date, end_date, partition = piece
+    can_split_dates = window_days(start_date, end_date) > 1
+    can_split_hash = (partition[1] if partition else 1) * 2 <= max_hash_pieces
+
+    if can_split_dates and (kind == 'timeout' or not can_split_hash):
+        return [(start, end, partition) for start, end in date_ranges(start_date, end_date, 2)]
+    if can_split_hash:
+        return [(start_date, end_date, bucket) for bucket in sub_partitions(partition, 2)]
+    return None
+
+
+def plan_pieces(split: Dict[str, int],
+                start_date: Optional[str],
+                end_date: Optional[str],
+                partition: Optional[Tuple[int, int]] = None) -> List[Tuple]:
+    """
+    Частини запиту для збереженого розбиття
+
+    Returns:
+        Список (start_date, end_date, partition)
+    """
+    days = window_days(start_date, end_date)
+    ranges = date_ranges(start_date, end_date, min(split['date_pieces'], days)) if days else [(start_date, end_date)]
+    return [(start, end, bucket) for start, end in ranges
+            for bucket in sub_partitions(partition, split['hash_pieces'])]
+
+
+def pieces_split(pieces: List[Tuple],
+                 start_date: Optional[str],
+                 end_date: Optional[str],
+                 partition: Optional[Tuple[int, int]] = None) -> Dict[str, int]:
+    """Розбиття, еквівалентне найдрібнішим частинам (для SplitMemory)"""
+    days = window_days(start_date, end_date)
+    base = partition[1] if partition else 1
+    min_days = min(window_days(start, end) for start, end, _ in pieces)
+    return {
+        'date_pieces': -(-days // min_days) if days else 1,
+        'hash_pieces': max((bucket[1] if bucket else 1) for _, _, bucket in pieces) // base
+    }
+
+
+def sub_partitions(partition: Optional[Tuple[int, int]], pieces: int) -> List[Optional[Tuple[int, int]]]:
+    """
+    Хеш-бакети всередині партиції
+
+    Бакет (index + count * j, count * pieces) є підмножиною партиції
+    (index, count), тому розбиття узгоджене з DataLoader-партиціями.
+    """
+    if pieces == 1:
+        return [partition]
+    index, count = partition if partition is not None else (0, 1)
+    return [(index + count * j, count * pieces) for j in range(pieces)]
+
+
+def merge_partials(frames: List[pd.DataFrame],
+                   keys: List[str],
+                   aggregations: Dict[str, str],
+                   ratios: Dict[str, Tuple[str, str]] = None,
+                   order_by: Optional[str] = None,
+                   ascending: bool = True) -> pd.DataFrame:
+    """
+    Злити часткові агрегати частин запиту
+
+    Args:
+        frames: Результати частин
+        keys: Колонки групування вихідного запиту
+        aggregations: Колонка -> 'sum' / 'min' / 'max'
+        ratios: Колонка-середнє -> (колонка суми, колонка кількості); допоміжні колонки видаляються
+        order_by: Колонка сортування (ORDER BY вихідного запиту)
+        ascending: Напрям сортування
+
+    Returns:
+        DataFrame з тими ж рядками, що й нерозбитий запит
+    """
+    ratios = ratios or {}
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+
+    columns = list(frames[0].columns)
+    combined = pd.concat(frames, ignore_index=True)
+    # Частини по хеш-бакетах не перетинаються - злиття потрібне лише для діапазонів дат
+    if len(frames) > 1 and combined.duplicated(keys).any():
+        combined = combined.groupby(keys, as_index=False, sort=False, dropna=False).agg(aggregations)[columns]
+
+    for column, (numerator, denominator) in ratios.items():
+        ratio = combined[numerator] / combined[denominator].where(combined[denominator] > 0)
+        combined.insert(combined.columns.get_loc(numerator), column, ratio)
+        combined = combined.drop(columns=[numerator, denominator])
+
+    if order_by is not None:
+        combined = combined.sort_values(order_by, ascending=ascending, kind='stable', ignore_index=True)
+    return combined
+
+
+class SplitMemory:
+    """Розбиття, з якими агрегуючі запити проходили (JSON між запусками)"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_SPLIT_MEMORY):
+        """
+        Args:
+            path: JSON-файл (None - лише в пам'яті процесу)
+        """
+        self.path = path
+        self.splits: Dict[str, Dict] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.splits = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Не вдалося прочитати {path}: {e}")
+
+    def get(self, name: str) -> Dict[str, int]:
+        """Розбиття запиту {'date_pieces', 'hash_pieces'} (1 x 1 - без розбиття)"""
+        split = self.splits.get(name, {})
+        return {'date_pieces': split.get('date_pieces', 1), 'hash_pieces': split.get('hash_pieces', 1)}
+
+    def remember(self, name: str, split: Dict[str, int], error: Optional[str] = None) -> None:
+        """Зберегти розбиття, з яким запит пройшов"""
+        self.splits[name] = {**split, 'error': error, 'updated_at': datetime.now().isoformat(timespec='seconds')}
+        self._save()
+
+    def forget(self, name: Optional[str] = None) -> None:
+        """Скинути розбиття запиту (або всіх запитів)"""
+        if name is None:
+            self.splits = {}
+        else:
+            self.splits.pop(name, None)
+        self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.splits, f, ensure_ascii=False, indent=2)
@@ -1,20 +1,150 @@
-import os
-import sys
-# Додаємо кореневу директорію проекту до sys.path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.insert(0, project_root)
-
+import hashlib
+import logging
 import pandas as pd
-from config.constants import get_country_tier
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Union, List, Optional, Dict, Iterable, Any
+from config.constants import get_country_tier, CONTROL_GROUP
+from src.cube import PushCube, ab_stats_from_totals
+from src.bootstrap import bootstrap_cells, MAX_DROPPED_SHARE
+from src.accumulators import MetricsAccumulator, accumulate_parquet
+from src.segments import run_segments, segments_from_columns
+from src.segment_index import SegmentIndex
+from src.sketches import SegmentSketches
+from src.overlap import exact_overlap, approximate_overlap
+from src.attribution import (
+    DEFAULT_WINDOWS,
+    attribute_conversions,
+    attribution_summary,
+    lag_distribution,
+    widest_window
+)
+from src.memo import ResultCache, memoized, fingerprint_value, DEFAULT_RESULT_CACHE_DIR
+from src.budget import (
+    PartitionedDataset,
+    DEFAULT_PARTITIONS_DIR,
+    PANDAS_HASH,
+    ROW_BYTES,
+    frame_row_bytes,
+    hash_partition_codes,
+    plan_execution,
+    partition_dir,
+    write_partition
+)
+from src.tracing import instrument
+from src import polars_engine
+
+logger = logging.getLogger(__name__)
 
+@instrument
 class PushAnalyzer:
     """Основний клас для аналізу"""
     
-    def __init__(self):
-        pass
+    def __init__(self,
+                 cache_enabled: bool = False,
+                 cache: Optional[ResultCache] = None,
+                 memory_budget_mb: Optional[float] = None,
+                 partitions_dir: str = DEFAULT_PARTITIONS_DIR,
+                 engine: str = 'pandas'):
+        """
+        Ініціалізація з опціональною мемоізацією результатів
+        
+        Args:
+            cache_enabled: Мемоізувати результати (пам'ять + data/cache/results)
+            cache: Готовий ResultCache (напр. зі своїми лімітами або без диску)
+            memory_budget_mb: Бюджет пам'яті - більший matched-датасет будується
+                              хеш-партиціями в parquet (None - без обмеження)
+            partitions_dir: Директорія партицій
+            engine: Рушій матчингу та агрегатів: 'pandas' або 'polars' (результат - pandas)
+        """
+        self.cache = cache if cache is not None else (
+            ResultCache(DEFAULT_RESULT_CACHE_DIR) if cache_enabled else None
+        )
+        self.memory_budget_mb = memory_budget_mb
+        self.partitions_dir = partitions_dir
+        self.engine = polars_engine.check_engine(engine)
+    
+    def cache_info(self) -> Dict[str, Any]:
+        """Статистика кешу результатів (включно з причиною останнього промаху)"""
+        return self.cache.info() if self.cache is not None else {'cache_enabled': False}
+    
+    def explain_miss(self) -> List[str]:
+        """Чому останній виклик було перераховано"""
+        if self.cache is None or self.cache.last_miss is None:
+            return []
+        return self.cache.last_miss['reasons']
     
-    def merge_data(self, push_df: pd.DataFrame, conversions_df: pd.DataFrame) -> pd.DataFrame:
-        """Об'єднати push та conversion дані"""
+    @memoized(state=('memory_budget_mb', 'partitions_dir', 'engine'),
+              modules=('src.polars_engine', 'src.budget', 'config.constants'))
+    def merge_data(self,
+                   push_df: Union[pd.DataFrame, PartitionedDataset],
+                   conversions_df: Union[pd.DataFrame, PartitionedDataset]) -> Union[pd.DataFrame, PartitionedDataset]:
+        """
+        Об'єднати push та conversion дані
+        
+        Партиціоновані входи, або оцінка результату понад memory_budget_mb,
+        обробляються хеш-партиціями по gadid - результат тоді PartitionedDataset.
+        """
+        partitions = None
+        if self.memory_budget_mb is not None and not isinstance(push_df, PartitionedDataset):
+            conversion_bytes = (ROW_BYTES['conversions'] if isinstance(conversions_df, PartitionedDataset)
+                                else frame_row_bytes(conversions_df))
+            partitions = plan_execution('merge_data', len(push_df) + len(conversions_df),
+                                        frame_row_bytes(push_df) + conversion_bytes,
+                                        self.memory_budget_mb)['partitions']
+        
+        if (partitions or 1) > 1 or isinstance(push_df, PartitionedDataset) \
+                or isinstance(conversions_df, PartitionedDataset):
+            return self._merge_partitioned(push_df, conversions_df, partitions)
+        
+        return self._merge_frames(push_df, conversions_df)
+    
+    def _merge_partitioned(self,
+                           push_df: Union[pd.DataFrame, PartitionedDataset],
+                           conversions_df: Union[pd.DataFrame, PartitionedDataset],
+                           partitions: int = None) -> PartitionedDataset:
+        """Матчинг по хеш-партиціях: у пам'яті лише одна пара партицій"""
+        if isinstance(push_df, PartitionedDataset):
+            family, partitions = push_df.hash_family, push_df.partitions
+            left = push_df.read
+        else:
+            family = PANDAS_HASH
+            if isinstance(conversions_df, PartitionedDataset) and conversions_df.hash_family == PANDAS_HASH:
+                partitions = conversions_df.partitions
+            partitions = partitions or 1
+            left_codes = hash_partition_codes(push_df['gadid'], partitions)
+            left = lambda index: push_df[left_codes == index]
+        
+        if isinstance(conversions_df, PartitionedDataset) and conversions_df.hash_family == family:
+            right = lambda index: conversions_df.matching(index, partitions)
+        else:
+            if isinstance(conversions_df, PartitionedDataset):
+                logger.warning("⚠️ Конверсії розбито іншим хешем - завантажуються повністю")
+                conversions_df = conversions_df.to_frame()
+            if family == PANDAS_HASH:
+                right_codes = hash_partition_codes(conversions_df['gadid'], partitions)
+                right = lambda index: conversions_df[right_codes == index]
+            else:
+                # LEFT JOIN партиції з усіма конверсіями коректний для будь-якого розбиття
+                right = lambda index: conversions_df
+        
+        inputs_hash = hashlib.sha1(repr(fingerprint_value([push_df, conversions_df])).encode()).hexdigest()[:12]
+        directory = partition_dir(self.partitions_dir, f"matched_{inputs_hash}")
+        paths = []
+        for index in range(partitions):
+            merged = self._merge_frames(left(index), right(index))
+            paths.append(write_partition(merged, directory, index))
+            logger.info(f"🔗 Матчинг партиції {index + 1}/{partitions}: {len(merged)} записів")
+            del merged
+        
+        return PartitionedDataset(paths, family)
+    
+    def _merge_frames(self, push_df: pd.DataFrame, conversions_df: pd.DataFrame) -> pd.DataFrame:
+        """LEFT JOIN push- та conversion-фреймів у пам'яті"""
+        if self.engine == 'polars':
+            return polars_engine.to_pandas(polars_engine.merge(polars_engine.lazy(push_df),
+                                                               polars_engine.lazy(conversions_df)))
+        
         # LEFT JOIN - всі push користувачі + їх конверсії
         merged = push_df.merge(conversions_df, on='gadid', how='left')
         
@@ -43,8 +173,84 @@ class PushAnalyzer:
         
         return merged
     
-    def ab_analysis(self, df: pd.DataFrame) -> pd.DataFrame:
+    def build_cube(self, df: Union[pd.DataFrame, PartitionedDataset]) -> PushCube:
+        """
+        Побудувати OLAP-куб адитивних метрик за один прохід по matched-датасету
+        
+        Args:
+            df: Результат merge_data (партиціонований - акумулюється по файлах)
+            
+        Returns:
+            PushCube, з якого отримуються всі A/B, geo та push-бакет звіти
+        """
+        if isinstance(df, PartitionedDataset):
+            return self.accumulate_files(df.paths, n_jobs=1).cube
+        return PushCube.from_frame(df)
+    
+    def overlap_analysis(self,
+                         push_df: pd.DataFrame,
+                         conversions_df: pd.DataFrame,
+                         by: List[str] = None,
+                         approximate: bool = False,
+                         p: int = 14) -> Dict[str, Any]:
+        """
+        Діагностика матчингу: перетин push- та conversion-когорт по gadid
+        
+        Args:
+            push_df: Push-дані (включно з контрольною групою)
+            conversions_df: Конверсії
+            by: Сегментація push-сторони (за замовчуванням ['ab_group', 'tier'])
+            approximate: HyperLogLog-оцінка замість точного перетину
+            p: Точність HyperLogLog (2^p регістрів)
+            
+        Returns:
+            Словник {'summary': загальні лічильники, 'segments': DataFrame по сегментах}
+            (+ 'sketches' у наближеному режимі)
+        """
+        by = by if by is not None else [col for col in ['ab_group', 'tier'] if col in push_df.columns]
+        
+        if approximate:
+            return approximate_overlap(push_df, conversions_df, by=by, p=p)
+        return exact_overlap(push_df, conversions_df, by=by)
+    
+    def attribution_analysis(self,
+                             push_events: pd.DataFrame,
+                             conversion_events: pd.DataFrame,
+                             windows: List[str] = None,
+                             rule: str = 'last_touch') -> Dict[str, pd.DataFrame]:
+        """
+        Event-level атрибуція конверсій до push-ів (sort-merge as-of join)
+        
+        Args:
+            push_events: Результат DataLoader.load_push_events
+            conversion_events: Результат DataLoader.load_conversion_events
+            windows: Вікна атрибуції (за замовчуванням 1h, 24h, 7d)
+            rule: 'last_touch' або 'first_touch'
+            
+        Returns:
+            Словник {'conversions': атрибутовані події, 'summary': частки по A/B групах,
+                     'lags': розподіл затримки push → конверсія у найширшому вікні}
+        """
+        windows = windows or DEFAULT_WINDOWS
+        attributed = attribute_conversions(push_events, conversion_events, windows=windows, rule=rule)
+        
+        return {
+            'conversions': attributed,
+            'summary': attribution_summary(attributed),
+            'lags': lag_distribution(attributed, window=widest_window(windows))
+        }
+    
+    @memoized(modules=('src.cube', 'src.polars_engine', 'src.budget', 'config.constants'))
+    def ab_analysis(self, df: Union[pd.DataFrame, PushCube, PartitionedDataset]) -> pd.DataFrame:
         """A/B аналіз груп включаючи контрольну групу"""
+        if isinstance(df, PartitionedDataset):
+            df = self.build_cube(df)
+        if isinstance(df, PushCube):
+            return df.ab_stats()
+        if self.engine == 'polars':
+            totals = polars_engine.ab_stats(polars_engine.lazy(df, polars_engine.AB_COLUMNS)).collect()
+            return polars_engine.ab_stats_frame(totals)
+        
         ab_stats = df.groupby('ab_group').agg({
             'gadid': 'count',
             'push_count': 'mean',
@@ -57,29 +263,20 @@ class PushAnalyzer:
         ab_stats.columns = ['total_users', 'avg_pushes', 'users_with_deposits', 
                            'users_with_regs', 'total_deposits', 'total_registrations']
         
-        # Конверсії
-        ab_stats['deposit_conversion'] = (
-            ab_stats['users_with_deposits'] / ab_stats['total_users'] * 100
-        ).round(3)
-        
-        ab_stats['reg_conversion'] = (
-            ab_stats['users_with_regs'] / ab_stats['total_users'] * 100
-        ).round(3)
-        
-        # Додаємо ARPU
-        ab_stats['arpu'] = (
-            ab_stats['total_deposits'] / ab_stats['total_users']
-        ).round(4)
-        
-        # Додаємо тип групи
-        ab_stats['group_type'] = 'Push Group'
-        if '6' in ab_stats.index:
-            ab_stats.loc['6', 'group_type'] = 'Control Group'
-        
-        return ab_stats
+        # Конверсії, ARPU та тип групи
+        return ab_stats_from_totals(ab_stats)
     
-    def geo_analysis(self, df: pd.DataFrame) -> pd.DataFrame:
+    @memoized(modules=('src.cube', 'src.polars_engine', 'src.budget', 'config.constants'))
+    def geo_analysis(self, df: Union[pd.DataFrame, PushCube, PartitionedDataset]) -> pd.DataFrame:
         """Аналіз по географії"""
+        if isinstance(df, PartitionedDataset):
+            df = self.build_cube(df)
+        if isinstance(df, PushCube):
+            return df.geo_stats()
+        if self.engine == 'polars':
+            totals = polars_engine.geo_stats(polars_engine.lazy(df, polars_engine.GEO_COLUMNS)).collect()
+            return polars_engine.geo_stats_frame(totals)
+        
         geo_stats = df.groupby(['tier', 'ab_group']).agg({
             'gadid': 'count',
             'push_count': 'mean',
@@ -93,6 +290,328 @@ class PushAnalyzer:
         
         return geo_stats
     
+    def accumulate(self,
+                   batches: Iterable[pd.DataFrame],
+                   conversions_df: pd.DataFrame = None) -> MetricsAccumulator:
+        """
+        Потокова акумуляція метрик з пакетів (без повного датасету в пам'яті)
+        
+        Args:
+            batches: Ітератор пакетів matched-даних (або push-даних при conversions_df)
+            conversions_df: Конверсії для матчингу push-пакетів
+            
+        Returns:
+            MetricsAccumulator, який можна злити з іншими та фіналізувати
+        """
+        return MetricsAccumulator(conversions_df).consume(batches)
+    
+    def accumulate_files(self,
+                         paths: List[str],
+                         conversions_df: pd.DataFrame = None,
+                         batch_size: int = 500_000,
+                         n_jobs: Optional[int] = None) -> MetricsAccumulator:
+        """
+        Паралельна акумуляція parquet-партицій (по файлу на процес) зі злиттям
+        
+        Args:
+            paths: Шляхи до parquet-файлів (напр. партиції по днях)
+            conversions_df: Конверсії для матчингу push-даних
+            batch_size: Кількість рядків у пакеті
+            n_jobs: Кількість процесів (None - всі ядра)
+            
+        Returns:
+            Злитий MetricsAccumulator
+        """
+        worker = partial(accumulate_parquet, conversions_df=conversions_df, batch_size=batch_size)
+        
+        if n_jobs == 1 or len(paths) <= 1:
+            partials = [worker(path) for path in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                partials = list(executor.map(worker, paths))
+        
+        accumulator = MetricsAccumulator(conversions_df)
+        for part in partials:
+            accumulator = accumulator.merge(part)
+        return accumulator
+    
+    def finalize_accumulator(self, accumulator: MetricsAccumulator) -> Dict[str, object]:
+        """
+        Фіналізувати акумулятор у ті ж таблиці та словник, що й повний аналіз
+        
+        Returns:
+            Словник {'ab_stats', 'geo_stats', 'effectiveness'}
+        """
+        ab_stats = accumulator.ab_stats()
+        
+        return {
+            'ab_stats': ab_stats,
+            'geo_stats': accumulator.geo_stats(),
+            'effectiveness': self.calculate_push_effectiveness(ab_stats)
+        }
+    
+    def build_sketches(self,
+                       df: pd.DataFrame,
+                       dims: List[str] = None,
+                       metrics: List[str] = None,
+                       relative_accuracy: float = 0.01) -> SegmentSketches:
+        """
+        Квантильні скетчі метрик по сегментах за один прохід
+        
+        Args:
+            df: Результат merge_data (або його чанк - скетчі зливаються через merge)
+            dims: Виміри сегментації (за замовчуванням ab_group, tier)
+            metrics: Метрики (за замовчуванням total_revenue, push_count)
+            relative_accuracy: Гарантована відносна похибка квантилів
+            
+        Returns:
+            SegmentSketches з percentile_table для будь-якого roll-up
+        """
+        return SegmentSketches.from_frame(df, dims=dims, metrics=metrics,
+                                          relative_accuracy=relative_accuracy)
+    
+    @memoized(ignore=('n_jobs',), modules=('src.bootstrap', 'config.constants'))
+    def bootstrap_ci(self,
+                     df: pd.DataFrame,
+                     by: List[str] = None,
+                     n_boot: int = 2000,
+                     confidence: float = 0.95,
+                     seed: int = 42,
+                     n_jobs: Optional[int] = None,
+                     max_dropped: float = MAX_DROPPED_SHARE) -> pd.DataFrame:
+        """
+        Bootstrap довірчі інтервали конверсії, ARPU та lift відносно контролю
+        
+        Args:
+            df: Результат merge_data
+            by: Сегментація (за замовчуванням ['ab_group', 'tier'])
+            n_boot: Кількість bootstrap-вибірок
+            confidence: Рівень довіри
+            seed: Насіння для відтворюваності (результат не залежить від n_jobs)
+            n_jobs: Кількість процесів (None - всі ядра)
+            max_dropped: Максимальна частка реплік з нульовою базою lift (понад неї інтервал - NaN)
+            
+        Returns:
+            DataFrame [*by, users, metric, estimate, ci_lower, ci_upper, dropped_share]
+        """
+        by = by or ['ab_group', 'tier']
+        if by[0] != 'ab_group':
+            by = ['ab_group'] + [col for col in by if col != 'ab_group']
+        
+        df = df.assign(ab_group=df['ab_group'].astype(str))
+        return bootstrap_cells(df, by, CONTROL_GROUP, n_boot=n_boot,
+                               confidence=confidence, seed=seed, n_jobs=n_jobs, max_dropped=max_dropped)
+    
+    @memoized(modules=('src.significance', 'config.constants'))
+    def significance_tests(self,
+                           counts: pd.DataFrame,
+                           by: List[str] = None,
+                           users_col: str = None,
+                           converters_col: str = None,
+                           method: str = 'fdr_bh',
+                           alpha: float = 0.05) -> Dict[str, pd.DataFrame]:
+        """
+        Тести значущості конверсії лише на лічильниках (без рядкових даних)
+        
+        Args:
+            counts: Результат ab_analysis, geo_analysis або PushCube.rollup
+            by: Колонки сегментації (за замовчуванням - рівні індексу крім ab_group)
+            users_col: Колонка користувачів (визначається автоматично)
+            converters_col: Колонка конвертерів (визначається автоматично)
+            method: Корекція множинних порівнянь ('bonferroni', 'holm', 'fdr_bh')
+            alpha: Рівень значущості
+            
+        Returns:
+            Словник {'omnibus': chi-square по сегментах, 'pairwise': z-тести пар та проти контролю}
+        """
+        # scipy завантажується лише при першому тесті
+        from src.significance import significance_tests
+        
+        return significance_tests(counts, CONTROL_GROUP, by=by, users_col=users_col,
+                                  converters_col=converters_col, method=method, alpha=alpha)
+    
+    @memoized(modules=('src.rank_tests', 'src.significance', 'config.constants'))
+    def rank_tests(self,
+                   df: pd.DataFrame,
+                   value_col: str = 'total_revenue',
+                   by: List[str] = None,
+                   method: str = 'fdr_bh',
+                   alpha: float = 0.05) -> Dict[str, pd.DataFrame]:
+        """
+        Kruskal-Wallis та Mann-Whitney на стиснутих гістограмах значень
+        
+        Точні статистики з поправкою на зв'язки (ті ж p-values, що й scipy), але
+        сортуються лише ненульові значення - час залежить від кількості
+        унікальних ненульових значень, а не від кількості користувачів.
+        
+        Args:
+            df: Результат merge_data
+            value_col: Метрика (за замовчуванням total_revenue)
+            by: Колонки сегментації (напр. ['tier'])
+            method: Корекція множинних порівнянь
+            alpha: Рівень значущості
+            
+        Returns:
+            Словник {'kruskal': H-тест по сегментах, 'mannwhitney': попарні U-тести}
+        """
+        from src.rank_tests import rank_tests
+        
+        return rank_tests(df, CONTROL_GROUP, value_col=value_col, by=by,
+                          method=method, alpha=alpha)
+    
+    @memoized(ignore=('n_jobs',), modules=('src.power', 'src.significance', 'config.constants'))
+    def plan_power(self,
+                   df: pd.DataFrame,
+                   by: str = 'tier',
+                   sample_sizes: List[int] = None,
+                   lifts: List[float] = None,
+                   groups: int = 6,
+                   n_sims: int = 2000,
+                   alpha: float = 0.05,
+                   method: str = 'holm',
+                   target_power: float = 0.8,
+                   seed: int = 42,
+                   n_jobs: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Monte Carlo потужність та розмір вибірки для наступного push-експерименту
+        
+        База кожного сегмента (конверсія та zero-inflated дохід) оцінюється
+        на контрольній групі історичних даних; симуляції виконуються батчами
+        NumPy паралельно по процесах.
+        
+        Args:
+            df: Результат merge_data
+            by: Колонка сегментів (за замовчуванням tier)
+            sample_sizes: Користувачів на групу (за замовчуванням DEFAULT_SAMPLE_SIZES)
+            lifts: Відносні lift конверсії (за замовчуванням 5%, 10%, 20%)
+            groups: Кількість груп разом з контрольною
+            n_sims: Симульованих експериментів на точку кривої
+            alpha: Рівень значущості
+            method: Корекція множинних порівнянь ('bonferroni', 'holm', 'fdr_bh')
+            target_power: Цільова потужність для розміру вибірки
+            seed: Насіння для відтворюваності (результат не залежить від n_jobs)
+            n_jobs: Кількість процесів (None - всі ядра)
+        
+        Returns:
+            Словник {'baselines': база сегментів, 'curves': криві потужності,
+                     'sample_size': мінімум користувачів на групу}
+        """
+        from src.power import (
+            DEFAULT_SAMPLE_SIZES,
+            DEFAULT_LIFTS,
+            fit_baselines,
+            power_curves,
+            required_sample_size
+        )
+        
+        baselines = fit_baselines(df, by=by, baseline_group=CONTROL_GROUP)
+        curves = power_curves(baselines, sample_sizes or DEFAULT_SAMPLE_SIZES, lifts or DEFAULT_LIFTS,
+                              groups=groups, n_sims=n_sims, alpha=alpha, method=method,
+                              seed=seed, n_jobs=n_jobs)
+        
+        summary = pd.DataFrame([
+            {'segment': segment, 'users': base['users'],
+             'conversion_rate': base['conversion'] * 100, 'arpu': base['arpu']}
+            for segment, base in baselines.items()
+        ], columns=['segment', 'users', 'conversion_rate', 'arpu'])
+        
+        return {
+            'baselines': summary,
+            'curves': curves,
+            'sample_size': required_sample_size(curves, target_power)
+        }
+    
+    def run_segments(self,
+                     df: pd.DataFrame,
+                     segments: List[Dict[str, Any]] = None,
+                     by: List[str] = None,
+                     method: str = 'fdr_bh',
+                     alpha: float = 0.05,
+                     n_jobs: Optional[int] = None,
+                     index: Optional[SegmentIndex] = None) -> pd.DataFrame:
+        """
+        A/B аналіз та тести проти контролю для багатьох сегментів паралельно
+        
+        Args:
+            df: Результат merge_data
+            segments: Визначення [{'name': 'Tier 1 / 1-5 push', 'filters': {'tier': 'Tier 1',
+                      'push_count': (1, 5)}}, ...]; значення фільтра - скаляр, список або (min, max)
+            by: Альтернатива segments - по сегменту на кожне значення цих колонок
+            method: Корекція множинних порівнянь
+            alpha: Рівень значущості
+            n_jobs: Кількість процесів (None - всі ядра)
+            index: SegmentIndex датасету (рядки сегментів - перетином списків індексу)
+            
+        Returns:
+            Охайна таблиця: рядок на (сегмент, A/B група) з тестами проти контролю
+        """
+        if segments is None:
+            segments = segments_from_columns(df, by or ['tier'])
+        
+        return run_segments(df, segments, method=method, alpha=alpha, n_jobs=n_jobs, index=index)
+    
+    @memoized(modules=('src.cohort_curves', 'config.constants'))
+    def conversion_curves(self,
+                          df: pd.DataFrame,
+                          by: List[str] = None,
+                          max_days: int = 14,
+                          confidence: float = 0.95,
+                          control_anchor: str = 'sampled',
+                          observation_end: Optional[str] = None,
+                          converted_col: Optional[str] = None,
+                          seed: int = 42) -> pd.DataFrame:
+        """
+        Кумулятивна конверсія по днях від першого push-у з довірчими інтервалами
+        
+        Час до першої конверсії розкладається по цілих днях для кожного
+        сегмента; неконвертовані користувачі цензуруються на кінці вікна
+        спостереження (Каплан-Мейєр, CI за Грінвудом).
+        
+        Args:
+            df: Результат merge_data
+            by: Сегментація (за замовчуванням ['ab_group', 'tier'])
+            max_days: Горизонт кривої в днях
+            confidence: Рівень довіри
+            control_anchor: Якір контрольної групи: 'sampled' - first_push випадкового
+                            push-користувача того ж сегмента, 'start' - PUSH_START_DATE
+            observation_end: Кінець спостереження (за замовчуванням кінець вікна конверсій)
+            converted_col: Прапорець конвертера (напр. 'has_deposit'); None - будь-яка конверсія
+            seed: Насіння вибірки якорів контролю
+            
+        Returns:
+            DataFrame [*by, day, users, at_risk, conversions, censored,
+                       cumulative_conversion, ci_lower, ci_upper] (конверсія у %)
+        """
+        from src.cohort_curves import conversion_curves
+        
+        by = by or ['ab_group', 'tier']
+        df = df.assign(ab_group=df['ab_group'].astype(str))
+        return conversion_curves(df, by, max_days=max_days, confidence=confidence,
+                                 control_anchor=control_anchor, observation_end=observation_end,
+                                 converted_col=converted_col, seed=seed)
+    
+    def segment_index(self,
+                      df: Optional[pd.DataFrame] = None,
+                      data_path: Optional[str] = None,
+                      columns: Optional[List[str]] = None) -> SegmentIndex:
+        """
+        Індекс сегментів matched-датасету для швидких багатопредикатних вибірок
+        
+        Args:
+            df: Результат merge_data
+            data_path: Parquet-файл датасету - індекс зберігається поруч і
+                       перевикористовується, поки файл не зміниться
+            columns: Колонки індексу (за замовчуванням ab_group, tier, country,
+                     push_bucket, has_deposit, app)
+            
+        Returns:
+            SegmentIndex; index.take(df, tier='Tier 1', ab_group='3') - рядки сегмента
+        """
+        if data_path is not None:
+            return SegmentIndex.for_file(data_path, df, columns)
+        return SegmentIndex.build(df, columns)
+    
+    @memoized(modules=('config.constants',))
     def calculate_push_effectiveness(self, ab_stats: pd.DataFrame) -> dict:
         """
         Розраховує ефективність push-сповіщень порівняно з контрольною групою
@@ -103,10 +622,10 @@ class PushAnalyzer:
         Returns:
             Словник з метриками ефективності
         """
-        if '6' not in ab_stats.index:
+        if CONTROL_GROUP not in ab_stats.index:
             return {"error": "Контрольна група не знайдена"}
         
-        control_stats = ab_stats.loc['6']
+        control_stats = ab_stats.loc[CONTROL_GROUP]
         push_groups = ab_stats[ab_stats['group_type'] == 'Push Group']
         
         # Базові метрики
@@ -0,0 +1,190 @@
+"""
+Event-level атрибуція конверсій до push-ів з часовими вікнами
+
+gadid обох сторін кодуються в спільні цілі ключі, події зберігаються як
+компактні колонки (ключ, час), відсортовані за часом. Атрибуція - це
+sort-merge as-of join (pd.merge_asof) по ключу: last-touch шукає останній
+push до конверсії, first-touch - перший push всередині вікна.
+"""
+
+from typing import List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.overlap import normalize_gadids
+
+DEFAULT_WINDOWS = ['1h', '24h', '7d']
+ATTRIBUTION_RULES = ('last_touch', 'first_touch')
+
+# Межі бінів затримки конверсії після push-у (години)
+LAG_BINS_HOURS = [0, 1, 6, 24, 72, 168, np.inf]
+LAG_LABELS = ['<1h', '1-6h', '6-24h', '1-3d', '3-7d', '7d+']
+
+
+def _to_ns(values: pd.Series) -> pd.Series:
+    """Час у datetime64[ns] без часового поясу (merge_asof не зводить ns/us ключі)"""
+    times = pd.to_datetime(values)
+    if getattr(times.dt, 'tz', None) is not None:
+        times = times.dt.tz_convert(None)
+    return times.astype('datetime64[ns]')
+
+
+def encode_events(push_events: pd.DataFrame,
+                  conversion_events: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Перетворити події в компактні відсортовані колонки зі спільними ключами gadid
+
+    Args:
+        push_events: [gadid, ab_group, push_time]
+        conversion_events: [gadid, conversion_time, ...]
+
+    Returns:
+        Tuple (pushes [key, push_time], conversions [key, conversion_time, ...])
+    """
+    push_events = push_events.reset_index(drop=True)
+    conversion_events = conversion_events.reset_index(drop=True)
+
+    push_gadids = normalize_gadids(push_events['gadid'])
+    conv_gadids = normalize_gadids(conversion_events['gadid'])
+    codes, _ = pd.factorize(pd.concat([push_gadids, conv_gadids], ignore_index=True))
+
+    pushes = pd.DataFrame({
+        'key': codes[:len(push_gadids)],
+        'push_time': _to_ns(push_events.loc[push_gadids.index, 'push_time']).to_numpy()
+    })
+    conversions = (
+        conversion_events.loc[conv_gadids.index]
+        .drop(columns='gadid')
+        .assign(key=codes[len(push_gadids):],
+                conversion_time=lambda frame: _to_ns(frame['conversion_time']),
+                gadid=conv_gadids.to_numpy())
+    )
+
+    pushes = pushes.dropna(subset=['push_time']).sort_values('push_time', kind='stable')
+    conversions = conversions.dropna(subset=['conversion_time']).sort_values('conversion_time', kind='stable')
+
+    # A/B група кожного ключа з push-сторони
+    if 'ab_group' in push_events.columns:
+        groups = pd.Series(push_events.loc[push_gadids.index, 'ab_group'].astype(str).to_numpy(),
+                           index=codes[:len(push_gadids)])
+        groups = groups[~groups.index.duplicated()]
+        conversions['ab_group'] = conversions['key'].map(groups)
+
+    return pushes.reset_index(drop=True), conversions.reset_index(drop=True)
+
+
+def widest_window(windows: List[Union[str, pd.Timedelta]]) -> Union[str, pd.Timedelta]:
+    """Найширше вікно атрибуції"""
+    return max(windows, key=_window_delta)
+
+
+def _window_suffix(window: Union[str, pd.Timedelta]) -> str:
+    """Суфікс колонки для вікна ('24h' -> '24h')"""
+    return window if isinstance(window, str) else f"{int(pd.Timedelta(window).total_seconds())}s"
+
+
+def _window_delta(window: Union[str, pd.Timedelta]) -> pd.Timedelta:
+    """Тривалість вікна ('7d' приймається поряд з '7D')"""
+    if isinstance(window, str) and window.endswith('d'):
+        window = window[:-1] + 'D'
+    return pd.Timedelta(window)
+
+
+def attribute_conversions(push_events: pd.DataFrame,
+                          conversion_events: pd.DataFrame,
+                          windows: List[str] = None,
+                          rule: str = 'last_touch') -> pd.DataFrame:
+    """
+    Атрибутувати кожну конверсію до push-у в межах кожного вікна
+
+    Args:
+        push_events: Події push-ів [gadid, ab_group, push_time]
+        conversion_events: Події конверсій [gadid, conversion_time, is_sale, sale_revenue, ...]
+        windows: Вікна атрибуції (pandas Timedelta рядки), за замовчуванням 1h, 24h, 7d
+        rule: 'last_touch' (останній push до конверсії) або 'first_touch' (перший push у вікні)
+
+    Returns:
+        Конверсії з колонками push_time_<w>, lag_hours_<w>, attributed_<w> для кожного вікна
+    """
+    if rule not in ATTRIBUTION_RULES:
+        raise ValueError(f"Невідоме правило атрибуції: {rule}")
+
+    windows = windows or DEFAULT_WINDOWS
+    pushes, conversions = encode_events(push_events, conversion_events)
+
+    if rule == 'last_touch':
+        # Останній push до конверсії не залежить від вікна - один as-of join
+        nearest = pd.merge_asof(conversions, pushes, left_on='conversion_time', right_on='push_time',
+                                by='key', direction='backward')
+        lag = nearest['conversion_time'] - nearest['push_time']
+        for window in windows:
+            suffix = _window_suffix(window)
+            inside = (lag <= _window_delta(window)).to_numpy()
+            conversions[f'push_time_{suffix}'] = nearest['push_time'].where(inside)
+            conversions[f'lag_hours_{suffix}'] = (lag.dt.total_seconds() / 3600).where(inside)
+            conversions[f'attributed_{suffix}'] = inside
+    else:
+        for window in windows:
+            suffix = _window_suffix(window)
+            starts = conversions.assign(window_start=conversions['conversion_time'] - _window_delta(window))
+            starts = starts.sort_values('window_start', kind='stable')
+            first = pd.merge_asof(starts[['window_start', 'key']].reset_index(), pushes,
+                                  left_on='window_start', right_on='push_time',
+                                  by='key', direction='forward').set_index('index').reindex(conversions.index)
+
+            inside = (first['push_time'] <= conversions['conversion_time']).to_numpy()
+            lag = conversions['conversion_time'] - first['push_time']
+            conversions[f'push_time_{suffix}'] = first['push_time'].where(inside)
+            conversions[f'lag_hours_{suffix}'] = (lag.dt.total_seconds() / 3600).where(inside)
+            conversions[f'attributed_{suffix}'] = inside
+
+    return conversions.drop(columns='key')
+
+
+def attribution_summary(attributed: pd.DataFrame,
+                        by: str = 'ab_group',
+                        revenue_col: str = 'sale_revenue') -> pd.DataFrame:
+    """
+    Частка атрибутованих конверсій та доходу по групах для кожного вікна
+
+    Args:
+        attributed: Результат attribute_conversions
+        by: Колонка групування
+        revenue_col: Колонка доходу події
+
+    Returns:
+        DataFrame: рядок на групу, колонки по вікнах
+    """
+    suffixes = [col[len('attributed_'):] for col in attributed.columns if col.startswith('attributed_')]
+    grouped = attributed.groupby(by, dropna=False)
+
+    summary = pd.DataFrame({'conversions': grouped.size()})
+    if revenue_col in attributed.columns:
+        summary['revenue'] = grouped[revenue_col].sum()
+
+    for suffix in suffixes:
+        flag = attributed[f'attributed_{suffix}']
+        summary[f'attributed_{suffix}'] = flag.groupby(attributed[by], dropna=False).sum()
+        summary[f'attribution_rate_{suffix}'] = summary[f'attributed_{suffix}'] / summary['conversions'] * 100
+        summary[f'median_lag_hours_{suffix}'] = grouped[f'lag_hours_{suffix}'].median()
+        if revenue_col in attributed.columns:
+            summary[f'attributed_revenue_{suffix}'] = (
+                attributed[revenue_col].where(flag, 0).groupby(attributed[by], dropna=False).sum()
+            )
+
+    return summary
+
+
+def lag_distribution(attributed: pd.DataFrame,
+                     window: Union[str, pd.Timedelta] = '7d',
+                     by: str = 'ab_group') -> pd.DataFrame:
+    """
+    Розподіл затримки push → конверсія по бінах (для атрибутованих конверсій)
+
+    Returns:
+        DataFrame: групи × біни затримки
+    """
+    lag = attributed[f'lag_hours_{_window_suffix(window)}']
+    bins = pd.cut(lag, bins=LAG_BINS_HOURS, labels=LAG_LABELS, include_lowest=True)
+    return pd.crosstab(attributed[by], bins).reindex(columns=LAG_LABELS, fill_value=0)
@@ -0,0 +1,197 @@
+"""
+Векторизований bootstrap довірчих інтервалів для конверсії та ARPU
+
+Кожна клітинка (A/B група × tier) стискається в гістограму унікальних пар
+(has_deposit, total_revenue). Через zero-inflated дохід таких пар небагато,
+тому resampling зводиться до мультиноміальних вибірок над гістограмою:
+одна матриця (n_boot × k) замість n_boot проходів по мільйонах рядків.
+"""
+
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Максимальна частка нескінченних реплік (нульова база lift), за якої інтервал ще рахується:
+# відкидання реплік зсуває перцентилі, тому понад поріг інтервал - NaN
+MAX_DROPPED_SHARE = 0.01
+
+
+def compress_cells(df: pd.DataFrame, by: List[str]) -> Dict[Tuple, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Стиснути кожну клітинку в гістограму значень (has_deposit, revenue)
+
+    Args:
+        df: Matched-датасет
+        by: Колонки сегментації
+
+    Returns:
+        {ключ клітинки: (deposit_values, revenue_values, counts)}
+    """
+    hist = (
+        df.assign(
+            has_deposit=df['has_deposit'].fillna(0).astype(int),
+            total_revenue=df['total_revenue'].fillna(0).astype(float)
+        )
+        .groupby(by + ['has_deposit', 'total_revenue'], observed=True)
+        .size()
+        .reset_index(name='count')
+    )
+
+    cells = {}
+    for key, cell in hist.groupby(by, sort=True, observed=True):
+        key = key if isinstance(key, tuple) else (key,)
+        cells[key] = (
+            cell['has_deposit'].to_numpy(dtype=float),
+            cell['total_revenue'].to_numpy(dtype=float),
+            cell['count'].to_numpy(dtype=np.int64)
+        )
+    return cells
+
+
+def resample_histogram(deposit_values: np.ndarray,
+                       revenue_values: np.ndarray,
+                       counts: np.ndarray,
+                       n_boot: int,
+                       seed: np.random.SeedSequence) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bootstrap-розподіли конверсії та ARPU однієї клітинки
+
+    Args:
+        deposit_values: Значення has_deposit кожного біну
+        revenue_values: Значення доходу кожного біну
+        counts: Кількість користувачів у біні
+        n_boot: Кількість bootstrap-вибірок
+        seed: Насіння генератора для відтворюваності
+
+    Returns:
+        Tuple (conversion_boot, arpu_boot) довжини n_boot
+    """
+    rng = np.random.default_rng(seed)
+    n = int(counts.sum())
+    draws = rng.multinomial(n, counts / n, size=n_boot)
+
+    conversion = draws @ deposit_values / n
+    arpu = draws @ revenue_values / n
+    return conversion, arpu
+
+
+def _resample_task(args):
+    """Обгортка для ProcessPoolExecutor"""
+    return resample_histogram(*args)
+
+
+def _interval(samples: np.ndarray, alpha: float,
+              max_dropped: float = MAX_DROPPED_SHARE) -> Tuple[float, float, float]:
+    """
+    Перцентильний інтервал по скінченних репліках
+
+    Returns:
+        Tuple (lower, upper, частка відкинутих реплік); NaN-інтервал,
+        якщо відкинуто більше max_dropped
+    """
+    finite = np.isfinite(samples)
+    dropped = float(1 - finite.mean()) if samples.size else 0.0
+    if not finite.any() or dropped > max_dropped:
+        return np.nan, np.nan, dropped
+    lower, upper = np.percentile(samples[finite], [alpha / 2 * 100, (1 - alpha / 2) * 100])
+    return float(lower), float(upper), dropped
+
+
+def bootstrap_cells(df: pd.DataFrame,
+                    by: List[str],
+                    control_group: str,
+                    n_boot: int = 2000,
+                    confidence: float = 0.95,
+                    seed: int = 42,
+                    n_jobs: Optional[int] = None,
+                    max_dropped: float = MAX_DROPPED_SHARE) -> pd.DataFrame:
+    """
+    Bootstrap-інтервали для всіх клітинок та lift відносно контрольної групи
+
+    Args:
+        df: Matched-датасет
+        by: Колонки сегментації (перша - ab_group)
+        control_group: Ідентифікатор контрольної групи
+        n_boot: Кількість bootstrap-вибірок
+        confidence: Рівень довіри
+        seed: Базове насіння (кожна клітинка отримує власне через SeedSequence.spawn)
+        n_jobs: Кількість процесів (None - всі ядра, 1 - без пулу)
+        max_dropped: Максимальна частка нескінченних реплік (понад неї інтервал - NaN)
+
+    Returns:
+        DataFrame [*by, users, metric, estimate, ci_lower, ci_upper, dropped_share]
+    """
+    cells = compress_cells(df, by)
+    keys = list(cells.keys())
+    seeds = np.random.SeedSequence(seed).spawn(len(keys))
+    tasks = [(*cells[key], n_boot, cell_seed) for key, cell_seed in zip(keys, seeds)]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as executor:
+            results = list(executor.map(_resample_task, tasks))
+    else:
+        results = [_resample_task(task) for task in tasks]
+
+    boot = dict(zip(keys, results))
+    alpha = 1 - confidence
+    rows = []
+
+    for key in keys:
+        deposit_values, revenue_values, counts = cells[key]
+        n = counts.sum()
+        conv_point = counts @ deposit_values / n
+        arpu_point = counts @ revenue_values / n
+        conversion, arpu = boot[key]
+
+        # Точкові оцінки
+        estimates = {
+            'deposit_conversion': (conv_point * 100, conversion * 100),
+            'arpu': (arpu_point, arpu)
+        }
+
+        # Lift відносно контрольної групи в тому ж сегменті
+        control_key = (control_group,) + key[1:]
+        if key[0] != control_group and control_key in boot:
+            c_deposit, c_revenue, c_counts = cells[control_key]
+            c_n = c_counts.sum()
+            c_conv_point = c_counts @ c_deposit / c_n
+            c_arpu_point = c_counts @ c_revenue / c_n
+            c_conversion, c_arpu = boot[control_key]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                estimates.update({
+                    'conversion_diff_pp': ((conv_point - c_conv_point) * 100,
+                                           (conversion - c_conversion) * 100),
+                    'conversion_lift_pct': ((conv_point / c_conv_point - 1) * 100,
+                                            (conversion / c_conversion - 1) * 100),
+                    'arpu_diff': (arpu_point - c_arpu_point, arpu - c_arpu),
+                    'arpu_lift_pct': ((arpu_point / c_arpu_point - 1) * 100,
+                                      (arpu / c_arpu - 1) * 100)
+                })
+
+        for metric, (point, samples) in estimates.items():
+            lower, upper, dropped = _interval(samples, alpha, max_dropped)
+            rows.append({
+                **dict(zip(by, key)),
+                'users': int(n),
+                'metric': metric,
+                'estimate': float(point),
+                'ci_lower': lower,
+                'ci_upper': upper,
+                'dropped_share': dropped
+            })
+
+    result = pd.DataFrame(rows, columns=by + ['users', 'metric', 'estimate', 'ci_lower', 'ci_upper',
+                                              'dropped_share'])
+    unstable = result[result['dropped_share'] > max_dropped]
+    if not unstable.empty:
+        logger.warning(f"⚠️ Bootstrap: {len(unstable)} інтервалів без оцінки - понад "
+                       f"{max_dropped:.0%} реплік з нульовою базою (макс. {unstable['dropped_share'].max():.1%})")
+    return result
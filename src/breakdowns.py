@@ -0,0 +1,212 @@
+"""
+Кілька зрізів EDA одним скануванням таблиці (GROUP BY GROUPING SETS)
+
+Замість окремого запиту на кожен зріз (по днях, годинах, A/B групах, країнах...)
+всі набори вимірів передаються одним GROUPING SETS, а результат ділиться на
+окремі DataFrame за бітовою маскою GROUPING(): біт виміру дорівнює 1, якщо
+рядок агрегований по ньому (виміру немає в наборі). Перший вимір - старший біт.
+"""
+
+from typing import Dict, List, Sequence, Union
+
+import pandas as pd
+
+from src.sql_dialect import SQLDialect, TIME_UNITS
+
+# Набори вимірів: список наборів (імена зрізів - виміри через '_') або словник ім'я -> набір
+Breakdowns = Union[Sequence[Sequence[str]], Dict[str, Sequence[str]]]
+
+# Назва колонки маски GROUPING() в результаті запиту
+GROUPING_COLUMN = 'grouping_mask'
+
+# Назва зрізу без вимірів (загальний підсумок)
+TOTAL = 'total'
+
+
+def push_dimensions(sql: SQLDialect) -> Dict[str, str]:
+    """Виміри push-зрізів (event e JOIN device d)"""
+    return {
+        'date': sql.to_date('e.created_at'),
+        'hour': sql.hour('e.created_at'),
+        'ab_group': 'd.tag',
+        'country': 'd.country_name',
+        'success': 'e.sub_1'
+    }
+
+
+def push_metrics(sql: SQLDialect) -> Dict[str, str]:
+    """Метрики push-зрізів"""
+    return {
+        'users': 'COUNT(DISTINCT d.gadid)',
+        'pushes': sql.count_rows(),
+        'successful_pushes': 'SUM(e.sub_1)',
+        'avg_success_rate': 'AVG(e.sub_1)'
+    }
+
+
+def conversion_dimensions(sql: SQLDialect) -> Dict[str, str]:
+    """Виміри зрізів конверсій (keitaro_clicks)"""
+    return {
+        'date': 'date_key',
+        'hour': sql.hour('datetime'),
+        'country': "COALESCE(country, 'Unknown')",
+        'campaign_id': 'campaign_id'
+    }
+
+
+def conversion_metrics(sql: SQLDialect) -> Dict[str, str]:
+    """Метрики зрізів конверсій"""
+    return {
+        'converters': 'COUNT(DISTINCT sub_id_14)',
+        'events': sql.count_rows(),
+        'deposits': 'SUM(is_sale)',
+        'registrations': 'SUM(is_lead)',
+        'revenue': 'SUM(sale_revenue)'
+    }
+
+
+def period_dimensions(granularity: str) -> List[str]:
+    """Виміри часового зрізу: day - (date), hour - (date, hour)"""
+    if granularity not in TIME_UNITS:
+        raise ValueError(f"Невідома одиниця часу: {granularity} (доступні: {', '.join(TIME_UNITS)})")
+    return ['date'] if granularity == 'day' else ['date', 'hour']
+
+
+def to_period(frame: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """
+    Замінити виміри period_dimensions на колонку period (початок дня/години)
+
+    Args:
+        frame: Зріз з колонками date (та hour)
+        granularity: 'day' або 'hour'
+
+    Returns:
+        DataFrame [period, <решта колонок>]
+    """
+    dims = period_dimensions(granularity)
+    period = pd.to_datetime(frame['date'])
+    if 'hour' in dims:
+        period = period + pd.to_timedelta(frame['hour'].astype('float64'), unit='h')
+    return frame.drop(columns=dims).assign(period=period.to_numpy())[
+        ['period'] + [column for column in frame.columns if column not in dims]
+    ]
+
+
+def rollup(dimensions: Sequence[str]) -> List[List[str]]:
+    """
+    Набори ROLLUP: (a, b, c), (a, b), (a), ()
+
+    Returns:
+        Список наборів від найдетальнішого до загального підсумку
+    """
+    return [list(dimensions[:size]) for size in range(len(dimensions), -1, -1)]
+
+
+def normalize_breakdowns(breakdowns: Breakdowns, available: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    Привести зрізи до словника ім'я -> набір вимірів
+
+    Args:
+        breakdowns: Список наборів або словник ім'я -> набір
+        available: Допустимі виміри
+
+    Returns:
+        Словник у порядку передачі зрізів
+    """
+    if isinstance(breakdowns, dict):
+        named = {name: list(dims) for name, dims in breakdowns.items()}
+    else:
+        named = {('_'.join(dims) or TOTAL): list(dims) for dims in breakdowns}
+
+    if not named:
+        raise ValueError("Не задано жодного зрізу")
+
+    for name, dims in named.items():
+        unknown = [dim for dim in dims if dim not in available]
+        if unknown:
+            raise ValueError(f"Невідомі виміри зрізу {name}: {', '.join(unknown)} "
+                             f"(доступні: {', '.join(available)})")
+        if len(set(dims)) != len(dims):
+            raise ValueError(f"Повторені виміри у зрізі {name}")
+
+    masks = [frozenset(dims) for dims in named.values()]
+    if len(set(masks)) != len(masks):
+        raise ValueError("Зрізи з однаковими наборами вимірів")
+    return named
+
+
+def used_dimensions(breakdowns: Dict[str, List[str]], dimensions: Dict[str, str]) -> List[str]:
+    """Виміри, що входять хоча б в один зріз (у порядку словника вимірів)"""
+    used = {dim for dims in breakdowns.values() for dim in dims}
+    return [dim for dim in dimensions if dim in used]
+
+
+def grouping_mask(dims: Sequence[str], used: Sequence[str]) -> int:
+    """Значення GROUPING(used...) для рядків набору dims"""
+    return sum(1 << (len(used) - 1 - i) for i, dim in enumerate(used) if dim not in dims)
+
+
+def grouping_sets_query(table: str,
+                        dimensions: Dict[str, str],
+                        metrics: Dict[str, str],
+                        breakdowns: Dict[str, List[str]],
+                        where_conditions: List[str]) -> str:
+    """
+    SQL одного GROUPING SETS запиту для всіх зрізів
+
+    Args:
+        table: FROM-частина запиту (таблиця або JOIN)
+        dimensions: Вимір -> SQL-вираз
+        metrics: Метрика -> агрегатний SQL-вираз
+        breakdowns: Результат normalize_breakdowns
+        where_conditions: Умови WHERE
+
+    Returns:
+        SQL з колонками [<виміри>, grouping_mask, <метрики>]
+    """
+    used = used_dimensions(breakdowns, dimensions)
+    select = [f"{dimensions[dim]} as {dim}" for dim in used]
+    if used:
+        select.append(f"GROUPING({', '.join(dimensions[dim] for dim in used)}) as {GROUPING_COLUMN}")
+    else:
+        select.append(f"0 as {GROUPING_COLUMN}")
+    select += [f"{expr} as {name}" for name, expr in metrics.items()]
+
+    sets = ', '.join(f"({', '.join(dimensions[dim] for dim in dims)})" for dims in breakdowns.values())
+    group_by = f"GROUP BY GROUPING SETS ({sets})" if used else ""
+
+    select_sql = ',\n            '.join(select)
+    return f"""
+        SELECT
+            {select_sql}
+        FROM {table}
+        WHERE {' AND '.join(where_conditions)}
+        {group_by}
+        """
+
+
+def split_grouping_sets(result: pd.DataFrame,
+                        breakdowns: Dict[str, List[str]],
+                        dimensions: Dict[str, str]) -> Dict[str, pd.DataFrame]:
+    """
+    Розділити результат GROUPING SETS на DataFrame по зрізах
+
+    Args:
+        result: Результат grouping_sets_query
+        breakdowns: Результат normalize_breakdowns
+        dimensions: Той самий словник вимірів, що й для запиту
+
+    Returns:
+        Словник ім'я зрізу -> DataFrame [<виміри зрізу>, <метрики>], відсортований по вимірах
+    """
+    used = used_dimensions(breakdowns, dimensions)
+    metrics = [column for column in result.columns if column not in used and column != GROUPING_COLUMN]
+    masks = result[GROUPING_COLUMN].astype('int64') if not result.empty else pd.Series(dtype='int64')
+
+    frames = {}
+    for name, dims in breakdowns.items():
+        frame = result.loc[masks == grouping_mask(dims, used), list(dims) + metrics]
+        if dims:
+            frame = frame.sort_values(list(dims), kind='stable')
+        frames[name] = frame.reset_index(drop=True)
+    return frames
@@ -0,0 +1,198 @@
+"""
+Бюджет пам'яті: оцінка розміру результату та вибір стратегії виконання
+
+Перед завантаженням або матчингом оцінюється робочий набір (рядки × ширина
+рядка × запас на проміжні копії). Якщо він не вміщується в бюджет, дані
+обробляються хеш-партиціями по gadid і зберігаються parquet-файлами
+(PartitionedDataset) замість одного DataFrame в пам'яті. Кількість партицій -
+степінь двійки, тому партиції з різною кількістю залишаються узгодженими:
+партиція i з 2^k входить у партицію i mod 2^j при j <= k.
+"""
+
+import os
+import math
+import glob
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITIONS_DIR = 'data/processed/partitions'
+
+# Оцінка ширини рядка в пам'яті pandas (байт, включно з рядковими колонками)
+ROW_BYTES = {
+    'push': 260,
+    'control': 230,
+    'conversions': 220,
+    'matched': 420
+}
+
+# Запас на проміжні копії під час обробки (pd.to_datetime, concat, merge, apply)
+WORKING_SET_FACTOR = 3.0
+
+# Кількість партицій, коли розмір результату невідомий (count() не вдався)
+FALLBACK_PARTITIONS = 16
+
+# Сімейства хешів партиціювання: ClickHouse cityHash64, DuckDB hash та pandas hash_pandas_object
+CLICKHOUSE_HASH = 'cityHash64'
+DUCKDB_HASH = 'duckdb'
+PANDAS_HASH = 'pandas'
+
+
+def frame_row_bytes(df: pd.DataFrame, sample_rows: int = 10_000) -> float:
+    """
+    Фактична ширина рядка DataFrame (deep memory_usage на вибірці)
+
+    Args:
+        df: DataFrame
+        sample_rows: Розмір вибірки для оцінки рядкових колонок
+
+    Returns:
+        Байт на рядок
+    """
+    if df.empty:
+        return 0.0
+    sample = df.head(sample_rows)
+    return float(sample.memory_usage(index=True, deep=True).sum()) / len(sample)
+
+
+def fallback_plan(label: str, budget_mb: float, error: Exception) -> dict:
+    """
+    План для невідомого розміру результату: count() не вдався (напр. таймаут на
+    великому вікні) - саме тоді завантаження в пам'ять найризикованіше
+
+    Returns:
+        Словник plan_execution зі strategy='partitioned' та FALLBACK_PARTITIONS партицій
+    """
+    logger.warning(f"⚠️ {label}: не вдалося оцінити розмір ({error}) → "
+                   f"{FALLBACK_PARTITIONS} хеш-партицій по gadid у parquet")
+    return {'label': label, 'rows': None, 'estimated_mb': None, 'budget_mb': budget_mb,
+            'strategy': 'partitioned', 'partitions': FALLBACK_PARTITIONS}
+
+
+def plan_execution(label: str,
+                   rows: int,
+                   row_bytes: float,
+                   budget_mb: Optional[float]) -> dict:
+    """
+    Вибрати стратегію: все в пам'яті або хеш-партиції
+
+    Args:
+        label: Назва операції для логу
+        rows: Оцінка кількості рядків результату
+        row_bytes: Ширина рядка в пам'яті
+        budget_mb: Бюджет пам'яті (None - без обмеження)
+
+    Returns:
+        Словник {'label', 'rows', 'estimated_mb', 'budget_mb', 'strategy', 'partitions'},
+        strategy - 'in_memory' або 'partitioned'
+    """
+    estimated_mb = rows * row_bytes * WORKING_SET_FACTOR / 1024 ** 2
+    plan = {'label': label, 'rows': int(rows), 'estimated_mb': round(estimated_mb, 1),
+            'budget_mb': budget_mb, 'strategy': 'in_memory', 'partitions': 1}
+
+    if budget_mb is None:
+        return plan
+
+    if estimated_mb <= budget_mb:
+        logger.info(f"🧮 {label}: ~{estimated_mb:.0f} MB ≤ бюджет {budget_mb:.0f} MB → в пам'яті")
+        return plan
+
+    plan['strategy'] = 'partitioned'
+    plan['partitions'] = 2 ** math.ceil(math.log2(estimated_mb / budget_mb))
+    logger.info(f"🧮 {label}: ~{estimated_mb:.0f} MB > бюджет {budget_mb:.0f} MB → "
+                f"{plan['partitions']} хеш-партицій по gadid у parquet")
+    return plan
+
+
+class PartitionedDataset:
+    """
+    Датасет як набір parquet-партицій по хешу gadid
+
+    Повертається замість DataFrame, коли результат не вміщується в бюджет
+    пам'яті. PushAnalyzer приймає його в merge_data, build_cube, ab_analysis
+    та geo_analysis і обробляє партиції по одній.
+    """
+
+    def __init__(self, paths: List[str], hash_family: str = CLICKHOUSE_HASH):
+        """
+        Args:
+            paths: parquet-файли партицій (індекс партиції = позиція у списку)
+            hash_family: Хеш, яким розбито gadid (CLICKHOUSE_HASH, DUCKDB_HASH або PANDAS_HASH)
+        """
+        self.paths = list(paths)
+        self.hash_family = hash_family
+
+    @property
+    def partitions(self) -> int:
+        return len(self.paths)
+
+    def __len__(self) -> int:
+        """Кількість рядків (з метаданих parquet, без читання даних)"""
+        import pyarrow.parquet as pq
+        return sum(pq.ParquetFile(path).metadata.num_rows for path in self.paths)
+
+    def __repr__(self) -> str:
+        # Розмір та час зміни файлів - щоб відбиток кешу змінювався разом із даними
+        files = [(path, os.path.getsize(path), int(os.path.getmtime(path))) for path in self.paths]
+        return f"PartitionedDataset(hash_family={self.hash_family!r}, files={files!r})"
+
+    def read(self, index: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Прочитати одну партицію"""
+        return pd.read_parquet(self.paths[index], columns=columns)
+
+    def iter_frames(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Партиції по одній"""
+        for index in range(self.partitions):
+            yield self.read(index, columns)
+
+    def to_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Весь датасет одним DataFrame (лише якщо він точно вміщується в пам'ять)"""
+        return pd.concat(list(self.iter_frames(columns)), ignore_index=True)
+
+    def matching(self, index: int, partitions: int) -> pd.DataFrame:
+        """
+        Рядки, що відповідають партиції index з partitions (того ж сімейства хешів)
+
+        Returns:
+            DataFrame з gadid, для яких hash % partitions == index
+        """
+        if partitions >= self.partitions:
+            return self.read(index % self.partitions)
+        return pd.concat([self.read(i) for i in range(index, self.partitions, partitions)],
+                         ignore_index=True)
+
+
+def hash_partition_codes(gadids: pd.Series, partitions: int):
+    """Номер партиції кожного gadid (pandas hash, стабільний між запусками)"""
+    return pd.util.hash_pandas_object(gadids.astype(str), index=False).to_numpy() % partitions
+
+
+def split_frame(df: pd.DataFrame, partitions: int, key: str = 'gadid') -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    Розбити DataFrame на хеш-партиції по gadid
+
+    Yields:
+        (index, partition)
+    """
+    codes = hash_partition_codes(df[key], partitions)
+    for index in range(partitions):
+        yield index, df[codes == index]
+
+
+def partition_dir(base_dir: str, name: str) -> str:
+    """Чиста директорія для нового набору партицій"""
+    path = os.path.join(base_dir, name)
+    os.makedirs(path, exist_ok=True)
+    for old in glob.glob(os.path.join(path, 'part-*.parquet')):
+        os.remove(old)
+    return path
+
+
+def write_partition(df: pd.DataFrame, directory: str, index: int) -> str:
+    """Зберегти партицію як part-<index>.parquet"""
+    path = os.path.join(directory, f"part-{index:04d}.parquet")
+    df.to_parquet(path, index=False)
+    return path
@@ -0,0 +1,184 @@
+"""
+Content-addressed кеш графіків PushVisualizer
+
+Відбиток графіка - хеш вхідних даних (повний, не вибірковий), параметрів,
+коду методу та налаштувань рендеру. Кожен унікальний рендер зберігається
+один раз у сховищі (<fingerprint>.<ext>), а файли в outputs/charts - жорсткі
+посилання на нього (або копії, якщо посилання неможливі). Маніфест
+manifest.json зіставляє відбитки з файлами сховища та всіма виходами.
+"""
+
+import os
+import json
+import time
+import pickle
+import shutil
+import hashlib
+import inspect
+import functools
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from src.memo import fingerprint_value, code_fingerprint
+
+DEFAULT_CHART_STORE = 'outputs/charts/.store'
+
+
+class ChartCache:
+    """Сховище унікальних рендерів з маніфестом відбиток → файли"""
+
+    def __init__(self, store_dir: str = DEFAULT_CHART_STORE):
+        """
+        Args:
+            store_dir: Директорія сховища рендерів та маніфесту
+        """
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+
+    def fingerprint(self, chart: str, code: str, params: Dict[str, Any], settings: Dict[str, Any]) -> str:
+        """Відбиток рендеру: графік, код, повні хеші даних, параметри, налаштування"""
+        components = {
+            'chart': chart,
+            'code': code,
+            'params': {name: fingerprint_value(value, sample_rows=None) for name, value in params.items()},
+            'settings': settings
+        }
+        return hashlib.sha1(json.dumps(components, sort_keys=True, default=str).encode()).hexdigest()
+
+    def blob_path(self, fingerprint: str, extension: str) -> str:
+        """Шлях рендеру в сховищі"""
+        return os.path.join(self.store_dir, f"{fingerprint}{extension}")
+
+    def _entry_path(self, fingerprint: str) -> str:
+        return os.path.join(self.store_dir, f"{fingerprint}.json")
+
+    def lookup(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Запис сховища для відбитку (None, якщо рендеру немає)"""
+        path = self._entry_path(fingerprint)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if os.path.exists(os.path.join(self.store_dir, entry['file'])) else None
+
+    def load_result(self, fingerprint: str) -> Any:
+        """Значення, яке повернув метод під час рендеру (якщо було)"""
+        path = os.path.join(self.store_dir, f"{fingerprint}.pkl")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def store(self, fingerprint: str, chart: str, rendered_path: str, result: Any = None) -> Dict[str, Any]:
+        """
+        Перемістити свіжий рендер у сховище та записати його метадані
+
+        Returns:
+            Запис сховища
+        """
+        extension = os.path.splitext(rendered_path)[1]
+        os.replace(rendered_path, self.blob_path(fingerprint, extension))
+
+        if result is not None:
+            with open(os.path.join(self.store_dir, f"{fingerprint}.pkl"), 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        entry = {'fingerprint': fingerprint, 'chart': chart, 'file': f"{fingerprint}{extension}",
+                 'outputs': [], 'created': time.time()}
+        self._write_entry(entry)
+        return entry
+
+    def link(self, entry: Dict[str, Any], save_path: str) -> None:
+        """Зв'язати вихідний файл з рендером сховища (hardlink, інакше копія)"""
+        blob = os.path.join(self.store_dir, entry['file'])
+        os.makedirs(os.path.dirname(save_path) or '.', exist_ok=True)
+
+        if not (os.path.exists(save_path) and os.path.samefile(blob, save_path)):
+            if os.path.lexists(save_path):
+                os.remove(save_path)
+            try:
+                os.link(blob, save_path)
+            except OSError:
+                shutil.copyfile(blob, save_path)
+
+        output = os.path.abspath(save_path)
+        if output not in entry['outputs']:
+            entry['outputs'].append(output)
+            self._write_entry(entry)
+        self.write_manifest()
+
+    def manifest(self) -> pd.DataFrame:
+        """Маніфест: рядок на відбиток [fingerprint, chart, file, outputs, created]"""
+        entries = []
+        for name in sorted(os.listdir(self.store_dir)):
+            if name.endswith('.json') and name != 'manifest.json':
+                entry = self.lookup(name[:-len('.json')])
+                if entry is not None:
+                    entries.append(entry)
+        return pd.DataFrame(entries, columns=['fingerprint', 'chart', 'file', 'outputs', 'created'])
+
+    def write_manifest(self) -> None:
+        """Зберегти зведений маніфест manifest.json"""
+        manifest = {row.fingerprint: {'chart': row.chart, 'file': row.file, 'outputs': row.outputs}
+                    for row in self.manifest().itertuples(index=False)}
+        self._write_json(os.path.join(self.store_dir, 'manifest.json'), manifest)
+
+    def _write_entry(self, entry: Dict[str, Any]) -> None:
+        self._write_json(self._entry_path(entry['fingerprint']), entry)
+
+    @staticmethod
+    def _write_json(path: str, data: Any) -> None:
+        """Атомарний запис JSON (безпечно для паралельних воркерів)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+def cached_chart(func: Callable) -> Callable:
+    """
+    Декоратор методу PushVisualizer: пропустити рендер, якщо ідентичний вже є
+
+    Працює лише коли задано self.cache та save_path. У headless-режимі
+    при збігу графік не малюється взагалі; в інтерактивному - показується,
+    але файл не перезаписується.
+    """
+    signature = inspect.signature(func)
+    code = code_fingerprint(func)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(list(bound.arguments.items())[1:])
+        save_path = params.pop('save_path', None)
+
+        cache = getattr(self, 'cache', None)
+        if cache is None or not save_path:
+            self.last_render = 'rendered'
+            return func(self, *args, **kwargs)
+
+        extension = os.path.splitext(save_path)[1]
+        settings = {'dpi': self.dpi, 'figsize': list(self.figsize), 'extension': extension,
+                    'plotlyjs': getattr(self, 'include_plotlyjs', None)}
+        fingerprint = cache.fingerprint(func.__name__, code, params, settings)
+        entry = cache.lookup(fingerprint)
+
+        if entry is not None:
+            self.last_render = 'cached'
+            result = cache.load_result(fingerprint) if self.headless else func(self, **params)
+            cache.link(entry, save_path)
+            return result
+
+        self.last_render = 'rendered'
+        rendered_path = cache.blob_path(fingerprint, f".{os.getpid()}.tmp{extension}")
+        result = func(self, save_path=rendered_path, **params)
+        entry = cache.store(fingerprint, func.__name__, rendered_path, result)
+        cache.link(entry, save_path)
+        return result
+
+    return wrapper
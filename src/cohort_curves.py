@@ -0,0 +1,160 @@
+"""
+Кумулятивні криві конверсії по днях від першого push-у
+
+Час до першої конверсії (first_conversion - якір) розкладається по цілих днях
+у 2D-гістограму (сегменти × дні) одним np.bincount. Користувачі без
+конверсії цензуруються на кінці вікна спостереження, тому крива - оцінка
+Каплана-Мейєра кумулятивної конверсії (cumsum log(1 - події / під ризиком)),
+а довірчі інтервали - за формулою Грінвуда. Якір push-груп - first_push;
+контрольна група 6 push-ів не отримує, тому її якір береться з розподілу
+first_push push-груп того ж сегмента (або початок вікна push-ів).
+"""
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from config.constants import CONTROL_GROUP, PUSH_START_DATE, CONVERSION_END_DATE
+
+# Якорі контрольної групи
+CONTROL_ANCHORS = ['sampled', 'start']
+
+DAY_NS = 86_400 * 10 ** 9
+
+CURVE_COLUMNS = ['day', 'users', 'at_risk', 'conversions', 'censored',
+                 'cumulative_conversion', 'ci_lower', 'ci_upper']
+
+
+def control_anchors(push_times: np.ndarray,
+                    push_segments: np.ndarray,
+                    control_segments: np.ndarray,
+                    method: str = 'sampled',
+                    seed: int = 42) -> np.ndarray:
+    """
+    Якорі користувачів контрольної групи (datetime64[ns])
+
+    Args:
+        push_times: first_push користувачів push-груп
+        push_segments: Коди пулів push-користувачів (сегментація без ab_group)
+        control_segments: Коди пулів контрольних користувачів
+        method: 'sampled' - випадковий first_push push-групи того ж пулу,
+                'start' - початок вікна push-ів (PUSH_START_DATE)
+        seed: Насіння вибірки
+
+    Returns:
+        Масив якорів довжини control_segments
+    """
+    if method not in CONTROL_ANCHORS:
+        raise ValueError(f"Невідомий якір контролю: {method} (доступні: {', '.join(CONTROL_ANCHORS)})")
+
+    anchors = np.full(control_segments.size, np.datetime64(pd.Timestamp(PUSH_START_DATE), 'ns'))
+    if method == 'start' or push_times.size == 0:
+        return anchors
+
+    rng = np.random.default_rng(seed)
+    for segment in np.unique(control_segments):
+        rows = np.flatnonzero(control_segments == segment)
+        pool = push_times[push_segments == segment]
+        pool = pool if pool.size else push_times
+        anchors[rows] = pool[rng.integers(0, pool.size, rows.size)]
+    return anchors
+
+
+def conversion_curves(df: pd.DataFrame,
+                      by: List[str],
+                      max_days: int = 14,
+                      confidence: float = 0.95,
+                      control_anchor: str = 'sampled',
+                      observation_end: Optional[str] = None,
+                      converted_col: Optional[str] = None,
+                      seed: int = 42) -> pd.DataFrame:
+    """
+    Кумулятивна конверсія по днях від якоря для кожного сегмента
+
+    Args:
+        df: Matched-датасет (ab_group, first_push, first_conversion, колонки by)
+        by: Колонки сегментації
+        max_days: Горизонт кривої в днях
+        confidence: Рівень довіри інтервалів
+        control_anchor: Якір контрольної групи ('sampled' або 'start')
+        observation_end: Кінець спостереження (за замовчуванням день після CONVERSION_END_DATE)
+        converted_col: Прапорець конвертера (напр. has_deposit); None - будь-яка конверсія
+        seed: Насіння вибірки якорів контролю
+
+    Returns:
+        DataFrame [*by, day, users, at_risk, conversions, censored,
+                   cumulative_conversion, ci_lower, ci_upper] (конверсія та CI у %)
+    """
+    end = np.datetime64(pd.Timestamp(observation_end) if observation_end
+                        else pd.Timestamp(CONVERSION_END_DATE) + pd.Timedelta(days=1), 'ns')
+
+    grouped = df.groupby(by, sort=True, observed=True, dropna=False)
+    segments = grouped.ngroup().to_numpy()
+    keys = grouped.size().index.to_frame(index=False)
+    n_segments = len(keys)
+
+    anchor = pd.to_datetime(df['first_push']).to_numpy(dtype='datetime64[ns]').copy()
+    is_control = df['ab_group'].astype(str).to_numpy() == CONTROL_GROUP
+    has_push = ~is_control & ~np.isnat(anchor)
+    # Пули якорів - по сегментації без ab_group (контроль і push-групи того ж tier)
+    pool_by = [col for col in by if col != 'ab_group']
+    pools = (df.groupby(pool_by, sort=True, observed=True, dropna=False).ngroup().to_numpy()
+             if pool_by else np.zeros(len(df), dtype=np.int64))
+    anchor[is_control] = control_anchors(anchor[has_push], pools[has_push], pools[is_control],
+                                         control_anchor, seed)
+
+    first_conversion = pd.to_datetime(df['first_conversion']).to_numpy(dtype='datetime64[ns]')
+    converted = ~np.isnat(first_conversion) & (first_conversion < end)
+    if converted_col is not None:
+        converted &= df[converted_col].fillna(0).to_numpy() > 0
+
+    valid = ~np.isnat(anchor) & (anchor < end)
+    # Конверсія до якоря - користувач уже конвертований на день 0
+    event_day = np.clip((first_conversion - anchor).astype('int64') // DAY_NS, 0, None)
+    censor_day = (end - anchor).astype('int64') // DAY_NS
+
+    bins = max_days + 1
+    events = converted & valid & (event_day <= max_days)
+    # Неконвертовані вибувають на кінці спостереження; пізніші конверсії - після горизонту
+    censored = valid & ~converted & (censor_day <= max_days)
+
+    def histogram(mask: np.ndarray, day: np.ndarray) -> np.ndarray:
+        flat = segments[mask] * bins + day[mask]
+        return np.bincount(flat, minlength=n_segments * bins).reshape(n_segments, bins)
+
+    users = np.bincount(segments[valid], minlength=n_segments)
+    event_hist = histogram(events, event_day)
+    censor_hist = histogram(censored, censor_day)
+
+    # Під ризиком у день d: без подій та цензурування до d (цензуровані в день d
+    # спостерігались частину дня і лишаються під ризиком - конвенція Каплана-Мейєра для зв'язків)
+    at_risk = (users[:, None]
+               - np.cumsum(event_hist, axis=1) + event_hist
+               - np.cumsum(censor_hist, axis=1) + censor_hist)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hazard = np.where(at_risk > 0, event_hist / at_risk, 0.0)
+        survival = np.exp(np.cumsum(np.log1p(-np.minimum(hazard, 1.0)), axis=1))
+        greenwood = np.cumsum(np.where(at_risk > event_hist,
+                                       event_hist / (at_risk * (at_risk - event_hist)), 0.0), axis=1)
+
+    cumulative = 1 - survival
+    z = stats.norm.ppf(1 - (1 - confidence) / 2)
+    half_width = z * survival * np.sqrt(greenwood)
+
+    curves = pd.DataFrame({
+        'segment': np.repeat(np.arange(n_segments), bins),
+        'day': np.tile(np.arange(bins), n_segments),
+        'users': np.repeat(users, bins),
+        'at_risk': at_risk.ravel(),
+        'conversions': event_hist.ravel(),
+        'censored': censor_hist.ravel(),
+        'cumulative_conversion': cumulative.ravel() * 100,
+        'ci_lower': np.clip(cumulative - half_width, 0, 1).ravel() * 100,
+        'ci_upper': np.clip(cumulative + half_width, 0, 1).ravel() * 100
+    })
+
+    curves = keys.iloc[curves['segment']].reset_index(drop=True).join(curves.drop(columns='segment'))
+    return curves[by + CURVE_COLUMNS]
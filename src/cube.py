@@ -0,0 +1,294 @@
+import os
+import pandas as pd
+import numpy as np
+from typing import List, Iterable
+import logging
+from config.constants import (
+    CONTROL_GROUP,
+    PUSH_BUCKET_BINS,
+    PUSH_BUCKET_LABELS,
+    CONTROL_PUSH_BUCKET
+)
+
+logger = logging.getLogger(__name__)
+
+# Виміри куба
+CUBE_DIMENSIONS = ['ab_group', 'tier', 'country', 'push_bucket', 'first_push_date']
+
+# Адитивні міри куба (сумуються при roll-up та злитті кубів)
+CUBE_MEASURES = [
+    'users',
+    'depositors',
+    'registrants',
+    'deposits',
+    'registrations',
+    'revenue',
+    'revenue_sq',
+    'pushes',
+    'pushes_sq'
+]
+
+
+def assign_push_bucket(push_count: pd.Series) -> pd.Series:
+    """
+    Розбиває кількість push-ів на бакети (контрольна група - окремий бакет '0')
+
+    Args:
+        push_count: Кількість push-ів на користувача
+
+    Returns:
+        Series з мітками бакетів
+    """
+    buckets = pd.cut(push_count, bins=PUSH_BUCKET_BINS, labels=PUSH_BUCKET_LABELS).astype(object)
+    buckets[push_count.fillna(0) <= 0] = CONTROL_PUSH_BUCKET
+    return buckets
+
+
+def ab_stats_from_totals(ab_stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Додає конверсії, ARPU та тип групи до агрегатів A/B груп
+
+    Args:
+        ab_stats: Агрегати з колонками total_users, users_with_deposits,
+                  users_with_regs, total_deposits (індекс - ab_group)
+
+    Returns:
+        Фінальна таблиця A/B аналізу
+    """
+    # Конверсії
+    ab_stats['deposit_conversion'] = (
+        ab_stats['users_with_deposits'] / ab_stats['total_users'] * 100
+    ).round(3)
+
+    ab_stats['reg_conversion'] = (
+        ab_stats['users_with_regs'] / ab_stats['total_users'] * 100
+    ).round(3)
+
+    # Додаємо ARPU
+    ab_stats['arpu'] = (
+        ab_stats['total_deposits'] / ab_stats['total_users']
+    ).round(4)
+
+    # Додаємо тип групи
+    ab_stats['group_type'] = 'Push Group'
+    if CONTROL_GROUP in ab_stats.index:
+        ab_stats.loc[CONTROL_GROUP, 'group_type'] = 'Control Group'
+
+    return ab_stats
+
+
+class PushCube:
+    """
+    OLAP-куб адитивних метрик по ab_group × tier × country × push_bucket × first_push_date
+
+    Будується за один прохід по matched-датасету. Усі звіти (A/B, geo,
+    push-бакети, часова лінія) отримуються дешевим roll-up куба. Куби з
+    неперетинних наборів користувачів (наприклад, по днях першого push-у)
+    можна зливати та зберігати між запусками.
+    """
+
+    def __init__(self, data: pd.DataFrame = None):
+        """
+        Args:
+            data: Готові клітинки куба (колонки CUBE_DIMENSIONS + CUBE_MEASURES)
+        """
+        if data is None:
+            data = pd.DataFrame(columns=CUBE_DIMENSIONS + CUBE_MEASURES)
+        self.data = data
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'PushCube':
+        """
+        Побудувати куб з matched-датасету за один groupby
+
+        Args:
+            df: Результат PushAnalyzer.merge_data
+
+        Returns:
+            PushCube
+        """
+        push_count = df['push_count'].fillna(0)
+        revenue = df['total_revenue'].fillna(0).astype(float)
+
+        cells = pd.DataFrame({
+            'ab_group': df['ab_group'].astype(str),
+            'tier': df['tier'],
+            'country': df['country'],
+            'push_bucket': assign_push_bucket(push_count),
+            'first_push_date': pd.to_datetime(df['first_push']).dt.normalize(),
+            'users': 1,
+            'depositors': df['has_deposit'],
+            'registrants': df['has_registration'],
+            'deposits': df['total_deposits'],
+            'registrations': df['total_registrations'],
+            'revenue': revenue,
+            'revenue_sq': revenue ** 2,
+            'pushes': push_count,
+            'pushes_sq': push_count.astype(float) ** 2
+        })
+
+        data = cells.groupby(CUBE_DIMENSIONS, dropna=False, sort=False).sum().reset_index()
+        logger.info(f"🧊 Куб побудовано: {len(df)} записів → {len(data)} клітинок")
+        return cls(data)
+
+    @classmethod
+    def concat(cls, cubes: Iterable['PushCube']) -> 'PushCube':
+        """
+        Злити кілька кубів (наприклад, за різні дні) в один
+
+        Args:
+            cubes: Куби з неперетинних наборів користувачів
+
+        Returns:
+            Об'єднаний PushCube
+        """
+        frames = [cube.data for cube in cubes if not cube.data.empty]
+        if not frames:
+            return cls()
+
+        data = pd.concat(frames, ignore_index=True)
+        data = data.groupby(CUBE_DIMENSIONS, dropna=False, sort=False)[CUBE_MEASURES].sum().reset_index()
+        return cls(data)
+
+    def merge(self, other: 'PushCube') -> 'PushCube':
+        """Злити з іншим кубом"""
+        return PushCube.concat([self, other])
+
+    def filter(self, **conditions) -> 'PushCube':
+        """
+        Зріз куба по значеннях вимірів
+
+        Args:
+            **conditions: вимір=значення або вимір=[значення, ...]
+
+        Returns:
+            Новий PushCube з відібраними клітинками
+        """
+        mask = pd.Series(True, index=self.data.index)
+        for dim, value in conditions.items():
+            if isinstance(value, (list, tuple, set)):
+                mask &= self.data[dim].isin(value)
+            else:
+                mask &= self.data[dim] == value
+        return PushCube(self.data[mask].reset_index(drop=True))
+
+    def rollup(self, dims: List[str], dropna: bool = True) -> pd.DataFrame:
+        """
+        Roll-up куба до заданих вимірів з похідними метриками
+
+        Args:
+            dims: Виміри для групування
+            dropna: Відкидати клітинки з порожніми вимірами (напр. first_push_date контрольної групи)
+
+        Returns:
+            DataFrame з мірами, конверсіями, ARPU та стандартними відхиленнями
+        """
+        stats = self.data.groupby(dims, dropna=dropna)[CUBE_MEASURES].sum()
+        users = stats['users'].where(stats['users'] > 0)
+
+        stats['deposit_conversion'] = stats['depositors'] / users * 100
+        stats['reg_conversion'] = stats['registrants'] / users * 100
+        stats['arpu'] = stats['revenue'] / users
+        stats['avg_pushes'] = stats['pushes'] / users
+        stats['push_std'] = np.sqrt(
+            (stats['pushes_sq'] / users - stats['avg_pushes'] ** 2).clip(lower=0)
+        )
+        stats['revenue_std'] = np.sqrt(
+            (stats['revenue_sq'] / users - stats['arpu'] ** 2).clip(lower=0)
+        )
+
+        return stats
+
+    def ab_stats(self) -> pd.DataFrame:
+        """Таблиця A/B аналізу (як PushAnalyzer.ab_analysis)"""
+        totals = self.rollup(['ab_group'])
+
+        ab_stats = pd.DataFrame({
+            'total_users': totals['users'],
+            'avg_pushes': totals['avg_pushes'],
+            'users_with_deposits': totals['depositors'],
+            'users_with_regs': totals['registrants'],
+            'total_deposits': totals['deposits'],
+            'total_registrations': totals['registrations']
+        }).round(2)
+
+        return ab_stats_from_totals(ab_stats)
+
+    def geo_stats(self) -> pd.DataFrame:
+        """Таблиця географічного аналізу (як PushAnalyzer.geo_analysis)"""
+        totals = self.rollup(['tier', 'ab_group'])
+
+        geo_stats = pd.DataFrame({
+            'gadid': totals['users'],
+            'push_count': totals['avg_pushes'],
+            'has_deposit': totals['depositors'],
+            'total_deposits': totals['deposits']
+        }).round(2)
+
+        geo_stats['conversion_rate'] = (
+            geo_stats['has_deposit'] / geo_stats['gadid'] * 100
+        ).round(3)
+
+        return geo_stats
+
+    def push_bucket_stats(self, by: str = 'tier') -> pd.DataFrame:
+        """
+        Конверсія по бакетах кількості push-ів (без контрольної групи)
+
+        Args:
+            by: Вимір сегментації (tier, ab_group, country)
+
+        Returns:
+            DataFrame з колонками [by, push_bucket, gadid, has_deposit, conversion_rate]
+        """
+        cube = PushCube(self.data[self.data['push_bucket'] != CONTROL_PUSH_BUCKET])
+        totals = cube.rollup([by, 'push_bucket'])
+
+        stats = pd.DataFrame({
+            'gadid': totals['users'],
+            'has_deposit': totals['depositors']
+        }).reset_index()
+        stats['push_bucket'] = pd.Categorical(
+            stats['push_bucket'], categories=PUSH_BUCKET_LABELS, ordered=True
+        )
+        stats = stats.sort_values([by, 'push_bucket']).reset_index(drop=True)
+
+        stats['conversion_rate'] = stats['has_deposit'] / stats['gadid'] * 100
+
+        return stats
+
+    def daily_stats(self) -> pd.DataFrame:
+        """
+        Користувачі та депозити по даті першого push-у та A/B групі
+
+        Returns:
+            DataFrame з колонками [first_push_date, ab_group, gadid, has_deposit]
+        """
+        totals = self.rollup(['first_push_date', 'ab_group'])
+
+        daily_stats = pd.DataFrame({
+            'gadid': totals['users'],
+            'has_deposit': totals['depositors']
+        }).reset_index()
+        daily_stats['first_push_date'] = daily_stats['first_push_date'].dt.date
+
+        return daily_stats
+
+    def save(self, path: str) -> None:
+        """Зберегти куб у parquet"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.data.to_parquet(path)
+        logger.info(f"💾 Куб збережено: {path} ({len(self.data)} клітинок)")
+
+    @classmethod
+    def load(cls, path: str) -> 'PushCube':
+        """Завантажити куб з parquet"""
+        return cls(pd.read_parquet(path))
+
+    @classmethod
+    def load_many(cls, paths: Iterable[str]) -> 'PushCube':
+        """Завантажити та злити кілька збережених кубів (напр. по днях)"""
+        return cls.concat(cls.load(path) for path in paths)
+
+    def __len__(self) -> int:
+        return len(self.data)
@@ -1,32 +1,57 @@
 import os
-import sys
-# Додаємо кореневу директорію проекту до sys.path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.insert(0, project_root)
-
+import hashlib
 import pandas as pd
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union, Callable
 import logging
 from src.database import PushDatabase
+from config.database_config import DEFAULT_SNAPSHOT_DIR
+from src.tracing import instrument
+from src import polars_engine
+from src.budget import (
+    PartitionedDataset,
+    ROW_BYTES,
+    DEFAULT_PARTITIONS_DIR,
+    plan_execution,
+    fallback_plan,
+    partition_dir,
+    write_partition
+)
 from config.constants import *
 
 logger = logging.getLogger(__name__)
 
+@instrument
 class DataLoader:
     """
     Клас для завантаження та підготовки даних для аналізу push-сповіщень
     Використовує PushDatabase для доступу до даних
     """
     
-    def __init__(self, cache_enabled: bool = True):
+    def __init__(self,
+                 cache_enabled: bool = True,
+                 memory_budget_mb: Optional[float] = None,
+                 partitions_dir: str = DEFAULT_PARTITIONS_DIR,
+                 backend: str = 'clickhouse',
+                 snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+                 engine: str = 'pandas'):
         """
         Ініціалізація з опціональним кешуванням
         
         Args:
             cache_enabled: Використовувати кеш для запитів
+            memory_budget_mb: Бюджет пам'яті - більші результати завантажуються
+                              хеш-партиціями в parquet (None - без обмеження)
+            partitions_dir: Директорія партицій
+            backend: Бекенд PushDatabase ('clickhouse' або 'duckdb')
+            snapshot_dir: Директорія parquet-знімків для DuckDB-бекенду
+            engine: Рушій обробки: 'pandas' або 'polars' (lazy-плани, результат - pandas)
         """
-        self.db = PushDatabase(cache_enabled=cache_enabled)
+        self.db = PushDatabase(cache_enabled=cache_enabled, backend=backend, snapshot_dir=snapshot_dir)
         self.target_campaign_ids = None
+        self.campaign_apps = None
+        self.memory_budget_mb = memory_budget_mb
+        self.partitions_dir = partitions_dir
+        self.engine = polars_engine.check_engine(engine)
         
     def load_push_data(self, 
                       start_date: str = PUSH_START_DATE,
@@ -62,7 +87,7 @@ class DataLoader:
     def load_complete_dataset(self,
                              start_date: str = PUSH_START_DATE,
                              end_date: str = PUSH_END_DATE,
-                             include_control_group: bool = True) -> pd.DataFrame:
+                             include_control_group: bool = True) -> Union[pd.DataFrame, PartitionedDataset]:
         """
         Завантажити повний набір даних включаючи контрольну групу
         
@@ -72,10 +97,23 @@ class DataLoader:
             include_control_group: Включити групу 6 (контрольну)
             
         Returns:
-            DataFrame з усіма групами включаючи контрольну
+            DataFrame з усіма групами включаючи контрольну, або PartitionedDataset,
+            якщо оцінка розміру перевищує memory_budget_mb
         """
         logger.info("📊 Завантаження повного набору даних з контрольною групою...")
         
+        plan = self.plan_load(
+            'load_complete_dataset',
+            lambda: self.db.count_push_data(start_date, end_date)
+            + (self.db.count_control_group_data() if include_control_group else 0),
+            ROW_BYTES['push']
+        )
+        if plan['strategy'] == 'partitioned':
+            return self._load_complete_partitioned(start_date, end_date, include_control_group,
+                                                   plan['partitions'])
+        if self.engine == 'polars':
+            return self._load_complete_polars(start_date, end_date, include_control_group)
+        
         # Завантажуємо push-дані (групи 1-5)
         push_df = self.load_push_data(start_date, end_date)
         
@@ -106,7 +144,8 @@ class DataLoader:
                            start_date: str = CONVERSION_START_DATE,
                            end_date: str = CONVERSION_END_DATE,
                            campaign_ids: List[int] = None,
-                           conversion_types: List[str] = ['deposit', 'registration']) -> pd.DataFrame:
+                           conversion_types: List[str] = ['deposit', 'registration'],
+                           partitions: Optional[int] = None) -> Union[pd.DataFrame, PartitionedDataset]:
         """
         Завантажити дані про конверсії
         
@@ -115,9 +154,11 @@ class DataLoader:
             end_date: Кінцева дата
             campaign_ids: ID кампаній (автоматично знаходяться якщо None)
             conversion_types: Типи конверсій
+            partitions: Примусова кількість хеш-партицій (степінь двійки)
             
         Returns:
-            DataFrame з конверсіями
+            DataFrame з конверсіями, або PartitionedDataset при перевищенні
+            memory_budget_mb чи заданих partitions
         """
         logger.info(f"💰 Завантаження конверсій: {start_date} - {end_date}")
         
@@ -127,6 +168,22 @@ class DataLoader:
                 self.target_campaign_ids = self.find_campaign_groups()
             campaign_ids = self.target_campaign_ids
         
+        if partitions is None:
+            partitions = self.plan_load(
+                'load_conversion_data',
+                lambda: self.db.count_conversion_data(start_date, end_date, campaign_ids, conversion_types),
+                ROW_BYTES['conversions']
+            )['partitions']
+        if partitions > 1:
+            def load_partition(partition: tuple) -> pd.DataFrame:
+                df = self.db.get_conversion_data(start_date, end_date, campaign_ids,
+                                                 conversion_types, partition=partition)
+                return self._add_campaign_app(self._process_conversion_data(df)) if not df.empty else df
+            
+            params = {'start_date': start_date, 'end_date': end_date,
+                      'campaign_ids': campaign_ids, 'conversion_types': conversion_types}
+            return self._load_partitioned('conversions', params, partitions, load_partition)
+        
         df = self.db.get_conversion_data(start_date, end_date, campaign_ids, conversion_types)
         
         if df.empty:
@@ -134,11 +191,73 @@ class DataLoader:
             return df
         
         # Додаткова обробка
-        df = self._process_conversion_data(df)
+        df = self._add_campaign_app(self._process_conversion_data(df))
         
         logger.info(f"✅ Завантажено {len(df)} конверсій для {df['gadid'].nunique()} користувачів")
         return df
     
+    def load_push_events(self,
+                         start_date: str = PUSH_START_DATE,
+                         end_date: str = PUSH_END_DATE,
+                         ab_groups: List[str] = None) -> pd.DataFrame:
+        """
+        Завантажити окремі події push-ів для event-level атрибуції
+        
+        Args:
+            start_date: Початкова дата
+            end_date: Кінцева дата
+            ab_groups: Фільтр по A/B групах
+            
+        Returns:
+            DataFrame [gadid, ab_group, push_time]
+        """
+        logger.info(f"📨 Завантаження push-подій: {start_date} - {end_date}")
+        
+        df = self.db.get_push_events(start_date, end_date, ab_groups)
+        
+        if df.empty:
+            logger.warning("⚠️ Push-події не знайдено!")
+            return df
+        
+        df['push_time'] = pd.to_datetime(df['push_time'])
+        df['ab_group'] = df['ab_group'].astype(str).astype('category')
+        
+        logger.info(f"✅ Завантажено {len(df)} push-подій")
+        return df
+    
+    def load_conversion_events(self,
+                               start_date: str = CONVERSION_START_DATE,
+                               end_date: str = CONVERSION_END_DATE,
+                               campaign_ids: List[int] = None) -> pd.DataFrame:
+        """
+        Завантажити окремі події конверсій для event-level атрибуції
+        
+        Args:
+            start_date: Початкова дата
+            end_date: Кінцева дата
+            campaign_ids: ID кампаній (автоматично знаходяться якщо None)
+            
+        Returns:
+            DataFrame [gadid, conversion_time, is_sale, is_lead, sale_revenue, campaign_id]
+        """
+        logger.info(f"💳 Завантаження подій конверсій: {start_date} - {end_date}")
+        
+        if campaign_ids is None:
+            if self.target_campaign_ids is None:
+                self.target_campaign_ids = self.find_campaign_groups()
+            campaign_ids = self.target_campaign_ids
+        
+        df = self.db.get_conversion_events(start_date, end_date, campaign_ids)
+        
+        if df.empty:
+            logger.warning("⚠️ Події конверсій не знайдено!")
+            return df
+        
+        df['conversion_time'] = pd.to_datetime(df['conversion_time'])
+        
+        logger.info(f"✅ Завантажено {len(df)} подій конверсій")
+        return df
+    
     def find_campaign_groups(self, app_names: List[str] = TARGET_APPS) -> List[int]:
         """
         Знайти ID кампаній цільових застосунків
@@ -157,6 +276,8 @@ class DataLoader:
             logger.warning("⚠️ Кампанії не знайдено!")
             return []
         
+        self.campaign_apps = self._campaign_app_map(campaigns_df, app_names)
+        
         # Фільтруємо активні кампанії
         active_campaigns = campaigns_df[campaigns_df['state'] == 'active']
         campaign_ids = active_campaigns['id'].tolist()
@@ -166,6 +287,42 @@ class DataLoader:
         
         return campaign_ids
     
+    @staticmethod
+    def _campaign_app_map(campaigns_df: pd.DataFrame, app_names: List[str] = TARGET_APPS) -> Dict[int, str]:
+        """
+        Застосунок кожної кампанії (перша назва з app_names у name або alias)
+        
+        Args:
+            campaigns_df: Результат PushDatabase.get_campaign_info
+            app_names: Список назв застосунків
+            
+        Returns:
+            Словник {campaign_id: застосунок}
+        """
+        apps = {}
+        for campaign in campaigns_df.itertuples(index=False):
+            text = f"{campaign.name} {getattr(campaign, 'alias', '')}".lower()
+            app = next((name for name in app_names if name.lower() in text), None)
+            if app is not None:
+                apps[int(campaign.id)] = app
+        return apps
+    
+    def _add_campaign_app(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Додати колонку app (застосунок кампанії конверсії) за campaign_id
+        
+        Push-дані не містять застосунку, тому app відомий лише для користувачів
+        з конверсіями; після merge_data у решти він порожній.
+        """
+        if 'campaign_id' not in df.columns:
+            return df
+        if self.campaign_apps is None:
+            self.campaign_apps = self._campaign_app_map(self.db.get_campaign_info())
+        
+        campaign_ids = pd.to_numeric(df['campaign_id'], errors='coerce')
+        df['app'] = campaign_ids.map(self.campaign_apps)
+        return df
+    
     def load_full_dataset(self, 
                          push_filters: Dict[str, Any] = None,
                          conversion_filters: Dict[str, Any] = None) -> tuple[pd.DataFrame, pd.DataFrame]:
@@ -244,6 +401,9 @@ class DataLoader:
         Returns:
             Оброблені дані
         """
+        if self.engine == 'polars':
+            return polars_engine.to_pandas(polars_engine.process_push(polars_engine.lazy(df)))
+        
         # Конвертуємо дати
         df['first_push'] = pd.to_datetime(df['first_push'])
         df['last_push'] = pd.to_datetime(df['last_push'])
@@ -281,6 +441,9 @@ class DataLoader:
         Returns:
             Оброблені дані
         """
+        if self.engine == 'polars':
+            return polars_engine.to_pandas(polars_engine.process_conversions(polars_engine.lazy(df)))
+        
         # Конвертуємо дати
         df['first_conversion'] = pd.to_datetime(df['first_conversion'])
         df['last_conversion'] = pd.to_datetime(df['last_conversion'])
@@ -318,6 +481,8 @@ class DataLoader:
         """
         if df.empty:
             return df
+        if self.engine == 'polars':
+            return polars_engine.to_pandas(polars_engine.process_control(polars_engine.lazy(df)))
             
         # Заповнюємо порожні значення для консистентності з push-даними
         df['campaign_duration_hours'] = 0
@@ -351,6 +516,9 @@ class DataLoader:
         """
         if push_df.empty or control_df.empty:
             return control_df
+        if self.engine == 'polars':
+            push_schema = polars_engine.lazy(push_df.head(0)).collect_schema()
+            return polars_engine.to_pandas(polars_engine.align_control(push_schema, polars_engine.lazy(control_df)))
         
         # Отримуємо всі колонки з push_df
         push_columns = set(push_df.columns)
@@ -384,7 +552,8 @@ class DataLoader:
     def save_processed_data(self, 
                           push_df: pd.DataFrame, 
                           conversions_df: pd.DataFrame,
-                          merged_df: pd.DataFrame = None) -> None:
+                          merged_df: pd.DataFrame = None,
+                          sketches=None) -> None:
         """
         Зберегти оброблені дані
         
@@ -392,6 +561,7 @@ class DataLoader:
             push_df: Push-дані
             conversions_df: Конверсії
             merged_df: Об'єднані дані (опціонально)
+            sketches: SegmentSketches квантилів (опціонально)
         """
         logger.info("💾 Збереження оброблених даних...")
         
@@ -405,6 +575,9 @@ class DataLoader:
         if merged_df is not None:
             merged_df.to_parquet('data/processed/merged_data.parquet')
         
+        if sketches is not None:
+            sketches.save('data/processed/quantile_sketches.parquet')
+        
         logger.info("✅ Дані збережено в data/processed/")
     
     def load_processed_data(self) -> tuple[pd.DataFrame, pd.DataFrame, Optional[pd.DataFrame]]:
@@ -431,6 +604,95 @@ class DataLoader:
             logger.warning("⚠️ Оброблені дані не знайдено")
             return pd.DataFrame(), pd.DataFrame(), None
     
+    def plan_load(self, label: str, count_rows: Callable[[], int], row_bytes: float) -> Dict[str, Any]:
+        """
+        Стратегія завантаження з урахуванням memory_budget_mb
+        
+        Args:
+            label: Назва операції для логу
+            count_rows: Функція серверного count() (викликається лише при заданому бюджеті)
+            row_bytes: Оцінка ширини рядка в пам'яті
+            
+        Returns:
+            План plan_execution ('in_memory' або 'partitioned' з кількістю партицій);
+            якщо count() не вдався - fallback_plan (партиції)
+        """
+        if self.memory_budget_mb is None:
+            return plan_execution(label, 0, row_bytes, None)
+        try:
+            rows = count_rows()
+        except Exception as e:
+            return fallback_plan(label, self.memory_budget_mb, e)
+        return plan_execution(label, rows, row_bytes, self.memory_budget_mb)
+    
+    def _load_partitioned(self,
+                          name: str,
+                          params: Dict[str, Any],
+                          partitions: int,
+                          load_partition: Callable[[tuple], pd.DataFrame]) -> PartitionedDataset:
+        """
+        Завантажити та зберегти хеш-партиції по одній (у пам'яті лише поточна)
+        
+        Директорія містить хеш усіх параметрів запиту - завантаження з іншими
+        фільтрами не перезаписує партиції вже повернутого PartitionedDataset.
+        """
+        params = {**params, 'backend': self.db.backend, 'partitions': partitions}
+        params_hash = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:12]
+        directory = partition_dir(self.partitions_dir, f"{name}_{params_hash}")
+        paths = []
+        for index in range(partitions):
+            df = load_partition((index, partitions))
+            paths.append(write_partition(df, directory, index))
+            logger.info(f"📦 {name}: партиція {index + 1}/{partitions} - {len(df)} записів")
+            del df
+        return PartitionedDataset(paths, self.db.sql.hash_family)
+    
+    def _load_complete_polars(self,
+                              start_date: str,
+                              end_date: str,
+                              include_control_group: bool) -> pd.DataFrame:
+        """load_complete_dataset одним Polars-планом (обробка, вирівнювання та concat без проміжних копій)"""
+        push_df = self.db.get_push_data(start_date, end_date)
+        if push_df.empty:
+            logger.warning("⚠️ Push-дані не знайдено!")
+            return push_df
+        
+        control_df = self.db.get_control_group_data(start_date, end_date) if include_control_group else None
+        if control_df is not None and control_df.empty:
+            logger.warning("⚠️ Контрольна група не знайдена")
+            control_df = None
+        
+        complete_df = polars_engine.to_pandas(polars_engine.complete_dataset(
+            polars_engine.lazy(push_df),
+            polars_engine.lazy(control_df) if control_df is not None else None
+        ))
+        
+        logger.info(f"📋 Загалом {len(complete_df)} записів для {complete_df['gadid'].nunique()} користувачів")
+        return complete_df
+    
+    def _load_complete_partitioned(self,
+                                   start_date: str,
+                                   end_date: str,
+                                   include_control_group: bool,
+                                   partitions: int) -> PartitionedDataset:
+        """Push-дані та контрольна група хеш-партиціями по gadid"""
+        def load_partition(partition: tuple) -> pd.DataFrame:
+            push_df = self.db.get_push_data(start_date, end_date, partition=partition)
+            if not push_df.empty:
+                push_df = self._process_push_data(push_df)
+            if not include_control_group:
+                return push_df
+            
+            control_df = self.db.get_control_group_data(start_date, end_date, partition=partition)
+            if control_df.empty:
+                return push_df
+            control_df = self._align_dataframes(push_df, self._process_control_group_data(control_df))
+            return pd.concat([push_df, control_df], ignore_index=True)
+        
+        params = {'start_date': start_date, 'end_date': end_date,
+                  'include_control_group': include_control_group}
+        return self._load_partitioned('push', params, partitions, load_partition)
+    
     def clear_cache(self):
         """Очищує кеш бази даних"""
         self.db.clear_cache()
@@ -1,46 +1,108 @@
 import os
-import sys
-# Додаємо кореневу директорію проекту до sys.path
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.insert(0, project_root)
-
 import pandas as pd
 import numpy as np
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple, Callable
 import logging
 from datetime import datetime, timedelta
 import time
-from config.database_config import DatabaseManager
+from config.database_config import DatabaseManager, DuckDBManager, DEFAULT_SNAPSHOT_DIR, SNAPSHOT_TABLES, snapshot_fingerprint
 from config.constants import *
+from src.tracing import instrument
+from src.sql_dialect import get_dialect
+from src.breakdowns import (
+    Breakdowns,
+    push_dimensions,
+    push_metrics,
+    conversion_dimensions,
+    conversion_metrics,
+    normalize_breakdowns,
+    grouping_sets_query,
+    split_grouping_sets,
+    period_dimensions,
+    to_period
+)
+from src.adaptive import (
+    SplitMemory,
+    DEFAULT_SPLIT_MEMORY,
+    MAX_FAILURES,
+    BACKOFF_SECONDS,
+    MAX_BACKOFF_SECONDS,
+    classify_error,
+    merge_partials,
+    pieces_split,
+    plan_pieces,
+    split_piece
+)
 
 # Налаштування логування
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Злиття часткових агрегатів при адаптивному розбитті (див. execute_adaptive)
+PUSH_DATA_MERGE = {
+    'keys': ['gadid', 'ab_group', 'country'],
+    'aggregations': {'push_count': 'sum', 'first_push': 'min', 'last_push': 'max',
+                     'push_days': 'sum', 'success_sum': 'sum', 'success_count': 'sum'},
+    'ratios': {'avg_success_rate': ('success_sum', 'success_count')},
+    'order_by': 'push_count',
+    'ascending': False
+}
+
+CONTROL_GROUP_MERGE = {
+    'keys': ['gadid', 'ab_group', 'country'],
+    'aggregations': {}
+}
+
+CONVERSION_DATA_MERGE = {
+    'keys': ['gadid', 'country', 'campaign_id'],
+    'aggregations': {'total_deposits': 'sum', 'total_registrations': 'sum',
+                     'first_conversion': 'min', 'last_conversion': 'max',
+                     'conversion_events': 'sum', 'total_revenue': 'sum'}
+}
+
+@instrument
 class PushDatabase:
     """
     Високорівневий клас для роботи з базами даних push-аналізу
     Надає зручні методи для отримання даних з можливістю кешування
     """
     
-    def __init__(self, cache_enabled: bool = True):
+    def __init__(self,
+                 cache_enabled: bool = True,
+                 backend: str = 'clickhouse',
+                 snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+                 adaptive: bool = True,
+                 split_memory_path: Optional[str] = DEFAULT_SPLIT_MEMORY):
         """
         Ініціалізація з опціональним кешуванням
         
         Args:
             cache_enabled: Чи використовувати кешування запитів
+            backend: 'clickhouse' (віддалені сервери) або 'duckdb' (локальні parquet-знімки)
+            snapshot_dir: Директорія знімків для DuckDB-бекенду
+            adaptive: Розбивати агрегуючі запити на помилках пам'яті/таймауту
+            split_memory_path: Файл з розбиттями, що спрацювали (None - не зберігати)
         """
-        self.db_manager = DatabaseManager()
+        self.backend = backend
+        self.sql = get_dialect(backend)
+        self.db_manager = DuckDBManager(snapshot_dir) if backend == 'duckdb' else DatabaseManager()
         self.cache_enabled = cache_enabled
         self._cache = {}
+        self.adaptive = adaptive
+        self.split_memory = SplitMemory(split_memory_path)
         
         # Створюємо директорії для кешу
         os.makedirs('data/cache', exist_ok=True)
     
     def _get_cache_key(self, query: str, params: dict = None) -> str:
-        """Генерує ключ для кешування"""
+        """Генерує ключ для кешування (для DuckDB - з директорією та відбитком файлів знімка)"""
         import hashlib
         cache_string = f"{query}_{str(params)}"
+        if self.backend != 'clickhouse':
+            cache_string += f"_{self.backend}"
+        if self.backend == 'duckdb':
+            snapshot_dir = self.db_manager.snapshot_dir
+            cache_string += f"_{os.path.abspath(snapshot_dir)}_{snapshot_fingerprint(snapshot_dir)}"
         return hashlib.md5(cache_string.encode()).hexdigest()
     
     def _load_from_cache(self, cache_key: str) -> Optional[pd.DataFrame]:
@@ -88,12 +150,7 @@ class PushDatabase:
         
         # Виконуємо запит
         try:
-            if database == 'statistic':
-                client = self.db_manager.connect_statistic()
-            elif database == 'keitaro':
-                client = self.db_manager.connect_keitaro()
-            else:
-                raise ValueError(f"Невідома база даних: {database}")
+            client = self._client(database)
             
             logger.info(f"🔍 Виконання запиту до {database}...")
             start_time = time.time()
@@ -113,11 +170,130 @@ class PushDatabase:
             logger.error(f"❌ Помилка виконання запиту: {e}")
             raise
     
+    def _client(self, database: str):
+        """Клієнт бази 'statistic' або 'keitaro'"""
+        if database == 'statistic':
+            return self.db_manager.connect_statistic()
+        elif database == 'keitaro':
+            return self.db_manager.connect_keitaro()
+        raise ValueError(f"Невідома база даних: {database}")
+    
+    def execute_adaptive(self,
+                         name: str,
+                         database: str,
+                         build_query: Callable[..., str],
+                         params: dict,
+                         merge: Dict[str, Any],
+                         start_date: Optional[str] = None,
+                         end_date: Optional[str] = None,
+                         partition: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
+        """
+        Агрегуючий запит з адаптивним розбиттям на помилках пам'яті та таймауту
+        
+        Частина, що впала з MEMORY_LIMIT_EXCEEDED або таймаутом, ділиться навпіл
+        (по хеш-бакету gadid або діапазону дат) і повторюється з паузою;
+        часткові агрегати зливаються. Розбиття, з яким запит пройшов,
+        зберігається в split_memory і використовується з першої спроби наступного разу.
+        
+        Args:
+            name: Назва запиту в split_memory
+            database: 'statistic' або 'keitaro'
+            build_query: (start_date, end_date, partition, mergeable) -> SQL
+            params: Параметри запиту для кешування
+            merge: Аргументи merge_partials (keys, aggregations, ratios, order_by, ascending)
+            start_date: Початкова дата вікна (None - запит без дат)
+            end_date: Кінцева дата вікна
+            partition: Хеш-партиція по gadid (index, count)
+        
+        Returns:
+            DataFrame, як у нерозбитого запиту
+        """
+        if not self.adaptive:
+            return self.execute_query(database, build_query(start_date, end_date, partition, False), params)
+        
+        cache_key = self._get_cache_key(build_query(start_date, end_date, partition, False), params)
+        cached_data = self._load_from_cache(cache_key)
+        if cached_data is not None:
+            return cached_data
+        
+        memory_key = f"{self.backend}.{name}"
+        remembered = self.split_memory.get(memory_key)
+        pending = plan_pieces(remembered, start_date, end_date, partition)
+        done, results = [], []
+        failures = consecutive = 0
+        last_error = None
+        
+        client = self._client(database)
+        logger.info(f"🔍 Виконання запиту {name} до {database} ({len(pending)} частин)...")
+        start_time = time.time()
+        
+        while pending:
+            piece = pending.pop(0)
+            mergeable = len(pending) + len(done) > 0 or failures > 0
+            try:
+                results.append(self.db_manager.query(client, build_query(*piece, mergeable)))
+                done.append(piece)
+                consecutive = 0
+            except Exception as e:
+                kind = classify_error(e)
+                pieces = split_piece(piece, kind) if kind else None
+                failures += 1
+                if pieces is None or failures > MAX_FAILURES:
+                    logger.error(f"❌ Помилка виконання запиту {name}: {e}")
+                    raise
+                
+                last_error = kind
+                delay = min(BACKOFF_SECONDS * 2 ** consecutive, MAX_BACKOFF_SECONDS)
+                consecutive += 1
+                logger.warning(f"⚠️ {name}: {kind} на частині {piece} - ділю на {len(pieces)}, "
+                               f"повтор через {delay:.0f}с")
+                time.sleep(delay)
+                pending = pieces + pending
+        
+        # Єдина частина виконується як звичайний запит, кілька - з допоміжними колонками для злиття
+        df = merge_partials(results, **merge) if len(done) > 1 else results[0]
+        split = pieces_split(done, start_date, end_date, partition)
+        if failures and split != remembered:
+            self.split_memory.remember(memory_key, split, last_error)
+            logger.info(f"🧩 {name}: запам'ятовано розбиття {split['date_pieces']} x {split['hash_pieces']}")
+        
+        logger.info(f"✅ Запит виконано за {time.time() - start_time:.2f}с, отримано {len(df)} записів "
+                    f"({len(done)} частин)")
+        if cache_key and not df.empty:
+            self._save_to_cache(df, cache_key)
+        return df
+    
+    def count_rows(self, database: str, query: str) -> int:
+        """
+        Кількість рядків результату запиту (count() на сервері, без завантаження)
+        
+        Args:
+            database: 'statistic' або 'keitaro'
+            query: SQL запит
+            
+        Returns:
+            Кількість рядків
+            
+        Raises:
+            Exception: помилка сервера прокидається (порожній результат не означає 0 рядків)
+        """
+        df = self.db_manager.query(self._client(database),
+                                   f"SELECT {self.sql.count_rows()} AS rows FROM ({query})")
+        return int(df['rows'].iloc[0])
+    
+    def _partition_conditions(self, column: str, partition: Optional[Tuple[int, int]]) -> List[str]:
+        """Умова хеш-партиції (index, count): однаковий gadid завжди в однаковій партиції"""
+        if partition is None:
+            return []
+        index, count = partition
+        return [f"{self.sql.hash(column)} % {count} = {index}"]
+    
     def get_push_data(self, 
                      start_date: str = PUSH_START_DATE,
                      end_date: str = PUSH_END_DATE,
                      ab_groups: List[str] = None,
-                     countries: List[str] = None) -> pd.DataFrame:
+                     countries: List[str] = None,
+                     partition: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
         """
         Отримує дані про push-сповіщення з фільтрацією
         
@@ -126,18 +302,50 @@ class PushDatabase:
             end_date: Кінцева дата (YYYY-MM-DD)
             ab_groups: Список A/B груп для фільтрації
             countries: Список країн для фільтрації
+            partition: Хеш-партиція по gadid (index, count) для чанкованого завантаження
         
         Returns:
             DataFrame з push-даними
         """
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'ab_groups': ab_groups,
+            'countries': countries,
+            'partition': partition
+        }
+        
+        return self.execute_adaptive(
+            'push_data', 'statistic',
+            lambda start, end, bucket, mergeable: self._push_data_query(start, end, ab_groups, countries,
+                                                                        bucket, mergeable),
+            params, PUSH_DATA_MERGE, start_date, end_date, partition
+        )
+    
+    def count_push_data(self,
+                        start_date: str = PUSH_START_DATE,
+                        end_date: str = PUSH_END_DATE,
+                        ab_groups: List[str] = None,
+                        countries: List[str] = None) -> int:
+        """Кількість рядків get_push_data (count() на сервері, без завантаження)"""
+        return self.count_rows('statistic', self._push_data_query(start_date, end_date, ab_groups, countries))
+    
+    def _push_data_query(self,
+                         start_date: str,
+                         end_date: str,
+                         ab_groups: List[str] = None,
+                         countries: List[str] = None,
+                         partition: Optional[Tuple[int, int]] = None,
+                         mergeable: bool = False) -> str:
+        """SQL запиту push-даних (mergeable - сума та кількість sub_1 замість AVG для злиття частин)"""
         # Базовий запит
         where_conditions = [
             f"e.event_type = {PUSH_EVENT_TYPE}",
             f"e.type = {ANDROID_TYPE}",
             "d.gadid IS NOT NULL",
             "d.tag IS NOT NULL",
-            f"toDate(e.created_at) >= '{start_date}'",
-            f"toDate(e.created_at) <= '{end_date}'"
+            f"{self.sql.to_date('e.created_at')} >= '{start_date}'",
+            f"{self.sql.to_date('e.created_at')} <= '{end_date}'"
         ]
         
         # Додаткові фільтри
@@ -149,48 +357,163 @@ class PushDatabase:
             country_filter = "', '".join(countries)
             where_conditions.append(f"d.country_name IN ('{country_filter}')")
         
-        query = f"""
+        where_conditions += self._partition_conditions(self.sql.to_string('d.gadid'), partition)
+        
+        success_columns = ("SUM(e.sub_1) as success_sum,\n            COUNT(e.sub_1) as success_count"
+                           if mergeable else "AVG(e.sub_1) as avg_success_rate")
+        
+        return f"""
         SELECT 
-            toString(d.gadid) as gadid,
+            {self.sql.to_string('d.gadid')} as gadid,
             d.tag as ab_group,
             d.country_name as country,
             COUNT(*) as push_count,
             MIN(e.created_at) as first_push,
             MAX(e.created_at) as last_push,
-            COUNT(DISTINCT toDate(e.created_at)) as push_days,
-            AVG(e.sub_1) as avg_success_rate
+            COUNT(DISTINCT {self.sql.to_date('e.created_at')}) as push_days,
+            {success_columns}
         FROM event e
         JOIN device d ON e.device_id = d.id
         WHERE {' AND '.join(where_conditions)}
         GROUP BY gadid, ab_group, country
         ORDER BY push_count DESC
         """
+    
+    def get_push_events(self,
+                        start_date: str = PUSH_START_DATE,
+                        end_date: str = PUSH_END_DATE,
+                        ab_groups: List[str] = None) -> pd.DataFrame:
+        """
+        Отримує окремі події відправки push-ів (без агрегації по користувачу)
+        
+        Args:
+            start_date: Початкова дата
+            end_date: Кінцева дата
+            ab_groups: Список A/B груп для фільтрації
+            
+        Returns:
+            DataFrame [gadid, ab_group, push_time], відсортований за часом
+        """
+        where_conditions = [
+            f"e.event_type = {PUSH_EVENT_TYPE}",
+            f"e.type = {ANDROID_TYPE}",
+            "d.gadid IS NOT NULL",
+            f"{self.sql.to_date('e.created_at')} >= '{start_date}'",
+            f"{self.sql.to_date('e.created_at')} <= '{end_date}'"
+        ]
+        
+        if ab_groups:
+            ab_filter = "', '".join(ab_groups)
+            where_conditions.append(f"d.tag IN ('{ab_filter}')")
+        
+        query = f"""
+        SELECT 
+            {self.sql.to_string('d.gadid')} as gadid,
+            d.tag as ab_group,
+            e.created_at as push_time
+        FROM event e
+        JOIN device d ON e.device_id = d.id
+        WHERE {' AND '.join(where_conditions)}
+        ORDER BY push_time
+        """
         
         params = {
+            'events': 'push',
             'start_date': start_date,
             'end_date': end_date,
-            'ab_groups': ab_groups,
-            'countries': countries
+            'ab_groups': ab_groups
         }
         
         return self.execute_query('statistic', query, params)
     
+    def get_conversion_events(self,
+                              start_date: str = CONVERSION_START_DATE,
+                              end_date: str = CONVERSION_END_DATE,
+                              campaign_ids: List[int] = None) -> pd.DataFrame:
+        """
+        Отримує окремі події конверсій з часом (без агрегації по користувачу)
+        
+        Args:
+            start_date: Початкова дата
+            end_date: Кінцева дата
+            campaign_ids: Список ID кампаній
+            
+        Returns:
+            DataFrame [gadid, conversion_time, is_sale, is_lead, sale_revenue, campaign_id]
+        """
+        where_conditions = [
+            "sub_id_14 IS NOT NULL",
+            "sub_id_14 != ''",
+            f"date_key >= '{start_date}'",
+            f"date_key <= '{end_date}'",
+            "(is_sale > 0 OR is_lead > 0)"
+        ]
+        
+        if campaign_ids:
+            ids_filter = ','.join(map(str, campaign_ids))
+            where_conditions.append(f"campaign_id IN ({ids_filter})")
+        
+        query = f"""
+        SELECT 
+            sub_id_14 as gadid,
+            datetime as conversion_time,
+            is_sale,
+            is_lead,
+            sale_revenue,
+            campaign_id
+        FROM keitaro_clicks
+        WHERE {' AND '.join(where_conditions)}
+        ORDER BY conversion_time
+        """
+        
+        params = {
+            'events': 'conversion',
+            'start_date': start_date,
+            'end_date': end_date,
+            'campaign_ids': campaign_ids
+        }
+        
+        return self.execute_query('keitaro', query, params)
+    
     def get_control_group_data(self,
                               start_date: str = PUSH_START_DATE,
-                              end_date: str = PUSH_END_DATE) -> pd.DataFrame:
+                              end_date: str = PUSH_END_DATE,
+                              partition: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
         """
         Отримує дані контрольної групи (група 6 - без push-сповіщень)
         
         Args:
             start_date: Початкова дата
             end_date: Кінцева дата
+            partition: Хеш-партиція по gadid (index, count)
             
         Returns:
             DataFrame з користувачами групи 6
         """
-        query = f"""
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'partition': partition
+        }
+        
+        return self.execute_adaptive(
+            'control_group', 'statistic',
+            lambda start, end, bucket, mergeable: self._control_group_query(bucket),
+            params, CONTROL_GROUP_MERGE, partition=partition
+        )
+    
+    def count_control_group_data(self) -> int:
+        """Кількість рядків get_control_group_data (count() на сервері)"""
+        return self.count_rows('statistic', self._control_group_query())
+    
+    def _control_group_query(self, partition: Optional[Tuple[int, int]] = None) -> str:
+        """SQL запиту контрольної групи"""
+        partition_filter = ''.join(f"\n          AND {condition}"
+                                   for condition in self._partition_conditions(self.sql.to_string('gadid'), partition))
+        
+        return f"""
         SELECT 
-            toString(gadid) as gadid,
+            {self.sql.to_string('gadid')} as gadid,
             tag as ab_group,
             country_name as country,
             0 as push_count,
@@ -201,22 +524,16 @@ class PushDatabase:
         FROM device
         WHERE tag = '6'
           AND type = {ANDROID_TYPE}
-          AND gadid IS NOT NULL
+          AND gadid IS NOT NULL{partition_filter}
         GROUP BY gadid, tag, country_name
         """
-        
-        params = {
-            'start_date': start_date,
-            'end_date': end_date
-        }
-        
-        return self.execute_query('statistic', query, params)
     
     def get_conversion_data(self,
                            start_date: str = CONVERSION_START_DATE,
                            end_date: str = CONVERSION_END_DATE,
                            campaign_ids: List[int] = None,
-                           conversion_types: List[str] = ['deposit', 'registration']) -> pd.DataFrame:
+                           conversion_types: List[str] = ['deposit', 'registration'],
+                           partition: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
         """
         Отримує дані про конверсії з фільтрацією
         
@@ -225,10 +542,42 @@ class PushDatabase:
             end_date: Кінцева дата
             campaign_ids: Список ID кампаній
             conversion_types: Типи конверсій ('deposit', 'registration')
+            partition: Хеш-партиція по gadid (index, count)
         
         Returns:
             DataFrame з конверсіями
         """
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'campaign_ids': campaign_ids,
+            'conversion_types': conversion_types,
+            'partition': partition
+        }
+        
+        return self.execute_adaptive(
+            'conversion_data', 'keitaro',
+            lambda start, end, bucket, mergeable: self._conversion_data_query(start, end, campaign_ids,
+                                                                              conversion_types, bucket),
+            params, CONVERSION_DATA_MERGE, start_date, end_date, partition
+        )
+    
+    def count_conversion_data(self,
+                              start_date: str = CONVERSION_START_DATE,
+                              end_date: str = CONVERSION_END_DATE,
+                              campaign_ids: List[int] = None,
+                              conversion_types: List[str] = ['deposit', 'registration']) -> int:
+        """Кількість рядків get_conversion_data (count() на сервері)"""
+        return self.count_rows('keitaro', self._conversion_data_query(start_date, end_date,
+                                                                      campaign_ids, conversion_types))
+    
+    def _conversion_data_query(self,
+                               start_date: str,
+                               end_date: str,
+                               campaign_ids: List[int] = None,
+                               conversion_types: List[str] = ['deposit', 'registration'],
+                               partition: Optional[Tuple[int, int]] = None) -> str:
+        """SQL запиту конверсій"""
         where_conditions = [
             "sub_id_14 IS NOT NULL",
             "sub_id_14 != ''",
@@ -251,7 +600,9 @@ class PushDatabase:
         if conversion_filter:
             where_conditions.append(f"({' OR '.join(conversion_filter)})")
         
-        query = f"""
+        where_conditions += self._partition_conditions('sub_id_14', partition)
+        
+        return f"""
         SELECT 
             sub_id_14 as gadid,
             SUM(is_sale) as total_deposits,
@@ -266,15 +617,6 @@ class PushDatabase:
         WHERE {' AND '.join(where_conditions)}
         GROUP BY gadid, country, campaign_id
         """
-        
-        params = {
-            'start_date': start_date,
-            'end_date': end_date,
-            'campaign_ids': campaign_ids,
-            'conversion_types': conversion_types
-        }
-        
-        return self.execute_query('keitaro', query, params)
     
     def get_campaign_info(self, app_names: List[str] = TARGET_APPS) -> pd.DataFrame:
         """
@@ -330,7 +672,7 @@ class PushDatabase:
         
         query = f"""
         SELECT 
-            toString(gadid) as gadid,
+            {self.sql.to_string('gadid')} as gadid,
             country_name,
             language_name,
             tag,
@@ -339,7 +681,7 @@ class PushDatabase:
             timezone,
             created_at as device_created_at
         FROM device
-        WHERE toString(gadid) IN ('{gadids_filter}')
+        WHERE {self.sql.to_string('gadid')} IN ('{gadids_filter}')
         """
         
         params = {'gadids': len(gadids_sample)}
@@ -367,8 +709,8 @@ class PushDatabase:
         JOIN device d ON e.device_id = d.id
         WHERE e.event_type = {PUSH_EVENT_TYPE}
           AND e.type = {ANDROID_TYPE}
-          AND toDate(e.created_at) >= '{PUSH_START_DATE}'
-          AND toDate(e.created_at) <= '{PUSH_END_DATE}'
+          AND {self.sql.to_date('e.created_at')} >= '{PUSH_START_DATE}'
+          AND {self.sql.to_date('e.created_at')} <= '{PUSH_END_DATE}'
         """
         
         push_stats = self.execute_query('statistic', push_query)
@@ -399,6 +741,212 @@ class PushDatabase:
         
         return summary
     
+    def get_push_breakdown(self,
+                           granularity: str = 'day',
+                           start_date: str = PUSH_START_DATE,
+                           end_date: str = PUSH_END_DATE,
+                           ab_groups: List[str] = None) -> pd.DataFrame:
+        """
+        Push-сповіщення по днях або годинах і A/B групах (зріз get_push_breakdowns)
+        
+        Args:
+            granularity: 'day' або 'hour'
+            start_date: Початкова дата
+            end_date: Кінцева дата
+            ab_groups: Список A/B груп
+        
+        Returns:
+            DataFrame [period, ab_group, users, pushes, avg_success_rate]
+        """
+        breakdown = {'period': period_dimensions(granularity) + ['ab_group']}
+        frame = self.get_push_breakdowns(breakdown, start_date, end_date, ab_groups)['period']
+        return to_period(frame, granularity)[['period', 'ab_group', 'users', 'pushes', 'avg_success_rate']]
+    
+    def get_conversion_breakdown(self,
+                                 granularity: str = 'day',
+                                 start_date: str = CONVERSION_START_DATE,
+                                 end_date: str = CONVERSION_END_DATE,
+                                 campaign_ids: List[int] = None) -> pd.DataFrame:
+        """
+        Конверсії по днях або годинах (зріз get_conversion_breakdowns)
+        
+        Args:
+            granularity: 'day' або 'hour'
+            start_date: Початкова дата
+            end_date: Кінцева дата
+            campaign_ids: Список ID кампаній
+        
+        Returns:
+            DataFrame [period, converters, deposits, registrations, revenue]
+        """
+        breakdown = {'period': period_dimensions(granularity)}
+        frame = self.get_conversion_breakdowns(breakdown, start_date, end_date, campaign_ids)['period']
+        return to_period(frame, granularity)[['period', 'converters', 'deposits', 'registrations', 'revenue']]
+    
+    def get_push_breakdowns(self,
+                            breakdowns: Breakdowns,
+                            start_date: str = PUSH_START_DATE,
+                            end_date: str = PUSH_END_DATE,
+                            ab_groups: List[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Кілька push-зрізів одним скануванням event JOIN device (GROUPING SETS)
+        
+        Args:
+            breakdowns: Набори вимірів (date, hour, ab_group, country, success), напр.
+                [['date'], ['hour'], ['ab_group'], ['ab_group', 'date'], ['country'], []],
+                або словник ім'я -> набір; rollup() дає набори ROLLUP
+            start_date: Початкова дата
+            end_date: Кінцева дата
+            ab_groups: Список A/B груп
+        
+        Returns:
+            Словник ім'я зрізу -> DataFrame [<виміри>, users, pushes, successful_pushes, avg_success_rate]
+        """
+        dimensions = push_dimensions(self.sql)
+        named = normalize_breakdowns(breakdowns, list(dimensions))
+        
+        where_conditions = [
+            f"e.event_type = {PUSH_EVENT_TYPE}",
+            f"e.type = {ANDROID_TYPE}",
+            "d.gadid IS NOT NULL",
+            f"{self.sql.to_date('e.created_at')} >= '{start_date}'",
+            f"{self.sql.to_date('e.created_at')} <= '{end_date}'"
+        ]
+        
+        if ab_groups:
+            groups_filter = "', '".join(ab_groups)
+            where_conditions.append(f"d.tag IN ('{groups_filter}')")
+        
+        query = grouping_sets_query('event e\n        JOIN device d ON e.device_id = d.id', dimensions,
+                                    push_metrics(self.sql), named, where_conditions)
+        
+        params = {
+            'breakdowns': named,
+            'start_date': start_date,
+            'end_date': end_date,
+            'ab_groups': ab_groups
+        }
+        
+        result = self.execute_query('statistic', query, params)
+        return split_grouping_sets(result, named, dimensions)
+    
+    def get_conversion_breakdowns(self,
+                                  breakdowns: Breakdowns,
+                                  start_date: str = CONVERSION_START_DATE,
+                                  end_date: str = CONVERSION_END_DATE,
+                                  campaign_ids: List[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Кілька зрізів конверсій одним скануванням keitaro_clicks (GROUPING SETS)
+        
+        Args:
+            breakdowns: Набори вимірів (date, hour, country, campaign_id) або словник ім'я -> набір
+            start_date: Початкова дата
+            end_date: Кінцева дата
+            campaign_ids: Список ID кампаній
+        
+        Returns:
+            Словник ім'я зрізу -> DataFrame [<виміри>, converters, events, deposits, registrations, revenue]
+        """
+        dimensions = conversion_dimensions(self.sql)
+        named = normalize_breakdowns(breakdowns, list(dimensions))
+        
+        where_conditions = [
+            "sub_id_14 IS NOT NULL",
+            "sub_id_14 != ''",
+            f"date_key >= '{start_date}'",
+            f"date_key <= '{end_date}'",
+            "(is_sale > 0 OR is_lead > 0)"
+        ]
+        
+        if campaign_ids:
+            ids_filter = ','.join(map(str, campaign_ids))
+            where_conditions.append(f"campaign_id IN ({ids_filter})")
+        
+        query = grouping_sets_query('keitaro_clicks', dimensions, conversion_metrics(self.sql),
+                                    named, where_conditions)
+        
+        params = {
+            'breakdowns': named,
+            'start_date': start_date,
+            'end_date': end_date,
+            'campaign_ids': campaign_ids
+        }
+        
+        result = self.execute_query('keitaro', query, params)
+        return split_grouping_sets(result, named, dimensions)
+    
+    def export_snapshot(self,
+                        output_dir: str = DEFAULT_SNAPSHOT_DIR,
+                        push_start_date: str = PUSH_START_DATE,
+                        push_end_date: str = PUSH_END_DATE,
+                        conversion_start_date: str = CONVERSION_START_DATE,
+                        conversion_end_date: str = CONVERSION_END_DATE,
+                        device_chunks: int = 8) -> Dict[str, int]:
+        """
+        Експортує сирі таблиці з ClickHouse у parquet-знімки для DuckDB-бекенду
+        
+        Структура: <output_dir>/<таблиця>/*.parquet. event та keitaro_clicks
+        вивантажуються по днях (лише push-події та рядки конверсій), device -
+        хеш-частинами по id, keitaro_groups - повністю.
+        
+        Args:
+            output_dir: Директорія знімків
+            push_start_date: Початкова дата push-подій
+            push_end_date: Кінцева дата push-подій
+            conversion_start_date: Початкова дата конверсій
+            conversion_end_date: Кінцева дата конверсій
+            device_chunks: Кількість частин таблиці device
+        
+        Returns:
+            Словник {таблиця: кількість рядків}
+        """
+        if self.backend != 'clickhouse':
+            raise ValueError("Знімки експортуються лише з ClickHouse-бекенду")
+        
+        logger.info(f"📤 Експорт знімків у {output_dir}...")
+        
+        exports = {table: [] for table in SNAPSHOT_TABLES}
+        
+        for day in pd.date_range(push_start_date, push_end_date).strftime('%Y-%m-%d'):
+            exports['event'].append(('statistic', day, f"""
+            SELECT * FROM event
+            WHERE event_type = {PUSH_EVENT_TYPE}
+              AND type = {ANDROID_TYPE}
+              AND toDate(created_at) = '{day}'
+            """))
+        
+        for chunk in range(device_chunks):
+            exports['device'].append(('statistic', f"{chunk:04d}", f"""
+            SELECT * FROM device
+            WHERE cityHash64(id) % {device_chunks} = {chunk}
+            """))
+        
+        for day in pd.date_range(conversion_start_date, conversion_end_date).strftime('%Y-%m-%d'):
+            exports['keitaro_clicks'].append(('keitaro', day, f"""
+            SELECT * FROM keitaro_clicks
+            WHERE date_key = '{day}'
+              AND (is_sale > 0 OR is_lead > 0)
+            """))
+        
+        exports['keitaro_groups'].append(('keitaro', 'all', "SELECT * FROM keitaro_groups"))
+        
+        rows = {}
+        for table, parts in exports.items():
+            table_dir = os.path.join(output_dir, table)
+            os.makedirs(table_dir, exist_ok=True)
+            rows[table] = 0
+        
+            for database, part, query in parts:
+                df = self.execute_query(database, query, use_cache=False)
+                if df.empty:
+                    continue
+                df.to_parquet(os.path.join(table_dir, f"{table}-{part}.parquet"), index=False)
+                rows[table] += len(df)
+        
+            logger.info(f"✅ {table}: {rows[table]:,} рядків")
+        
+        return rows
+    
     def clear_cache(self):
         """Очищає кеш"""
         cache_dir = 'data/cache'
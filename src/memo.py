@@ -0,0 +1,448 @@
+"""
+Мемоізація результатів PushAnalyzer за відбитками входів
+
+Відбиток DataFrame: схема (колонки та типи), кількість рядків і хеш усіх
+рядків (векторизований hash_pandas_object по колонках), тому зміна будь-якого
+рядка інвалідує результат. Разом з
+параметрами методу та хешем його коду відбиток дає ключ результату.
+Результати зберігаються в пам'яті (LRU) та на диску (parquet для DataFrame,
+pickle для решти) з маніфестом index.json та витісненням за розміром.
+Для кожного промаху можна отримати пояснення - які саме входи змінились.
+"""
+
+import os
+import json
+import time
+import copy
+import pickle
+import hashlib
+import inspect
+import logging
+import functools
+import importlib.util
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_CACHE_DIR = 'data/cache/results'
+# None - хешувати всі рядки; число - лише рівномірну вибірку (швидше, але зміни поза вибіркою не помітні)
+FINGERPRINT_SAMPLE_ROWS = None
+
+# Сіль версії кешу: збільшити, щоб інвалідувати всі результати (напр. після оновлення залежностей)
+CODE_VERSION = 1
+
+
+def fingerprint_frame(df: pd.DataFrame, sample_rows: Optional[int] = FINGERPRINT_SAMPLE_ROWS) -> Dict[str, Any]:
+    """
+    Відбиток DataFrame: схема, кількість рядків та хеш вмісту
+
+    Кожна колонка та індекс хешуються векторизовано (hash_pandas_object),
+    sha1 береться від масивів хешів - зміна будь-якого значення або порядку
+    рядків змінює відбиток.
+
+    Args:
+        df: Датасет
+        sample_rows: Кількість рядків у вибірці (None - хешувати всі рядки)
+
+    Returns:
+        Словник {'type', 'rows', 'schema', 'sample_hash'}
+    """
+    rows = len(df)
+    if sample_rows is None or rows <= sample_rows:
+        sample = df
+    else:
+        # Рівномірна детермінована вибірка, включно з першим та останнім рядком
+        sample = df.iloc[np.linspace(0, rows - 1, sample_rows).astype(np.int64)]
+
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(sample.index).to_numpy().tobytes())
+    for position in range(sample.shape[1]):
+        column = sample.iloc[:, position]
+        digest.update(pd.util.hash_pandas_object(column, index=False).to_numpy().tobytes())
+
+    return {
+        'type': 'DataFrame',
+        'rows': rows,
+        'schema': hashlib.sha1(
+            json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode()
+        ).hexdigest()[:16],
+        'sample_hash': digest.hexdigest()[:16]
+    }
+
+
+def fingerprint_value(value: Any, sample_rows: Optional[int] = FINGERPRINT_SAMPLE_ROWS) -> Any:
+    """
+    Відбиток аргументу методу (JSON-сумісний)
+
+    DataFrame/Series - через fingerprint_frame, PushCube - за його таблицею,
+    прості значення - як є, решта - через repr.
+    """
+    if isinstance(value, pd.DataFrame):
+        return fingerprint_frame(value, sample_rows)
+    if isinstance(value, pd.Series):
+        return fingerprint_frame(value.to_frame(), sample_rows)
+    if hasattr(value, 'data') and isinstance(getattr(value, 'data'), pd.DataFrame):
+        return {**fingerprint_frame(value.data, sample_rows), 'type': type(value).__name__}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [fingerprint_value(item, sample_rows) for item in value]
+    if isinstance(value, dict):
+        return {str(key): fingerprint_value(item, sample_rows) for key, item in sorted(value.items(), key=str)}
+    return repr(value)
+
+
+def _module_source(name: str) -> str:
+    """Вихідний код модуля за назвою (без імпорту - scipy-модулі не завантажуються)"""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        return name
+    with open(spec.origin, 'rb') as f:
+        return f.read().decode('utf-8', errors='replace')
+
+
+def code_fingerprint(func: Callable, modules: tuple = ()) -> str:
+    """
+    Хеш коду функції (зміна коду інвалідує результати)
+
+    Args:
+        func: Функція або метод
+        modules: Модулі, яким функція делегує обчислення (напр. 'src.bootstrap')
+
+    Returns:
+        Хеш вихідного коду функції, модуля, де її визначено, модулів modules та CODE_VERSION
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = func.__qualname__
+
+    digest = hashlib.sha1(f"{CODE_VERSION}\n{source}".encode())
+    for name in dict.fromkeys((getattr(func, '__module__', None) or '', *modules)):
+        if name:
+            digest.update(f"\n# {name}\n{_module_source(name)}".encode())
+    return digest.hexdigest()[:16]
+
+
+def _describe_change(name: str, old: Any, new: Any) -> List[str]:
+    """Людиночитний опис відмінностей одного компонента відбитку"""
+    if isinstance(old, dict) and isinstance(new, dict) and old.get('type') and new.get('type'):
+        reasons = []
+        if old.get('rows') != new.get('rows'):
+            reasons.append(f"{name}: кількість рядків {old.get('rows')} → {new.get('rows')}")
+        if old.get('schema') != new.get('schema'):
+            reasons.append(f"{name}: змінилась схема (колонки або типи)")
+        if not reasons and old.get('sample_hash') != new.get('sample_hash'):
+            reasons.append(f"{name}: змінився вміст (хеш рядків)")
+        return reasons
+    return [f"{name}: {old!r} → {new!r}"]
+
+
+class ResultCache:
+    """Дворівневий (пам'ять + диск) кеш результатів аналізу"""
+
+    def __init__(self,
+                 cache_dir: str = DEFAULT_RESULT_CACHE_DIR,
+                 max_memory_entries: int = 32,
+                 max_disk_mb: float = 2048,
+                 sample_rows: Optional[int] = FINGERPRINT_SAMPLE_ROWS,
+                 disk: bool = True):
+        """
+        Args:
+            cache_dir: Директорія дискового кешу
+            max_memory_entries: Максимум результатів у пам'яті (LRU)
+            max_disk_mb: Максимальний розмір дискового кешу
+            sample_rows: Розмір вибірки для відбитків DataFrame (None - всі рядки)
+            disk: Зберігати результати на диск
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.sample_rows = sample_rows
+        self.disk = disk
+
+        self._memory: 'OrderedDict[str, Any]' = OrderedDict()
+        self._index: Dict[str, Dict[str, Any]] = {}
+        # Компоненти відбитків результатів цієї сесії (для пояснення промахів без диску)
+        self._seen: Dict[str, Dict[str, Any]] = {}
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        self.last_miss: Optional[Dict[str, Any]] = None
+
+        if self.disk:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._index = self._read_index()
+
+    # ----- ключі та пояснення -----
+
+    def components(self, method: str, code: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Компоненти відбитку виклику: метод, код, відбитки параметрів"""
+        return {
+            'method': method,
+            'code': code,
+            'params': {name: fingerprint_value(value, self.sample_rows) for name, value in params.items()}
+        }
+
+    @staticmethod
+    def make_key(components: Dict[str, Any]) -> str:
+        """Ключ результату - хеш канонічного JSON компонентів"""
+        return hashlib.sha1(json.dumps(components, sort_keys=True, default=str).encode()).hexdigest()
+
+    def explain_miss(self, components: Dict[str, Any]) -> List[str]:
+        """
+        Пояснити промах порівнянням з найсвіжішим результатом того ж методу
+
+        Args:
+            components: Компоненти відбитку виклику
+
+        Returns:
+            Список причин (порожній, якщо результат є в кеші)
+        """
+        key = self.make_key(components)
+        if key in self._memory or key in self._index:
+            return []
+
+        entries = {**self._index, **self._seen}.values()
+        previous = [entry for entry in entries if entry['method'] == components['method']]
+        if not previous:
+            return ["немає збережених результатів"]
+
+        latest = max(previous, key=lambda entry: entry['last_access'])['components']
+        reasons = []
+        if latest['code'] != components['code']:
+            reasons.append("змінився код методу")
+
+        names = list(dict.fromkeys(list(latest['params']) + list(components['params'])))
+        for name in names:
+            old, new = latest['params'].get(name), components['params'].get(name)
+            if old != new:
+                reasons.extend(_describe_change(name, old, new))
+
+        return reasons or ["результат витіснено з кешу"]
+
+    # ----- читання та запис -----
+
+    def __contains__(self, key: str) -> bool:
+        """Чи є результат (без завантаження з диску)"""
+        return key in self._memory or key in self._index
+
+    def get(self, key: str) -> Any:
+        """
+        Результат за ключем (копія, щоб мутації не псували кеш)
+
+        Raises:
+            KeyError: якщо результату немає
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            self._touch(key)
+            return self._copy(self._memory[key])
+
+        entry = self._index.get(key)
+        if entry is None:
+            raise KeyError(key)
+
+        path = os.path.join(self.cache_dir, entry['file'])
+        try:
+            if entry['format'] == 'parquet':
+                value = pd.read_parquet(path)
+            else:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            self._drop(key)
+            raise KeyError(key)
+
+        self.stats['disk_hits'] += 1
+        self._remember(key, value)
+        self._touch(key)
+        return self._copy(value)
+
+    def put(self, key: str, value: Any, components: Dict[str, Any]) -> None:
+        """Зберегти результат у пам'ять та на диск"""
+        self._remember(key, value)
+        self._seen[key] = {'method': components['method'], 'components': components,
+                           'last_access': time.time()}
+        if not self.disk:
+            return
+
+        if isinstance(value, pd.DataFrame):
+            file_name, file_format = f"{key}.parquet", 'parquet'
+            try:
+                value.to_parquet(os.path.join(self.cache_dir, file_name))
+            except (ValueError, TypeError, ImportError):
+                file_name, file_format = f"{key}.pkl", 'pickle'
+        else:
+            file_name, file_format = f"{key}.pkl", 'pickle'
+
+        path = os.path.join(self.cache_dir, file_name)
+        if file_format == 'pickle':
+            with open(path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        now = time.time()
+        self._index[key] = {
+            'method': components['method'],
+            'components': components,
+            'file': file_name,
+            'format': file_format,
+            'size': os.path.getsize(path),
+            'created': now,
+            'last_access': now
+        }
+        self._evict_disk()
+        self._write_index()
+
+    def memoize(self, method: str, code: str, params: Dict[str, Any], compute: Callable[[], Any]) -> Any:
+        """
+        Повернути збережений результат або обчислити та зберегти його
+
+        Args:
+            method: Назва методу
+            code: Відбиток коду методу
+            params: Аргументи виклику {ім'я: значення}
+            compute: Функція обчислення результату
+
+        Returns:
+            Результат (копія збереженого)
+        """
+        components = self.components(method, code, params)
+        key = self.make_key(components)
+
+        try:
+            value = self.get(key)
+            logger.info(f"📦 Результат {method} з кешу: {key[:8]}...")
+            return value
+        except KeyError:
+            pass
+
+        reasons = self.explain_miss(components)
+        self.stats['misses'] += 1
+        self.last_miss = {'method': method, 'key': key, 'reasons': reasons}
+        logger.info(f"🔄 Перерахунок {method}: {'; '.join(reasons)}")
+
+        value = compute()
+        self.put(key, value, components)
+        return self._copy(value)
+
+    def clear(self) -> None:
+        """Очистити кеш у пам'яті та на диску"""
+        self._memory.clear()
+        self._seen.clear()
+        for key in list(self._index):
+            self._drop(key, write=False)
+        self._write_index()
+
+    def info(self) -> Dict[str, Any]:
+        """Статистика кешу"""
+        return {
+            **self.stats,
+            'memory_entries': len(self._memory),
+            'disk_entries': len(self._index),
+            'disk_size_mb': sum(entry['size'] for entry in self._index.values()) / (1024 * 1024),
+            'last_miss': self.last_miss
+        }
+
+    # ----- службові -----
+
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        """Незалежна копія результату"""
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return value.copy()
+        return copy.deepcopy(value)
+
+    def _remember(self, key: str, value: Any) -> None:
+        """Додати результат у пам'ять з LRU-витісненням"""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key: str) -> None:
+        """Оновити час останнього доступу"""
+        if key in self._seen:
+            self._seen[key]['last_access'] = time.time()
+        if key in self._index:
+            self._index[key]['last_access'] = time.time()
+            self._write_index()
+
+    def _drop(self, key: str, write: bool = True) -> None:
+        """Видалити результат з диску"""
+        entry = self._index.pop(key, None)
+        self._memory.pop(key, None)
+        if entry is not None:
+            path = os.path.join(self.cache_dir, entry['file'])
+            if os.path.exists(path):
+                os.remove(path)
+        if write:
+            self._write_index()
+
+    def _evict_disk(self) -> None:
+        """Витіснити найдавніше використані результати понад ліміт розміру"""
+        total = sum(entry['size'] for entry in self._index.values())
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_disk_bytes or len(self._index) <= 1:
+                break
+            total -= entry['size']
+            self._drop(key, write=False)
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        """Прочитати маніфест дискового кешу"""
+        path = os.path.join(self.cache_dir, 'index.json')
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {key: entry for key, entry in index.items()
+                if os.path.exists(os.path.join(self.cache_dir, entry['file']))}
+
+    def _write_index(self) -> None:
+        """Атомарно записати маніфест дискового кешу"""
+        if not self.disk:
+            return
+        path = os.path.join(self.cache_dir, 'index.json')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+
+def memoized(ignore: tuple = (), state: tuple = (), modules: tuple = ()) -> Callable:
+    """
+    Декоратор методу PushAnalyzer: мемоізація через self.cache (якщо задано)
+
+    Args:
+        ignore: Параметри, що не впливають на результат (напр. n_jobs)
+        state: Атрибути екземпляра, що змінюють результат (входять у ключ як self.<атрибут>)
+        modules: Модулі, яким метод делегує обчислення (їхній код входить у ключ)
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        code = code_fingerprint(func, modules)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, 'cache', None)
+            if cache is None:
+                return func(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = {name: value for name, value in list(bound.arguments.items())[1:]
+                      if name not in ignore}
+            params.update({f"self.{attr}": getattr(self, attr, None) for attr in state})
+            return cache.memoize(func.__name__, code, params, lambda: func(self, *args, **kwargs))
+
+        return wrapper
+    return decorator
@@ -0,0 +1,248 @@
+"""
+Перетин когорт push- та conversion-користувачів по gadid
+
+Точний режим працює на відсортованих унікальних масивах нормалізованих
+ключів (UUID пакується в 16 байт) замість Python set з мільйонів рядків.
+Наближений режим використовує HyperLogLog-скетчі, які можна зберігати
+та зливати між запусками для швидких перевірок match-rate.
+"""
+
+import os
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_gadids(values: pd.Series) -> pd.Series:
+    """
+    Нормалізувати gadid: нижній регістр, без пробілів та дефісів, без порожніх
+
+    Args:
+        values: Сирі gadid
+
+    Returns:
+        Series нормалізованих рядків (порожні та NULL відкинуто)
+    """
+    normalized = values.dropna().astype(str).str.strip().str.lower().str.replace('-', '', regex=False)
+    return normalized[normalized != '']
+
+
+def gadid_keys(normalized: pd.Series) -> np.ndarray:
+    """
+    Компактні ключі для сортування: 16 байт для UUID, байтові рядки для решти
+
+    Args:
+        normalized: Результат normalize_gadids
+
+    Returns:
+        numpy-масив фіксованої ширини (dtype 'S')
+    """
+    if normalized.empty:
+        return np.array([], dtype='S16')
+
+    if normalized.str.fullmatch(r'[0-9a-f]{32}').all():
+        return np.frombuffer(bytes.fromhex(''.join(normalized.tolist())), dtype='S16')
+    return normalized.str.encode('utf-8').to_numpy(dtype='S')
+
+
+def sorted_member(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Маска входження keys у відсортований унікальний масив sorted_keys"""
+    if sorted_keys.size == 0:
+        return np.zeros(keys.size, dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), sorted_keys.size - 1)
+    return sorted_keys[positions] == keys
+
+
+def exact_overlap(push_df: pd.DataFrame,
+                  conversions_df: pd.DataFrame,
+                  by: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Точний перетин push- та conversion-когорт загалом і по сегментах
+
+    Args:
+        push_df: Push-дані (gadid + колонки сегментації)
+        conversions_df: Конверсії (gadid)
+        by: Колонки сегментації push-сторони (напр. ['ab_group', 'tier'])
+
+    Returns:
+        Словник {'summary': загальні лічильники, 'segments': DataFrame по сегментах}
+    """
+    by = list(by or [])
+    push_normalized = normalize_gadids(push_df['gadid'])
+    conv_normalized = normalize_gadids(conversions_df['gadid'])
+
+    # Однакове кодування ключів для обох сторін
+    both = gadid_keys(pd.concat([push_normalized, conv_normalized], ignore_index=True))
+    push_keys, conv_keys = both[:len(push_normalized)], both[len(push_normalized):]
+
+    push_unique = np.unique(push_keys)
+    conv_unique = np.unique(conv_keys)
+    overlap = int(sorted_member(conv_unique, push_unique).sum())
+
+    summary = {
+        'push_users': int(push_unique.size),
+        'conversion_users': int(conv_unique.size),
+        'overlapping_users': overlap,
+        'push_only': int(push_unique.size - overlap),
+        'conversion_only': int(conv_unique.size - overlap),
+        'overlap_rate_from_push': overlap / push_unique.size * 100 if push_unique.size else 0.0,
+        'overlap_rate_from_conversions': overlap / conv_unique.size * 100 if conv_unique.size else 0.0
+    }
+
+    segments_df = pd.DataFrame()
+    if by:
+        segments = push_df.loc[push_normalized.index, by].astype(str)
+        codes, uniques = pd.MultiIndex.from_frame(segments).factorize()
+
+        # Унікальні пари (сегмент, користувач) одним сортуванням замість маски на кожен сегмент
+        key_codes = np.searchsorted(push_unique, push_keys)
+        pairs = np.unique(codes.astype(np.int64) * push_unique.size + key_codes)
+        segment_codes, user_codes = np.divmod(pairs, push_unique.size)
+        matched_users = sorted_member(conv_unique, push_unique)
+
+        users = np.bincount(segment_codes, minlength=len(uniques))
+        matched = np.bincount(segment_codes, weights=matched_users[user_codes],
+                              minlength=len(uniques)).astype(np.int64)
+        segments_df = pd.DataFrame(list(uniques), columns=by).assign(
+            push_users=users,
+            matched_users=matched,
+            push_only=users - matched,
+            match_rate=np.where(users > 0, matched / np.maximum(users, 1) * 100, 0.0)
+        )
+        if not segments_df.empty:
+            segments_df = segments_df.sort_values(by).reset_index(drop=True)
+
+    return {'summary': summary, 'segments': segments_df}
+
+
+class HyperLogLog:
+    """HyperLogLog-скетч кількості унікальних gadid (похибка ≈ 1.04 / sqrt(2^p))"""
+
+    def __init__(self, p: int = 14, registers: np.ndarray = None):
+        """
+        Args:
+            p: Кількість біт індексу регістра (2^p регістрів)
+            registers: Готові регістри (для завантаження)
+        """
+        self.p = p
+        self.m = 1 << p
+        self.registers = registers if registers is not None else np.zeros(self.m, dtype=np.uint8)
+
+    @staticmethod
+    def _bit_length(values: np.ndarray) -> np.ndarray:
+        """Довжина в бітах для uint64 (точно, через 32-бітні половини)"""
+        high = (values >> np.uint64(32)).astype(np.float64)
+        low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+    def update(self, normalized: pd.Series) -> 'HyperLogLog':
+        """
+        Додати нормалізовані gadid
+
+        Returns:
+            self
+        """
+        if normalized.empty:
+            return self
+
+        hashes = pd.util.hash_pandas_object(normalized, index=False).to_numpy(dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        rank = ((64 - self.p) - self._bit_length(remainder) + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Об'єднання множин (поелементний максимум регістрів)"""
+        if self.p != other.p:
+            raise ValueError("Скетчі з різною точністю не можна зливати")
+        return HyperLogLog(self.p, np.maximum(self.registers, other.registers))
+
+    def count(self) -> float:
+        """Оцінка кількості унікальних значень"""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * np.log(self.m / zeros)
+        return float(estimate)
+
+    def intersection(self, other: 'HyperLogLog') -> float:
+        """Оцінка перетину через включення-виключення"""
+        return max(self.count() + other.count() - self.merge(other).count(), 0.0)
+
+
+def approximate_overlap(push_df: pd.DataFrame,
+                        conversions_df: pd.DataFrame,
+                        by: Optional[List[str]] = None,
+                        p: int = 14) -> Dict[str, Any]:
+    """
+    Наближений перетин когорт на HyperLogLog-скетчах
+
+    Args:
+        push_df: Push-дані
+        conversions_df: Конверсії
+        by: Колонки сегментації push-сторони
+        p: Точність скетчів
+
+    Returns:
+        Словник {'summary', 'segments', 'sketches'} - sketches можна зберегти save_hll_sketches
+    """
+    by = list(by or [])
+    push_normalized = normalize_gadids(push_df['gadid'])
+    conversions = HyperLogLog(p).update(normalize_gadids(conversions_df['gadid']))
+    push = HyperLogLog(p).update(push_normalized)
+
+    sketches = {('conversions',): conversions, ('push',): push}
+    push_users, conversion_users = push.count(), conversions.count()
+    overlap = min(push.intersection(conversions), push_users, conversion_users)
+    summary = {
+        'push_users': push_users,
+        'conversion_users': conversion_users,
+        'overlapping_users': overlap,
+        'push_only': push_users - overlap,
+        'conversion_only': conversion_users - overlap,
+        'overlap_rate_from_push': overlap / push_users * 100 if push_users else 0.0,
+        'overlap_rate_from_conversions': overlap / conversion_users * 100 if conversion_users else 0.0
+    }
+
+    rows = []
+    if by:
+        segments = push_df.loc[push_normalized.index, by].astype(str)
+        for key, index in segments.groupby(by).groups.items():
+            key = key if isinstance(key, tuple) else (key,)
+            sketch = HyperLogLog(p).update(push_normalized.loc[index])
+            sketches[('push',) + key] = sketch
+            users = sketch.count()
+            matched = min(sketch.intersection(conversions), users)
+            rows.append({
+                **dict(zip(by, key)),
+                'push_users': users,
+                'matched_users': matched,
+                'push_only': users - matched,
+                'match_rate': matched / users * 100 if users else 0.0
+            })
+
+    return {'summary': summary, 'segments': pd.DataFrame(rows), 'sketches': sketches}
+
+
+def save_hll_sketches(sketches: Dict[tuple, HyperLogLog], path: str) -> None:
+    """Зберегти HyperLogLog-скетчі в parquet (ключ, p, регістри)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    pd.DataFrame({
+        'key': ['|'.join(map(str, key)) for key in sketches],
+        'p': [sketch.p for sketch in sketches.values()],
+        'registers': [sketch.registers.tobytes() for sketch in sketches.values()]
+    }).to_parquet(path)
+
+
+def load_hll_sketches(path: str) -> Dict[tuple, HyperLogLog]:
+    """Завантажити HyperLogLog-скетчі з parquet"""
+    frame = pd.read_parquet(path)
+    return {
+        tuple(row.key.split('|')): HyperLogLog(int(row.p), np.frombuffer(row.registers, dtype=np.uint8).copy())
+        for row in frame.itertuples(index=False)
+    }
@@ -0,0 +1,452 @@
+"""
+Headless пайплайн аналізу: extract → process → match → analyze → visualize → export
+
+Етапи оголошені як DAG (STAGES): кожен має залежності, функцію та ключі
+конфігурації, від яких залежить результат. Ключ етапу - хеш його коду,
+конфігурації та ключів залежностей (як у Merkle-дереві), тому ключі
+обчислюються без завантаження даних. Код етапу включає модулі, яким він
+делегує роботу; ключі витягу - ще й версію даних (відбиток DuckDB-знімка
+або інтервал extract_ttl_hours для ClickHouse). Результати етапів зберігаються в
+ResultCache (data/pipeline); незмінені етапи пропускаються, незалежні
+етапи виконуються паралельно в потоках.
+
+Запуск:
+    push-pipeline                       # весь DAG, незмінені етапи з кешу
+    push-pipeline --from match          # примусово match та все після нього
+    push-pipeline --only visualize      # лише visualize (залежності з кешу)
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from config.constants import (
+    PUSH_START_DATE,
+    PUSH_END_DATE,
+    CONVERSION_START_DATE,
+    CONVERSION_END_DATE
+)
+from config.database_config import DEFAULT_SNAPSHOT_DIR, snapshot_fingerprint
+from src.memo import ResultCache, code_fingerprint
+from src.tracing import TRACER, span, tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PIPELINE_CACHE_DIR = 'data/pipeline'
+
+DEFAULT_CONFIG = {
+    'push_start_date': PUSH_START_DATE,
+    'push_end_date': PUSH_END_DATE,
+    'conversion_start_date': CONVERSION_START_DATE,
+    'conversion_end_date': CONVERSION_END_DATE,
+    'include_control_group': True,
+    'backend': 'clickhouse',
+    'snapshot_dir': DEFAULT_SNAPSHOT_DIR,
+    'processed_dir': 'data/processed',
+    'charts_dir': 'outputs/charts',
+    'results_dir': 'outputs/final_results',
+    'dpi': 300,
+    'n_jobs': None,
+    # Термін актуальності витягу з ClickHouse (години) - дані в базі оновлюються
+    'extract_ttl_hours': 24
+}
+
+
+# ----- етапи -----
+
+def extract_push(config: Dict[str, Any], inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Push-дані всіх груп (включно з контрольною) з ClickHouse або DuckDB-знімка"""
+    from src.data_loader import DataLoader
+
+    loader = DataLoader(backend=config['backend'], snapshot_dir=config['snapshot_dir'])
+    push_df = loader.load_complete_dataset(config['push_start_date'], config['push_end_date'],
+                                           include_control_group=config['include_control_group'])
+    return {'push_df': push_df}
+
+
+def extract_conversions(config: Dict[str, Any], inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Конверсії цільових кампаній з ClickHouse або DuckDB-знімка"""
+    from src.data_loader import DataLoader
+
+    loader = DataLoader(backend=config['backend'], snapshot_dir=config['snapshot_dir'])
+    conversions_df = loader.load_conversion_data(config['conversion_start_date'],
+                                                 config['conversion_end_date'])
+    return {'conversions_df': conversions_df}
+
+
+def process(config: Dict[str, Any], inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Компактні типи (category для низькокардинальних колонок) та збереження в data/processed"""
+    def compact(df: pd.DataFrame) -> pd.DataFrame:
+        columns = [col for col in ('ab_group', 'country', 'tier', 'app')
+                   if col in df.columns and df[col].nunique() < len(df) // 2]
+        return df.astype({col: 'category' for col in columns})
+
+    push_df = compact(inputs['extract_push']['push_df'])
+    conversions_df = compact(inputs['extract_conversions']['conversions_df'])
+
+    os.makedirs(config['processed_dir'], exist_ok=True)
+    paths = [os.path.join(config['processed_dir'], 'push_data.parquet'),
+             os.path.join(config['processed_dir'], 'conversion_data.parquet')]
+    push_df.to_parquet(paths[0])
+    conversions_df.to_parquet(paths[1])
+
+    return {'push_df': push_df, 'conversions_df': conversions_df, 'files': paths}
+
+
+def match(config: Dict[str, Any], inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Матчинг push → конверсії по gadid"""
+    from src.analyzer import PushAnalyzer
+    from src.segment_index import index_path
+
+    analyzer = PushAnalyzer()
+    merged_df = analyzer.merge_data(inputs['process']['push_df'], inputs['process']['conversions_df'])
+    merged_path = os.path.join(config['processed_dir'], 'merged_data.parquet')
+    merged_df.to_parquet(merged_path)
+    # Індекс сегментів поруч із датасетом для інтерактивних зрізів у ноутбуках
+    analyzer.segment_index(merged_df, data_path=merged_path)
+    return {'merged_df': merged_df, 'files': [merged_path, index_path(merged_path)]}
+
+
+def analyze(config: Dict[str, Any], inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Куб, A/B та geo таблиці, ефективність та тести значущості"""
+    from src.analyzer import PushAnalyzer
+
+    analyzer = PushAnalyzer()
+    merged_df = inputs['match']['merged_df']
+
+    cube = analyzer.build_cube(merged_df)
+    ab_stats = analyzer.ab_analysis(cube)
+    return {
+        'cube': cube,
+        'ab_stats': ab_stats,
+        'geo_stats': analyzer.geo_analysis(merged_df),
+        'effectiveness': analyzer.calculate_push_effectiveness(ab_stats),
+        'significance': analyzer.significance_tests(ab_stats)
+    }
+
+
+def visualize(config: Dict[str, Any], inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Повний набір графіків (headless, паралельно, з кешем графіків)"""
+    from src.rendering import render_charts, standard_chart_jobs
+    from src.chart_cache import DEFAULT_CHART_STORE
+
+    results = inputs['analyze']
+    charts = render_charts(standard_chart_jobs(results['ab_stats'], results['geo_stats'], results['cube']),
+                           output_dir=config['charts_dir'], n_jobs=config['n_jobs'], dpi=config['dpi'],
+                           cache_dir=os.path.join(config['charts_dir'], os.path.basename(DEFAULT_CHART_STORE)))
+    return {'charts': charts, 'files': charts.loc[charts['status'] == 'ok', 'path'].tolist()}
+
+
+def export(config: Dict[str, Any], inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Фінальні таблиці та JSON у outputs/final_results"""
+    results = inputs['analyze']
+    os.makedirs(config['results_dir'], exist_ok=True)
+
+    files = {
+        'ab_test_summary.csv': lambda path: results['ab_stats'].to_csv(path),
+        'geo_summary.csv': lambda path: results['geo_stats'].to_csv(path),
+        'significance_pairwise.csv': lambda path: results['significance']['pairwise'].to_csv(path, index=False),
+        'push_effectiveness.json': lambda path: _write_json(path, results['effectiveness'])
+    }
+    paths = []
+    for name, write in files.items():
+        path = os.path.join(config['results_dir'], name)
+        write(path)
+        paths.append(path)
+
+    return {'files': paths}
+
+
+def _write_json(path: str, data: Any) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+
+def data_version(config: Dict[str, Any]) -> str:
+    """
+    Версія джерела даних для ключів етапів витягу (без завантаження даних)
+
+    DuckDB - відбиток файлів знімка (шлях, розмір, mtime); ClickHouse - номер
+    інтервалу extract_ttl_hours, тож витяг перезапускається після закінчення терміну.
+    """
+    if config['backend'] == 'duckdb':
+        return f"snapshot:{snapshot_fingerprint(config['snapshot_dir'])}"
+
+    ttl_seconds = max(float(config['extract_ttl_hours']), 1e-3) * 3600
+    return f"ttl:{int(time.time() // ttl_seconds)}"
+
+
+# Етап -> залежності, функція, ключі конфігурації, модулі, яким етап делегує роботу,
+# чи залежить від версії даних, чи створює файли
+STAGES = {
+    'extract_push': {'deps': [], 'func': extract_push,
+                     'config': ['push_start_date', 'push_end_date', 'include_control_group',
+                                'backend', 'snapshot_dir', 'extract_ttl_hours'],
+                     'modules': ('src.data_loader', 'src.database', 'src.sql_dialect', 'config.constants'),
+                     'data': True},
+    'extract_conversions': {'deps': [], 'func': extract_conversions,
+                            'config': ['conversion_start_date', 'conversion_end_date',
+                                       'backend', 'snapshot_dir', 'extract_ttl_hours'],
+                            'modules': ('src.data_loader', 'src.database', 'src.sql_dialect', 'config.constants'),
+                            'data': True},
+    'process': {'deps': ['extract_push', 'extract_conversions'], 'func': process,
+                'config': ['processed_dir'], 'files': True},
+    'match': {'deps': ['process'], 'func': match, 'config': ['processed_dir'],
+              'modules': ('src.analyzer', 'src.polars_engine', 'src.budget', 'src.segment_index'),
+              'files': True},
+    'analyze': {'deps': ['match'], 'func': analyze, 'config': [],
+                'modules': ('src.analyzer', 'src.cube', 'src.polars_engine', 'src.significance',
+                            'config.constants')},
+    'visualize': {'deps': ['analyze'], 'func': visualize, 'config': ['charts_dir', 'dpi'],
+                  'modules': ('src.rendering', 'src.visualizer', 'src.chart_cache'), 'files': True},
+    'export': {'deps': ['analyze'], 'func': export, 'config': ['results_dir'], 'files': True}
+}
+
+# Псевдоніми груп етапів для --from / --only
+STAGE_GROUPS = {'extract': ['extract_push', 'extract_conversions']}
+
+
+def resolve_stages(names: List[str]) -> List[str]:
+    """Розгорнути псевдоніми та перевірити назви етапів"""
+    stages = []
+    for name in names:
+        for stage in STAGE_GROUPS.get(name, [name]):
+            if stage not in STAGES:
+                raise ValueError(f"Невідомий етап: {stage} (доступні: {', '.join(list(STAGES) + list(STAGE_GROUPS))})")
+            stages.append(stage)
+    return list(dict.fromkeys(stages))
+
+
+def descendants(stages: List[str]) -> List[str]:
+    """Етапи та все, що від них залежить (у порядку DAG)"""
+    selected = set(stages)
+    for stage, spec in STAGES.items():
+        if selected & set(spec['deps']):
+            selected.add(stage)
+    return [stage for stage in STAGES if stage in selected]
+
+
+class Pipeline:
+    """Виконавець DAG етапів зі збереженням результатів"""
+
+    def __init__(self,
+                 config: Dict[str, Any] = None,
+                 cache_dir: str = DEFAULT_PIPELINE_CACHE_DIR,
+                 max_workers: int = 2):
+        """
+        Args:
+            config: Перевизначення DEFAULT_CONFIG
+            cache_dir: Директорія результатів етапів
+            max_workers: Кількість незалежних етапів, що виконуються одночасно
+        """
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self.cache = ResultCache(cache_dir, max_memory_entries=len(STAGES), max_disk_mb=50_000)
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict[str, Any]] = {}
+        # Версія даних фіксується на запуск, щоб ключі не змінились посеред виконання
+        self._data_version = data_version(self.config)
+        self.keys = self._stage_keys()
+
+    def _components(self, stage: str, keys: Dict[str, str]) -> Dict[str, Any]:
+        """Компоненти ключа етапу: код (з модулями), конфігурація, версія даних, ключі залежностей"""
+        spec = STAGES[stage]
+        params = {
+            'config': {name: self.config[name] for name in spec['config']},
+            'inputs': {dep: keys[dep] for dep in spec['deps']}
+        }
+        if spec.get('data'):
+            params['data_version'] = self._data_version
+        return self.cache.components(stage, code_fingerprint(spec['func'], spec.get('modules', ())), params)
+
+    def _stage_keys(self) -> Dict[str, str]:
+        """Ключі всіх етапів у порядку DAG (без завантаження даних)"""
+        keys = {}
+        for stage in STAGES:
+            keys[stage] = self.cache.make_key(self._components(stage, keys))
+        return keys
+
+    def is_cached(self, stage: str) -> bool:
+        """
+        Чи є актуальний результат етапу
+
+        Великі результати не завантажуються; для етапів, що створюють файли,
+        додатково перевіряється, що файли на місці.
+        """
+        if self.keys[stage] not in self.cache:
+            return False
+        if not STAGES[stage].get('files'):
+            return True
+        try:
+            result = self._load(stage)
+        except KeyError:
+            return False
+        return all(os.path.exists(path) for path in result.get('files', []))
+
+    def _load(self, stage: str) -> Dict[str, Any]:
+        """Результат етапу з пам'яті або кешу"""
+        if stage not in self._results:
+            with self._lock:
+                self._results[stage] = self.cache.get(self.keys[stage])
+        return self._results[stage]
+
+    def _run_stage(self, stage: str) -> Dict[str, Any]:
+        """Виконати етап і зберегти результат"""
+        with span(f"pipeline.{stage}") as current:
+            inputs = {dep: self._load(dep) for dep in STAGES[stage]['deps']}
+            for dep_result in inputs.values():
+                current.set_inputs(dep_result)
+            result = STAGES[stage]['func'](self.config, inputs)
+            current.set_outputs(result)
+
+        with self._lock:
+            self.cache.put(self.keys[stage], result, self._components(stage, self.keys))
+        return result
+
+    def run(self,
+            from_stages: Optional[List[str]] = None,
+            only: Optional[List[str]] = None,
+            force: bool = False) -> pd.DataFrame:
+        """
+        Виконати DAG
+
+        Args:
+            from_stages: Примусово виконати ці етапи та все після них
+            only: Виконати лише ці етапи (залежності мають бути в кеші)
+            force: Ігнорувати кеш для всіх етапів
+
+        Returns:
+            DataFrame таймінгів [stage, status, seconds, key]
+        """
+        if only:
+            forced = resolve_stages(only)
+            planned = forced
+        else:
+            forced = list(STAGES) if force else descendants(resolve_stages(from_stages or []))
+            planned = list(STAGES)
+
+        timings = {}
+        pending = []
+        for stage in planned:
+            if stage not in forced and self.is_cached(stage):
+                timings[stage] = {'status': 'cached', 'seconds': 0.0}
+            else:
+                pending.append(stage)
+
+        done = set(timings)
+        if only:
+            # Залежності етапів --only беруться лише з кешу
+            for stage in dict.fromkeys(dep for s in pending for dep in STAGES[s]['deps']):
+                if stage in pending:
+                    continue
+                if not self.is_cached(stage):
+                    raise RuntimeError(f"Немає збереженого результату етапу {stage} - "
+                                       f"запустіть пайплайн без --only")
+                done.add(stage)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for stage in [s for s in pending if set(STAGES[s]['deps']) <= done]:
+                    pending.remove(stage)
+                    logger.info(f"▶️ Етап {stage}...")
+                    running[executor.submit(self._timed, stage)] = stage
+
+                if not running:
+                    raise RuntimeError(f"Неможливо виконати етапи: {', '.join(pending)}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    result, seconds = future.result()
+                    self._results[stage] = result
+                    done.add(stage)
+                    timings[stage] = {'status': 'ran', 'seconds': seconds}
+                    logger.info(f"✅ Етап {stage}: {seconds:.2f} с")
+
+        rows = [{'stage': stage, **timings[stage], 'key': self.keys[stage][:12]}
+                for stage in STAGES if stage in timings]
+        return pd.DataFrame(rows, columns=['stage', 'status', 'seconds', 'key'])
+
+    def _timed(self, stage: str) -> tuple:
+        start = time.perf_counter()
+        result = self._run_stage(stage)
+        return result, time.perf_counter() - start
+
+    def result(self, stage: str) -> Dict[str, Any]:
+        """Результат етапу (з пам'яті або кешу)"""
+        return self._load(stage)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Точка входу консольної команди push-pipeline"""
+    parser = argparse.ArgumentParser(description='Headless пайплайн аналізу push-сповіщень')
+    parser.add_argument('--from', dest='from_stages', nargs='+', metavar='STAGE',
+                        help='Примусово виконати етапи та все після них')
+    parser.add_argument('--only', nargs='+', metavar='STAGE',
+                        help='Виконати лише ці етапи (залежності з кешу)')
+    parser.add_argument('--force', action='store_true', help='Ігнорувати кеш етапів')
+    parser.add_argument('--push-start-date', default=PUSH_START_DATE)
+    parser.add_argument('--push-end-date', default=PUSH_END_DATE)
+    parser.add_argument('--conversion-start-date', default=CONVERSION_START_DATE)
+    parser.add_argument('--conversion-end-date', default=CONVERSION_END_DATE)
+    parser.add_argument('--no-control-group', action='store_true', help='Без контрольної групи')
+    parser.add_argument('--backend', choices=['clickhouse', 'duckdb'], default=DEFAULT_CONFIG['backend'],
+                        help='Джерело даних: ClickHouse або локальні parquet-знімки через DuckDB')
+    parser.add_argument('--snapshot-dir', default=DEFAULT_CONFIG['snapshot_dir'])
+    parser.add_argument('--extract-ttl-hours', type=float, default=DEFAULT_CONFIG['extract_ttl_hours'],
+                        help='Термін актуальності витягу з ClickHouse (години)')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_CONFIG['dpi'])
+    parser.add_argument('--jobs', type=int, default=None, help='Процеси для рендеру графіків')
+    parser.add_argument('--cache-dir', default=DEFAULT_PIPELINE_CACHE_DIR)
+    parser.add_argument('--list', action='store_true', help='Показати етапи та їх ключі')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Записати трасу (*.json - Chrome trace, *.spans.json - спани)')
+    args = parser.parse_args(argv)
+
+    if args.from_stages and args.only:
+        parser.error('--from та --only не можна поєднувати')
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    pipeline = Pipeline({
+        'push_start_date': args.push_start_date,
+        'push_end_date': args.push_end_date,
+        'conversion_start_date': args.conversion_start_date,
+        'conversion_end_date': args.conversion_end_date,
+        'include_control_group': not args.no_control_group,
+        'backend': args.backend,
+        'snapshot_dir': args.snapshot_dir,
+        'extract_ttl_hours': args.extract_ttl_hours,
+        'dpi': args.dpi,
+        'n_jobs': args.jobs
+    }, cache_dir=args.cache_dir)
+
+    if args.list:
+        for stage, spec in STAGES.items():
+            print(f"{stage:<20} {pipeline.keys[stage][:12]}  ← {', '.join(spec['deps']) or '-'}")
+        return
+
+    try:
+        with tracing(args.trace) if args.trace else contextlib.nullcontext():
+            timings = pipeline.run(from_stages=args.from_stages, only=args.only, force=args.force)
+    except (ValueError, RuntimeError) as e:
+        parser.exit(1, f"❌ {e}\n")
+
+    print("\n⏱️ Таймінги етапів:")
+    print(timings.to_string(index=False))
+    print(f"Разом: {timings['seconds'].sum():.2f} с")
+
+    if args.trace:
+        print(f"\n🔎 Найдовші спани (траса: {args.trace}):")
+        print(TRACER.summary().head(15).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+"""
+Polars-рушій обробки та аналізу (опціональний, pip install polars)
+
+Ті самі перетворення, що й pandas-шлях DataLoader/PushAnalyzer
+(_process_push_data, _process_conversion_data, _align_dataframes,
+_merge_frames, ab_analysis, geo_analysis), записані як LazyFrame-плани.
+Join та group-by виконуються багатопотоково, а ланцюжок
+process → merge → aggregate оптимізується як один план (predicate/projection
+pushdown, спільні підплани обчислюються один раз у collect_all).
+pandas лише на межі API: на вході (from_pandas) та на виході (to_pandas).
+
+Увімкнути: DataLoader(engine='polars'), PushAnalyzer(engine='polars')
+або весь ланцюжок одним планом - analyze_chain().
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import pandas as pd
+
+from config.constants import (
+    TIER_1_COUNTRIES,
+    TIER_2_COUNTRIES,
+    TIER_3_COUNTRIES,
+    COUNTRY_NAME_TO_CODE,
+    get_country_tier
+)
+from src.cube import ab_stats_from_totals
+
+if TYPE_CHECKING:
+    import polars as pl
+
+ENGINES = ['pandas', 'polars']
+
+# Категорії кількості push-ів (як pd.cut у DataLoader._process_push_data)
+PUSH_CATEGORY_BREAKS = [1, 3, 5, 10]
+PUSH_CATEGORY_LABELS = ['1', '2-3', '4-5', '6-10', '10+']
+
+# Колонки matched-датасету, потрібні для ab_stats та geo_stats (решта не конвертується)
+AB_COLUMNS = ['ab_group', 'gadid', 'push_count', 'has_deposit', 'has_registration',
+              'total_deposits', 'total_registrations']
+GEO_COLUMNS = ['tier', 'ab_group', 'gadid', 'push_count', 'has_deposit', 'total_deposits']
+
+# Значення країни, що означають "невідомо" (див. get_country_tier)
+UNKNOWN_COUNTRIES = ['Unknown', '', 'NULL']
+
+
+def _polars():
+    """polars - опціональна залежність (pip install polars)"""
+    try:
+        import polars
+    except ImportError as e:
+        raise ImportError("Polars-рушій потребує пакет polars: pip install polars") from e
+    return polars
+
+
+def check_engine(engine: str) -> str:
+    """Перевірити назву рушія обробки"""
+    if engine not in ENGINES:
+        raise ValueError(f"Невідомий рушій: {engine} (доступні: {', '.join(ENGINES)})")
+    return engine
+
+
+def lazy(df: pd.DataFrame, columns: Optional[List[str]] = None) -> 'pl.LazyFrame':
+    """
+    pandas → LazyFrame (категорії стають рядками, щоб ключі join/group-by були сумісні)
+
+    Args:
+        df: pandas DataFrame
+        columns: Конвертувати лише ці колонки (None - всі)
+    """
+    pl = _polars()
+    frame = pl.from_pandas(df[columns] if columns is not None else df)
+    categorical = [name for name, dtype in frame.schema.items() if dtype in (pl.Categorical, pl.Enum)]
+    return frame.with_columns(pl.col(categorical).cast(pl.String)).lazy()
+
+
+def to_pandas(frame) -> pd.DataFrame:
+    """LazyFrame/DataFrame → pandas (межа API)"""
+    pl = _polars()
+    if isinstance(frame, pl.LazyFrame):
+        frame = frame.collect()
+    return frame.to_pandas()
+
+
+def tier_expr(column: str = 'country') -> 'pl.Expr':
+    """
+    Вираз tier країни - векторний еквівалент get_country_tier
+
+    Коди та повні назви з constants відображаються таблицею, решта - 'Other'.
+    """
+    pl = _polars()
+    codes = TIER_1_COUNTRIES + TIER_2_COUNTRIES + TIER_3_COUNTRIES
+    mapping = {code: get_country_tier(code) for code in codes}
+    mapping.update({name: get_country_tier(name) for name in COUNTRY_NAME_TO_CODE})
+
+    country = pl.col(column).cast(pl.String)
+    return (
+        pl.when(country.is_null() | country.is_in(UNKNOWN_COUNTRIES))
+        .then(pl.lit('Unknown'))
+        .otherwise(country.replace_strict(mapping, default='Other', return_dtype=pl.String))
+    )
+
+
+def _datetime_expr(frame: 'pl.LazyFrame', column: str) -> 'pl.Expr':
+    """pd.to_datetime для колонки: рядки парсяться, решта приводиться до Datetime"""
+    pl = _polars()
+    dtype = frame.collect_schema()[column]
+    if dtype == pl.String:
+        return pl.col(column).str.to_datetime()
+    return pl.col(column) if isinstance(dtype, pl.Datetime) else pl.col(column).cast(pl.Datetime('ns'))
+
+
+def _hours_expr(end: str, start: str) -> 'pl.Expr':
+    pl = _polars()
+    return (pl.col(end) - pl.col(start)).dt.total_seconds(fractional=True) / 3600
+
+
+def _valid_gadid() -> 'pl.Expr':
+    pl = _polars()
+    return pl.col('gadid').is_not_null() & (pl.col('gadid') != '')
+
+
+def process_push(frame: 'pl.LazyFrame') -> 'pl.LazyFrame':
+    """План DataLoader._process_push_data"""
+    pl = _polars()
+    frame = frame.with_columns(
+        _datetime_expr(frame, 'first_push').alias('first_push'),
+        _datetime_expr(frame, 'last_push').alias('last_push')
+    )
+
+    push_category = pl.when(pl.col('push_count') <= PUSH_CATEGORY_BREAKS[0]).then(pl.lit(PUSH_CATEGORY_LABELS[0]))
+    for upper, label in zip(PUSH_CATEGORY_BREAKS[1:], PUSH_CATEGORY_LABELS[1:]):
+        push_category = push_category.when(pl.col('push_count') <= upper).then(pl.lit(label))
+    push_category = push_category.otherwise(pl.lit(PUSH_CATEGORY_LABELS[-1]))
+
+    return frame.with_columns(
+        _hours_expr('last_push', 'first_push').alias('campaign_duration_hours'),
+        push_category.cast(pl.Enum(PUSH_CATEGORY_LABELS)).alias('push_category'),
+        tier_expr().alias('tier')
+    ).filter(
+        _valid_gadid() & pl.col('ab_group').is_not_null() & (pl.col('push_count') > 0)
+    )
+
+
+def process_conversions(frame: 'pl.LazyFrame') -> 'pl.LazyFrame':
+    """План DataLoader._process_conversion_data"""
+    pl = _polars()
+    frame = frame.with_columns(
+        _datetime_expr(frame, 'first_conversion').alias('first_conversion'),
+        _datetime_expr(frame, 'last_conversion').alias('last_conversion')
+    )
+
+    return frame.with_columns(
+        _hours_expr('last_conversion', 'first_conversion').alias('conversion_window_hours'),
+        pl.when(pl.col('total_deposits') > 0).then(pl.lit('Deposit'))
+        .when(pl.col('total_registrations') > 0).then(pl.lit('Registration Only'))
+        .otherwise(pl.lit('No Conversion')).alias('user_type'),
+        (pl.col('total_revenue') / pl.col('conversion_events').clip(lower_bound=1)).alias('arpu'),
+        tier_expr().alias('tier')
+    ).filter(_valid_gadid())
+
+
+def process_control(frame: 'pl.LazyFrame') -> 'pl.LazyFrame':
+    """План DataLoader._process_control_group_data"""
+    pl = _polars()
+    columns = [
+        pl.lit(0).alias('campaign_duration_hours'),
+        pl.lit('0').alias('push_category'),
+        pl.lit(0).alias('push_days'),
+        pl.lit(None, dtype=pl.Datetime('ns')).alias('first_push'),
+        pl.lit(None, dtype=pl.Datetime('ns')).alias('last_push')
+    ]
+    if 'country' in frame.collect_schema().names():
+        columns.append(tier_expr().alias('tier'))
+
+    return frame.with_columns(columns).filter(_valid_gadid() & pl.col('ab_group').is_not_null())
+
+
+def align_control(push_schema: 'pl.Schema', control: 'pl.LazyFrame') -> 'pl.LazyFrame':
+    """
+    План DataLoader._align_dataframes: колонки контрольної групи як у push-даних
+
+    Args:
+        push_schema: Схема обробленого push-плану
+        control: Оброблений план контрольної групи
+
+    Returns:
+        План з колонками та типами push_schema
+    """
+    pl = _polars()
+    control_columns = control.collect_schema().names()
+
+    columns = []
+    for name, dtype in push_schema.items():
+        if name in control_columns:
+            column = pl.col(name)
+        elif name in ['push_count', 'push_days', 'campaign_duration_hours']:
+            column = pl.lit(0)
+        elif name == 'push_category':
+            column = pl.lit('0')
+        elif name == 'tier':
+            column = tier_expr() if 'country' in control_columns else pl.lit('Unknown')
+        else:
+            column = pl.lit(None)
+        # push_category з '0' контрольної групи не вміщується в Enum push-даних
+        target = pl.String if name == 'push_category' else dtype
+        columns.append(column.cast(target).alias(name))
+
+    return control.select(columns)
+
+
+def complete_dataset(push: 'pl.LazyFrame', control: Optional['pl.LazyFrame'] = None) -> 'pl.LazyFrame':
+    """
+    План DataLoader.load_complete_dataset: push-групи + контрольна група
+
+    Args:
+        push: Сирі push-дані
+        control: Сирі дані контрольної групи (None - без неї)
+    """
+    pl = _polars()
+    push = process_push(push)
+    if control is None:
+        return push
+
+    control = align_control(push.collect_schema(), process_control(control))
+    return pl.concat([push.with_columns(pl.col('push_category').cast(pl.String)), control])
+
+
+def merge(push: 'pl.LazyFrame', conversions: 'pl.LazyFrame') -> 'pl.LazyFrame':
+    """План PushAnalyzer._merge_frames (LEFT JOIN по gadid, суфікси _x/_y як у pandas)"""
+    pl = _polars()
+    push_columns = push.collect_schema().names()
+    conversion_columns = conversions.collect_schema().names()
+    overlap = [name for name in push_columns if name in conversion_columns and name != 'gadid']
+
+    merged = push.rename({name: f"{name}_x" for name in overlap}).join(
+        conversions.rename({name: f"{name}_y" for name in overlap}),
+        on='gadid', how='left', coalesce=True, maintain_order='left'
+    )
+
+    merged = merged.with_columns(
+        pl.col(['total_deposits', 'total_registrations', 'total_revenue']).cast(pl.Float64).fill_null(0)
+    ).with_columns(
+        (pl.col('total_deposits') > 0).cast(pl.Int64).alias('has_deposit'),
+        (pl.col('total_registrations') > 0).cast(pl.Int64).alias('has_registration')
+    )
+
+    if 'country' in overlap:
+        merged = merged.with_columns(
+            pl.coalesce('country_x', 'country_y').alias('country')
+        ).drop(['country_x', 'country_y'])
+
+    if 'country' in merged.collect_schema().names():
+        return merged.with_columns(tier_expr().alias('tier'))
+    return merged.with_columns(pl.lit('Unknown').alias('tier'))
+
+
+def ab_stats(merged: 'pl.LazyFrame') -> 'pl.LazyFrame':
+    """План агрегатів PushAnalyzer.ab_analysis (без ab_stats_from_totals)"""
+    pl = _polars()
+    return (
+        merged.filter(pl.col('ab_group').is_not_null())
+        .group_by('ab_group')
+        .agg(
+            pl.col('gadid').count().alias('total_users'),
+            pl.col('push_count').mean().alias('avg_pushes'),
+            pl.col('has_deposit').sum().alias('users_with_deposits'),
+            pl.col('has_registration').sum().alias('users_with_regs'),
+            pl.col('total_deposits').sum().alias('total_deposits'),
+            pl.col('total_registrations').sum().alias('total_registrations')
+        )
+        .sort('ab_group')
+    )
+
+
+def geo_stats(merged: 'pl.LazyFrame') -> 'pl.LazyFrame':
+    """План PushAnalyzer.geo_analysis"""
+    pl = _polars()
+    return (
+        merged.filter(pl.col('tier').is_not_null() & pl.col('ab_group').is_not_null())
+        .group_by(['tier', 'ab_group'])
+        .agg(
+            pl.col('gadid').count(),
+            pl.col('push_count').mean().round(2),
+            pl.col('has_deposit').sum(),
+            pl.col('total_deposits').sum().round(2)
+        )
+        .with_columns((pl.col('has_deposit') / pl.col('gadid') * 100).round(3).alias('conversion_rate'))
+        .sort(['tier', 'ab_group'])
+    )
+
+
+def ab_stats_frame(frame: 'pl.DataFrame') -> pd.DataFrame:
+    """Зібрані агрегати A/B → фінальна pandas-таблиця ab_analysis"""
+    result = frame.to_pandas().set_index('ab_group').round(2)
+    return ab_stats_from_totals(result)
+
+
+def geo_stats_frame(frame: 'pl.DataFrame') -> pd.DataFrame:
+    """Зібрані geo-агрегати → pandas-таблиця geo_analysis"""
+    return frame.to_pandas().set_index(['tier', 'ab_group'])
+
+
+def analyze_chain(push_df: pd.DataFrame,
+                  conversions_df: pd.DataFrame,
+                  control_df: Optional[pd.DataFrame] = None,
+                  outputs: List[str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Весь ланцюжок process → merge → aggregate одним оптимізованим планом
+
+    Args:
+        push_df: Сирі push-дані (PushDatabase.get_push_data)
+        conversions_df: Сирі конверсії (PushDatabase.get_conversion_data)
+        control_df: Сирі дані контрольної групи (None - без неї)
+        outputs: Що повернути з 'push', 'conversions', 'merged', 'ab_stats', 'geo_stats'
+                 (за замовчуванням - merged, ab_stats, geo_stats)
+
+    Returns:
+        Словник pandas-таблиць - ті самі, що дають DataLoader та PushAnalyzer
+    """
+    pl = _polars()
+    outputs = outputs or ['merged', 'ab_stats', 'geo_stats']
+
+    push = complete_dataset(lazy(push_df), lazy(control_df) if control_df is not None else None)
+    conversions = process_conversions(lazy(conversions_df))
+    merged = merge(push, conversions)
+
+    plans = {'push': push, 'conversions': conversions, 'merged': merged,
+             'ab_stats': ab_stats(merged), 'geo_stats': geo_stats(merged)}
+    frames = dict(zip(outputs, pl.collect_all([plans[name] for name in outputs])))
+
+    converters = {'ab_stats': ab_stats_frame, 'geo_stats': geo_stats_frame}
+    return {name: converters.get(name, lambda frame: frame.to_pandas())(frame)
+            for name, frame in frames.items()}
@@ -0,0 +1,264 @@
+"""
+Векторизований Monte Carlo планувальник потужності та розміру вибірки
+
+Базові показники кожного tier (конверсія та zero-inflated розподіл доходу
+депозиторів) оцінюються з історичних даних. Для кожної комбінації
+(tier, користувачів на групу, lift) симулюються тисячі експериментів одразу:
+кількість депозиторів групи - біноміальна вибірка, дохід - мультиноміальна
+вибірка над гістограмою доходу депозиторів, тому на експеримент припадає
+кілька операцій над масивами, а не рядки користувачів. Lift збільшує
+ймовірність депозиту груп з push-ами; дохід депозитора не змінюється, тож
+ARPU зростає на той самий відсоток.
+
+Кожен симульований експеримент - сім'я тестів "група проти контролю"
+(z-тест конверсії та Welch-тест ARPU) з корекцією множинних порівнянь;
+потужність - частка відхилених H0 серед усіх порівнянь.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.significance import adjust_pvalues, two_proportion_ztest
+
+# Сітка за замовчуванням: користувачів на групу та відносні lift
+DEFAULT_SAMPLE_SIZES = [1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000, 200_000, 500_000]
+DEFAULT_LIFTS = [0.05, 0.10, 0.20]
+
+# Кількість бінів гістограми доходу (квантильні біни із середнім значенням біну)
+REVENUE_BINS = 64
+
+# Ліміт елементів матриці мультиноміальних вибірок в одному батчі
+BATCH_ELEMENTS = 2_000_000
+
+METRICS = ['conversion', 'arpu']
+
+
+def revenue_histogram(revenue: np.ndarray, bins: Optional[int] = REVENUE_BINS) -> tuple:
+    """
+    Гістограма доходу депозиторів
+
+    Унікальні значення стискаються в bins квантильних бінів; значення біну -
+    середній дохід у ньому, тому середнє розподілу зберігається точно.
+
+    Args:
+        revenue: Дохід кожного депозитора
+        bins: Кількість бінів (None - усі унікальні значення)
+
+    Returns:
+        Tuple (values, probs)
+    """
+    revenue = np.asarray(revenue, dtype=float)
+    if revenue.size == 0:
+        return np.zeros(1), np.ones(1)
+
+    values, counts = np.unique(revenue, return_counts=True)
+    if bins is not None and values.size > bins:
+        edges = np.quantile(revenue, np.linspace(0, 1, bins + 1)[1:-1])
+        codes = np.searchsorted(edges, values, side='right')
+        weights = np.bincount(codes, weights=counts, minlength=bins)
+        sums = np.bincount(codes, weights=counts * values, minlength=bins)
+        keep = weights > 0
+        values, counts = sums[keep] / weights[keep], weights[keep]
+
+    return values, counts / counts.sum()
+
+
+def fit_baselines(df: pd.DataFrame,
+                  by: str = 'tier',
+                  baseline_group: Optional[str] = None,
+                  revenue_bins: Optional[int] = REVENUE_BINS) -> Dict[str, Dict]:
+    """
+    Базові показники сегментів з matched-датасету
+
+    Args:
+        df: Результат merge_data (has_deposit, total_revenue, ab_group, by)
+        by: Колонка сегментів (за замовчуванням tier)
+        baseline_group: A/B група бази (напр. контроль); сегменти без неї беруть усіх користувачів
+        revenue_bins: Кількість бінів гістограми доходу
+
+    Returns:
+        {сегмент: {'users', 'conversion', 'arpu', 'revenue_values', 'revenue_probs'}}
+    """
+    has_deposit = df['has_deposit'].fillna(0).to_numpy() > 0
+    revenue = df['total_revenue'].fillna(0).to_numpy(dtype=float)
+    segments = df[by].astype(str).to_numpy()
+    in_baseline = (df['ab_group'].astype(str).to_numpy() == str(baseline_group)
+                   if baseline_group is not None else np.ones(len(df), dtype=bool))
+
+    baselines = {}
+    for segment in sorted(pd.unique(segments)):
+        mask = segments == segment
+        if (mask & in_baseline).any():
+            mask &= in_baseline
+
+        users = int(mask.sum())
+        depositors = mask & has_deposit
+        values, probs = revenue_histogram(revenue[depositors], revenue_bins)
+        baselines[segment] = {
+            'users': users,
+            'conversion': float(depositors.sum() / users),
+            'arpu': float(revenue[mask].sum() / users),
+            'revenue_values': values,
+            'revenue_probs': probs
+        }
+    return baselines
+
+
+def simulate_power(conversion: float,
+                   revenue_values: np.ndarray,
+                   revenue_probs: np.ndarray,
+                   users: int,
+                   lift: float,
+                   groups: int = 6,
+                   n_sims: int = 2000,
+                   alpha: float = 0.05,
+                   method: str = 'holm',
+                   seed: np.random.SeedSequence = None) -> Dict[str, float]:
+    """
+    Потужність для однієї комбінації (база, користувачів на групу, lift)
+
+    Args:
+        conversion: Базова ймовірність депозиту
+        revenue_values: Значення гістограми доходу депозитора
+        revenue_probs: Ймовірності значень
+        users: Користувачів у кожній групі
+        lift: Відносний приріст конверсії груп з push-ами
+        groups: Кількість груп разом з контрольною
+        n_sims: Кількість симульованих експериментів
+        alpha: Рівень значущості
+        method: Корекція множинних порівнянь ('bonferroni', 'holm', 'fdr_bh')
+        seed: Насіння генератора
+
+    Returns:
+        {'conversion': потужність, 'arpu': потужність}
+    """
+    rng = np.random.default_rng(seed)
+    values = np.asarray(revenue_values, dtype=float)
+    probs = np.asarray(revenue_probs, dtype=float)
+    rates = np.full(groups, conversion)
+    rates[1:] = min(conversion * (1 + lift), 1.0)
+
+    batch = max(1, BATCH_ELEMENTS // (groups * values.size))
+    rejected = {metric: 0 for metric in METRICS}
+
+    for start in range(0, n_sims, batch):
+        size = min(batch, n_sims - start)
+
+        # Депозитори груп (індекс 0 - контроль) та їхній дохід
+        depositors = rng.binomial(users, rates, size=(size, groups))
+        bins = rng.multinomial(depositors, probs)
+        revenue_sum = bins @ values
+        revenue_sq = bins @ (values ** 2)
+
+        _, conv_p = two_proportion_ztest(depositors[:, 1:], users, depositors[:, [0]], users)
+
+        # Welch-тест середнього доходу на користувача
+        mean = revenue_sum / users
+        var = np.maximum(revenue_sq - users * mean ** 2, 0) / (users - 1)
+        var_t, var_c = var[:, 1:] / users, var[:, [0]] / users
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_stat = (mean[:, 1:] - mean[:, [0]]) / np.sqrt(var_t + var_c)
+            dof = (var_t + var_c) ** 2 / ((var_t ** 2 + var_c ** 2) / (users - 1))
+        arpu_p = 2 * stats.t.sf(np.abs(t_stat), dof)
+
+        for metric, p_values in (('conversion', conv_p), ('arpu', arpu_p)):
+            adjusted = adjust_pvalues(p_values, method)
+            rejected[metric] += int((adjusted < alpha).sum())
+
+    comparisons = n_sims * (groups - 1)
+    return {metric: rejected[metric] / comparisons for metric in METRICS}
+
+
+def _simulate_task(args):
+    """Обгортка для ProcessPoolExecutor"""
+    return simulate_power(*args)
+
+
+def power_curves(baselines: Dict[str, Dict],
+                 sample_sizes: Sequence[int] = DEFAULT_SAMPLE_SIZES,
+                 lifts: Sequence[float] = DEFAULT_LIFTS,
+                 groups: int = 6,
+                 n_sims: int = 2000,
+                 alpha: float = 0.05,
+                 method: str = 'holm',
+                 seed: int = 42,
+                 n_jobs: Optional[int] = None) -> pd.DataFrame:
+    """
+    Криві потужності для всіх сегментів
+
+    Args:
+        baselines: Результат fit_baselines (або словник з тими ж ключами)
+        sample_sizes: Користувачів на групу
+        lifts: Відносні lift конверсії
+        groups: Кількість груп разом з контрольною
+        n_sims: Симульованих експериментів на точку кривої
+        alpha: Рівень значущості
+        method: Корекція множинних порівнянь
+        seed: Базове насіння (кожна точка отримує власне через SeedSequence.spawn)
+        n_jobs: Кількість процесів (None - всі ядра, 1 - без пулу)
+
+    Returns:
+        DataFrame [segment, users_per_group, lift, metric, power, mc_se]
+    """
+    if groups < 2:
+        raise ValueError("Потрібна щонайменше одна група проти контролю")
+
+    points = [(segment, int(users), float(lift)) for segment in baselines
+              for lift in lifts for users in sample_sizes]
+    seeds = np.random.SeedSequence(seed).spawn(len(points))
+    tasks = [(baselines[segment]['conversion'], baselines[segment]['revenue_values'],
+              baselines[segment]['revenue_probs'], users, lift, groups, n_sims, alpha, method, point_seed)
+             for (segment, users, lift), point_seed in zip(points, seeds)]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as executor:
+            results = list(executor.map(_simulate_task, tasks))
+    else:
+        results = [_simulate_task(task) for task in tasks]
+
+    comparisons = n_sims * (groups - 1)
+    rows = []
+    for (segment, users, lift), power in zip(points, results):
+        for metric in METRICS:
+            rows.append({
+                'segment': segment,
+                'users_per_group': users,
+                'lift': lift,
+                'metric': metric,
+                'power': power[metric],
+                'mc_se': float(np.sqrt(power[metric] * (1 - power[metric]) / comparisons))
+            })
+
+    return pd.DataFrame(rows, columns=['segment', 'users_per_group', 'lift', 'metric', 'power', 'mc_se'])
+
+
+def required_sample_size(curves: pd.DataFrame, target_power: float = 0.8) -> pd.DataFrame:
+    """
+    Мінімальна кількість користувачів на групу для цільової потужності
+
+    Args:
+        curves: Результат power_curves
+        target_power: Цільова потужність
+
+    Returns:
+        DataFrame [segment, lift, metric, users_per_group, power] (NaN - ціль не досягнута на сітці)
+    """
+    rows = []
+    for (segment, lift, metric), curve in curves.groupby(['segment', 'lift', 'metric'], sort=True):
+        curve = curve.sort_values('users_per_group')
+        reached = curve[curve['power'] >= target_power]
+        first = reached.iloc[0] if not reached.empty else None
+        rows.append({
+            'segment': segment,
+            'lift': lift,
+            'metric': metric,
+            'users_per_group': first['users_per_group'] if first is not None else np.nan,
+            'power': first['power'] if first is not None else np.nan
+        })
+    return pd.DataFrame(rows, columns=['segment', 'lift', 'metric', 'users_per_group', 'power'])
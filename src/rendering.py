@@ -0,0 +1,152 @@
+"""
+Пакетний headless-рендер графіків PushVisualizer у пулі процесів
+
+Кожне завдання рендериться у воркері на Agg backend без викликів show(),
+фігури закриваються одразу після збереження. Результат - шляхи до файлів
+та час рендеру кожного графіка.
+"""
+
+import os
+import time
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+
+import pandas as pd
+
+from src.chart_cache import ChartCache
+
+# Графік -> (метод PushVisualizer, формат файлу за замовчуванням)
+CHART_METHODS = {
+    'ab_conversion_comparison': ('plot_ab_conversion_comparison', 'png'),
+    'geo_tier_analysis': ('plot_geo_tier_analysis', 'html'),
+    'optimal_pushes_by_tier': ('plot_optimal_pushes_by_tier', 'png'),
+    'push_timeline': ('plot_push_timeline', 'html'),
+    'conversion_curves': ('plot_conversion_curves', 'png'),
+    'summary_dashboard': ('create_summary_dashboard', 'html')
+}
+
+
+def standard_chart_jobs(ab_stats: pd.DataFrame,
+                        geo_stats: pd.DataFrame,
+                        data: Any = None) -> List[Dict[str, Any]]:
+    """
+    Повний набір графіків звіту
+
+    Args:
+        ab_stats: Результат ab_analysis
+        geo_stats: Результат geo_analysis
+        data: Matched-датасет або PushCube для push-бакетів та часової лінії
+
+    Returns:
+        Список завдань для render_charts
+    """
+    jobs = [
+        {'chart': 'ab_conversion_comparison', 'args': (ab_stats,)},
+        {'chart': 'geo_tier_analysis', 'args': (geo_stats,)},
+        {'chart': 'summary_dashboard', 'args': (ab_stats, geo_stats)}
+    ]
+    if data is not None:
+        jobs += [
+            {'chart': 'optimal_pushes_by_tier', 'args': (data,)},
+            {'chart': 'push_timeline', 'args': (data,)}
+        ]
+    return jobs
+
+
+def _init_render_worker() -> None:
+    """Неінтерактивний backend у воркері"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+@contextlib.contextmanager
+def _agg_backend():
+    """Agg backend на час рендеру в поточному процесі (попередній відновлюється)"""
+    import matplotlib.pyplot as plt
+
+    previous = plt.get_backend()
+    plt.switch_backend('Agg')
+    try:
+        yield
+    finally:
+        if previous.lower() != 'agg':
+            plt.switch_backend(previous)
+
+
+def render_job(job: Dict[str, Any],
+               output_dir: str,
+               figsize: tuple = (12, 8),
+               dpi: int = 300,
+               cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Відрендерити одне завдання без показу
+
+    Args:
+        job: {'chart': назва, 'args': (...), 'kwargs': {...}, 'filename': опціонально}
+        output_dir: Директорія для файлу
+        figsize: Розмір графіків
+        dpi: Роздільна здатність PNG
+        cache_dir: Сховище ChartCache (None - завжди рендерити)
+
+    Returns:
+        {'chart', 'path', 'seconds', 'cached', 'status'}
+    """
+    from src.visualizer import PushVisualizer
+
+    chart = job['chart']
+    method_name, file_format = CHART_METHODS.get(chart, (chart, 'png'))
+    path = os.path.join(output_dir, job.get('filename') or f"{chart}.{file_format}")
+
+    start = time.perf_counter()
+    visualizer = PushVisualizer(figsize=figsize, headless=True, dpi=dpi,
+                                cache=ChartCache(cache_dir) if cache_dir else None)
+    try:
+        getattr(visualizer, method_name)(*job.get('args', ()), save_path=path, **job.get('kwargs', {}))
+        status = 'ok'
+    except Exception as e:
+        status = f"error: {e}"
+
+    return {'chart': chart, 'path': path, 'seconds': time.perf_counter() - start,
+            'cached': visualizer.last_render == 'cached', 'status': status}
+
+
+def render_charts(jobs: List[Dict[str, Any]],
+                  output_dir: str = 'outputs/charts',
+                  n_jobs: Optional[int] = None,
+                  figsize: tuple = (12, 8),
+                  dpi: int = 300,
+                  cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Відрендерити список графіків паралельно
+
+    Args:
+        jobs: Завдання (див. render_job)
+        output_dir: Директорія для файлів
+        n_jobs: Кількість процесів (None - всі ядра, 1 - без пулу)
+        figsize: Розмір графіків
+        dpi: Роздільна здатність PNG
+        cache_dir: Сховище ChartCache - незмінні графіки не перемальовуються
+
+    Returns:
+        DataFrame [chart, path, seconds, cached, status]
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    n_jobs = min(n_jobs or os.cpu_count() or 1, max(len(jobs), 1))
+
+    if n_jobs == 1:
+        with _agg_backend():
+            results = [render_job(job, output_dir, figsize, dpi, cache_dir) for job in jobs]
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context,
+                                 initializer=_init_render_worker) as executor:
+            futures = [executor.submit(render_job, job, output_dir, figsize, dpi, cache_dir) for job in jobs]
+            results = [future.result() for future in futures]
+
+    if cache_dir:
+        ChartCache(cache_dir).write_manifest()
+
+    return pd.DataFrame(results, columns=['chart', 'path', 'seconds', 'cached', 'status'])
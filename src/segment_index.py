@@ -0,0 +1,240 @@
+"""
+Індекс сегментів matched-датасету: відсортовані списки рядків на кожне значення
+
+Індекс будується один раз на оброблений датасет: для кожної колонки
+сегментації (ab_group, tier, country, push_bucket, has_deposit, app)
+рядки впорядковуються за значенням, і рядки значення - суцільний
+відсортований зріз (CSR: order + offsets, 4 байти на рядок на колонку).
+Вибірка з кількох предикатів - перетин відсортованих списків, починаючи
+з найкоротшого (пошук найкоротшого у довших через searchsorted), без булевих
+масок на весь датасет. Індекс зберігається .npz-файлом поруч із даними.
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.cube import assign_push_bucket
+from src.overlap import sorted_member
+from src.segments import segment_mask
+
+logger = logging.getLogger(__name__)
+
+# Колонки індексу (app - застосунок кампанії конверсії, DataLoader виводить його з campaign_id;
+# у користувачів без конверсій app порожній і в списки значень не потрапляє)
+INDEX_COLUMNS = ['ab_group', 'tier', 'country', 'push_bucket', 'has_deposit', 'app']
+
+# Суфікс файлу індексу поруч із датасетом
+INDEX_SUFFIX = '.segidx.npz'
+
+
+def index_path(data_path: str) -> str:
+    """Шлях індексу для файлу датасету"""
+    return data_path + INDEX_SUFFIX
+
+
+def _source_stamp(data_path: Optional[str]) -> np.ndarray:
+    """Розмір та час зміни файлу датасету (для перевірки актуальності індексу)"""
+    if not data_path or not os.path.exists(data_path):
+        return np.array([-1, -1], dtype=np.int64)
+    return np.array([os.path.getsize(data_path), int(os.path.getmtime(data_path))], dtype=np.int64)
+
+
+def _index_values(df: pd.DataFrame, column: str) -> pd.Series:
+    """Значення колонки індексу (push_bucket виводиться з push_count)"""
+    if column == 'push_bucket' and column not in df.columns:
+        return assign_push_bucket(df['push_count'].fillna(0))
+    values = df[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(values.cat.categories.dtype)
+    return values
+
+
+class SegmentIndex:
+    """Відсортовані списки рядків на кожне значення колонок сегментації"""
+
+    def __init__(self,
+                 rows: int,
+                 postings: Dict[str, tuple],
+                 source_stamp: Optional[np.ndarray] = None):
+        """
+        Args:
+            rows: Кількість рядків датасету
+            postings: {колонка: (values, order, offsets)} - рядки значення values[i]
+                      це order[offsets[i]:offsets[i + 1]], відсортовані
+            source_stamp: Відбиток файлу датасету (розмір, mtime)
+        """
+        self.rows = rows
+        self.postings = postings
+        self.source_stamp = source_stamp if source_stamp is not None else _source_stamp(None)
+
+    @classmethod
+    def build(cls,
+              df: pd.DataFrame,
+              columns: Optional[List[str]] = None,
+              data_path: Optional[str] = None) -> 'SegmentIndex':
+        """
+        Побудувати індекс по датасету
+
+        Args:
+            df: Matched-датасет
+            columns: Колонки індексу (за замовчуванням наявні з INDEX_COLUMNS)
+            data_path: Файл, з якого прочитано датасет (для перевірки актуальності)
+
+        Returns:
+            SegmentIndex
+        """
+        if columns is None:
+            columns = [col for col in INDEX_COLUMNS
+                       if col in df.columns or (col == 'push_bucket' and 'push_count' in df.columns)]
+
+        postings = {}
+        for column in columns:
+            codes, values = pd.factorize(_index_values(df, column), sort=True)
+            values = np.asarray(values)
+            if values.dtype == object:
+                values = values.astype(str)
+            # Стабільне сортування - рядки кожного значення лишаються відсортованими
+            order = np.argsort(codes, kind='stable').astype(np.uint32)
+            counts = np.bincount(codes[codes >= 0], minlength=len(values))
+            offsets = np.concatenate([[0], np.cumsum(counts)]) + int((codes < 0).sum())
+            postings[column] = (values, order, offsets.astype(np.int64))
+
+        logger.info(f"🗂️ Індекс сегментів: {len(df)} рядків, "
+                    f"{', '.join(f'{col} ({len(postings[col][0])})' for col in columns)}")
+        return cls(len(df), postings, _source_stamp(data_path))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.postings)
+
+    def values(self, column: str) -> np.ndarray:
+        """Відсортовані унікальні значення колонки"""
+        return self.postings[column][0]
+
+    def _lookup(self, column: str, value: Any) -> np.ndarray:
+        """Відсортовані рядки, де column задовольняє предикат (скаляр, список або (min, max))"""
+        values, order, offsets = self.postings[column]
+
+        if isinstance(value, tuple):
+            low, high = value
+            positions = np.flatnonzero((values >= low) & (values <= high))
+        else:
+            wanted = list(value) if isinstance(value, (list, set)) else [value]
+            if values.dtype.kind == 'U':
+                wanted = [str(item) for item in wanted]
+            positions = np.flatnonzero(pd.Index(values).isin(wanted))
+
+        if positions.size == 0:
+            return np.array([], dtype=np.uint32)
+        if positions.size == 1:
+            return order[offsets[positions[0]]:offsets[positions[0] + 1]]
+        return np.sort(np.concatenate([order[offsets[i]:offsets[i + 1]] for i in positions]))
+
+    def select(self, filters: Dict[str, Any], df: Optional[pd.DataFrame] = None) -> np.ndarray:
+        """
+        Номери рядків сегмента
+
+        Args:
+            filters: {колонка: значення | [значення, ...] | (min, max)}, як у segment_mask
+            df: Датасет для предикатів по колонках поза індексом (напр. push_count)
+
+        Returns:
+            Відсортований масив позицій рядків (для df.iloc / df.take)
+        """
+        indexed = {column: value for column, value in filters.items() if column in self.postings}
+        rest = {column: value for column, value in filters.items() if column not in self.postings}
+        if rest and df is None:
+            raise ValueError(f"Колонок немає в індексі: {', '.join(rest)} (передайте df)")
+
+        if indexed:
+            lists = sorted((self._lookup(column, value) for column, value in indexed.items()), key=len)
+            rows = lists[0]
+            for other in lists[1:]:
+                if rows.size == 0:
+                    break
+                rows = rows[sorted_member(other, rows)]
+        else:
+            rows = np.arange(self.rows, dtype=np.uint32)
+
+        if rest and rows.size:
+            subset = df.iloc[rows, [df.columns.get_loc(column) for column in rest]]
+            rows = rows[segment_mask(subset, rest)]
+        return rows.astype(np.int64)
+
+    def count(self, filters: Dict[str, Any], df: Optional[pd.DataFrame] = None) -> int:
+        """Кількість рядків сегмента"""
+        return int(self.select(filters, df).size)
+
+    def mask(self, filters: Dict[str, Any], df: Optional[pd.DataFrame] = None) -> np.ndarray:
+        """Булева маска сегмента (для API, що приймають маски)"""
+        mask = np.zeros(self.rows, dtype=bool)
+        mask[self.select(filters, df)] = True
+        return mask
+
+    def take(self, df: pd.DataFrame, **filters) -> pd.DataFrame:
+        """Рядки сегмента: index.take(df, tier='Tier 1', ab_group='3', push_bucket='6-10')"""
+        if len(df) != self.rows:
+            raise ValueError(f"Індекс побудовано на {self.rows} рядках, датасет має {len(df)}")
+        return df.iloc[self.select(filters, df)]
+
+    def is_fresh(self, data_path: str) -> bool:
+        """Чи відповідає індекс поточному файлу датасету"""
+        return bool(np.array_equal(self.source_stamp, _source_stamp(data_path)))
+
+    def save(self, path: str) -> None:
+        """Зберегти індекс у .npz (без pickle)"""
+        arrays = {'rows': np.array([self.rows], dtype=np.int64),
+                  'columns': np.array(self.columns, dtype=str),
+                  'source_stamp': self.source_stamp}
+        for i, (values, order, offsets) in enumerate(self.postings.values()):
+            arrays.update({f'values_{i}': values, f'order_{i}': order, f'offsets_{i}': offsets})
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+        logger.info(f"💾 Індекс сегментів збережено: {path}")
+
+    @classmethod
+    def load(cls, path: str) -> 'SegmentIndex':
+        """Завантажити індекс з .npz"""
+        with np.load(path, allow_pickle=False) as data:
+            postings = {
+                str(column): (data[f'values_{i}'], data[f'order_{i}'], data[f'offsets_{i}'])
+                for i, column in enumerate(data['columns'])
+            }
+            return cls(int(data['rows'][0]), postings, data['source_stamp'])
+
+    @classmethod
+    def for_file(cls,
+                 data_path: str,
+                 df: Optional[pd.DataFrame] = None,
+                 columns: Optional[List[str]] = None) -> 'SegmentIndex':
+        """
+        Індекс поруч із файлом датасету: завантажити актуальний або перебудувати
+
+        Args:
+            data_path: Parquet-файл датасету (напр. data/processed/merged_data.parquet)
+            df: Вже прочитаний датасет (інакше читається з data_path)
+            columns: Колонки індексу
+
+        Returns:
+            SegmentIndex
+        """
+        path = index_path(data_path)
+        if os.path.exists(path):
+            index = cls.load(path)
+            if index.is_fresh(data_path) and (columns is None or set(columns) <= set(index.columns)):
+                return index
+
+        if df is None:
+            df = pd.read_parquet(data_path)
+        index = cls.build(df, columns, data_path)
+        index.save(path)
+        return index
+
+    def __len__(self) -> int:
+        return self.rows
@@ -0,0 +1,146 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from src.segment_index import SegmentIndex
+
+# Колонки, потрібні для A/B аналізу сегменту
+SEGMENT_COLUMNS = [
+    'gadid', 'ab_group', 'push_count', 'has_deposit', 'has_registration',
+    'total_deposits', 'total_registrations'
+]
+
+# Датасет воркера (успадковується через fork без копіювання)
+_SEGMENT_FRAME = None
+
+
+def segments_from_columns(df: pd.DataFrame, columns: List[str]) -> List[Dict[str, Any]]:
+    """
+    Згенерувати сегменти по кожному значенню кожної колонки
+
+    Args:
+        df: Matched-датасет
+        columns: Колонки сегментації (напр. ['tier', 'app'])
+
+    Returns:
+        Список визначень сегментів
+    """
+    segments = []
+    for column in columns:
+        for value in sorted(df[column].dropna().unique()):
+            segments.append({'name': f"{column}={value}", 'filters': {column: value}})
+    return segments
+
+
+def segment_mask(df: pd.DataFrame, filters: Dict[str, Any]) -> np.ndarray:
+    """
+    Булева маска сегменту
+
+    Args:
+        df: Датасет
+        filters: {колонка: значення | [значення, ...] | (min, max)}
+
+    Returns:
+        numpy-маска рядків сегменту
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for column, value in filters.items():
+        values = df[column]
+        if isinstance(value, tuple):
+            low, high = value
+            mask &= ((values >= low) & (values <= high)).to_numpy()
+        elif isinstance(value, (list, set)):
+            mask &= values.isin(value).to_numpy()
+        else:
+            mask &= (values == value).to_numpy()
+    return mask
+
+
+def _init_worker(df: pd.DataFrame) -> None:
+    """Зберегти датасет у глобальній змінній воркера"""
+    global _SEGMENT_FRAME
+    _SEGMENT_FRAME = df
+
+
+def _run_segment(task: tuple) -> pd.DataFrame:
+    """A/B аналіз та тести проти контролю для одного сегменту"""
+    from src.analyzer import PushAnalyzer
+
+    segment, method, alpha, rows = task
+    df = _SEGMENT_FRAME
+    if rows is None:
+        rows = np.flatnonzero(segment_mask(df, segment['filters']))
+
+    if rows.size == 0:
+        return pd.DataFrame()
+
+    analyzer = PushAnalyzer()
+    ab_stats = analyzer.ab_analysis(df.iloc[rows])
+    tests = analyzer.significance_tests(ab_stats, method=method, alpha=alpha)['pairwise']
+
+    result = ab_stats[['total_users', 'users_with_deposits', 'deposit_conversion',
+                       'arpu', 'group_type']].reset_index()
+
+    if not tests.empty:
+        vs_control = tests[tests['comparison'] == 'vs_control'][
+            ['group_a', 'diff_pp', 'z_stat', 'p_value', 'p_adjusted', 'significant']
+        ].rename(columns={'group_a': 'ab_group', 'diff_pp': 'diff_pp_vs_control'})
+        result = result.merge(vs_control, on='ab_group', how='left')
+
+    result.insert(0, 'segment', segment['name'])
+    return result
+
+
+def run_segments(df: pd.DataFrame,
+                 segments: List[Dict[str, Any]],
+                 method: str = 'fdr_bh',
+                 alpha: float = 0.05,
+                 n_jobs: Optional[int] = None,
+                 index: Optional['SegmentIndex'] = None) -> pd.DataFrame:
+    """
+    Паралельний A/B аналіз списку сегментів
+
+    Args:
+        df: Matched-датасет
+        segments: Визначення сегментів [{'name': ..., 'filters': {...}}, ...]
+        method: Корекція множинних порівнянь всередині сегменту
+        alpha: Рівень значущості
+        n_jobs: Кількість процесів (None - всі ядра, 1 - без пулу)
+        index: SegmentIndex датасету - рядки сегментів беруться перетином списків індексу
+
+    Returns:
+        Охайна таблиця: рядок на (сегмент, A/B група)
+    """
+    if index is not None and index.rows != len(df):
+        raise ValueError(f"Індекс побудовано на {index.rows} рядках, датасет має {len(df)}")
+
+    filter_columns = {column for segment in segments for column in segment['filters']}
+    columns = [c for c in SEGMENT_COLUMNS + sorted(filter_columns) if c in df.columns]
+    frame = df[list(dict.fromkeys(columns))]
+    frame = frame.assign(ab_group=frame['ab_group'].astype(str))
+
+    tasks = [(segment, method, alpha, index.select(segment['filters'], df) if index is not None else None)
+             for segment in segments]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, max(len(tasks), 1))
+
+    if n_jobs == 1:
+        _init_worker(frame)
+        results = [_run_segment(task) for task in tasks]
+    else:
+        # fork передає датасет воркерам без серіалізації
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        chunksize = max(1, len(tasks) // (n_jobs * 4))
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context,
+                                 initializer=_init_worker, initargs=(frame,)) as executor:
+            results = list(executor.map(_run_segment, tasks, chunksize=chunksize))
+
+    results = [result for result in results if not result.empty]
+    if not results:
+        return pd.DataFrame()
+    return pd.concat(results, ignore_index=True)
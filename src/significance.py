@@ -0,0 +1,241 @@
+"""
+Пакетні тести значущості на достатніх статистиках (користувачі та конвертери)
+
+Усі попарні z-тести, тести проти контрольної групи та chi-square по кожному
+сегменту рахуються як операції над масивами (сегменти × групи), тому час
+не залежить від розміру вихідного датасету.
+"""
+
+from typing import List, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Колонки (users, converters) у відомих форматах вхідних таблиць
+COUNT_COLUMNS = [
+    ('total_users', 'users_with_deposits'),  # PushAnalyzer.ab_analysis
+    ('gadid', 'has_deposit'),                # PushAnalyzer.geo_analysis
+    ('users', 'depositors')                  # PushCube.rollup
+]
+
+
+def adjust_pvalues(p_values: np.ndarray, method: str = 'fdr_bh') -> np.ndarray:
+    """
+    Корекція множинних порівнянь по рядках 2D-масиву (кожен рядок - окрема сім'я тестів)
+
+    Args:
+        p_values: Масив (сім'ї × тести), NaN - відсутні тести
+        method: 'bonferroni', 'holm' або 'fdr_bh'
+
+    Returns:
+        Скориговані p-values тієї ж форми
+    """
+    p_values = np.atleast_2d(np.asarray(p_values, dtype=float))
+    valid = ~np.isnan(p_values)
+    m = valid.sum(axis=1, keepdims=True)
+
+    if method == 'bonferroni':
+        adjusted = p_values * m
+    elif method in ('holm', 'fdr_bh'):
+        order = np.argsort(p_values, axis=1)  # NaN в кінці рядка
+        sorted_p = np.take_along_axis(p_values, order, axis=1)
+        rank = np.arange(1, p_values.shape[1] + 1)
+
+        if method == 'holm':
+            sorted_adj = np.fmax.accumulate(sorted_p * (m - rank + 1), axis=1)
+        else:
+            sorted_adj = sorted_p * m / rank
+            sorted_adj = np.fmin.accumulate(sorted_adj[:, ::-1], axis=1)[:, ::-1]
+
+        adjusted = np.empty_like(sorted_adj)
+        np.put_along_axis(adjusted, order, sorted_adj, axis=1)
+    else:
+        raise ValueError(f"Невідомий метод корекції: {method}")
+
+    adjusted = np.minimum(adjusted, 1.0)
+    adjusted[~valid] = np.nan
+    return adjusted
+
+
+def counts_matrix(counts: pd.DataFrame,
+                  by: Optional[List[str]] = None,
+                  users_col: Optional[str] = None,
+                  converters_col: Optional[str] = None) -> tuple:
+    """
+    Розгорнути таблицю лічильників у матриці (сегменти × A/B групи)
+
+    Args:
+        counts: Таблиця з ab_group в індексі або колонках
+        by: Колонки сегментації (за замовчуванням - інші рівні індексу)
+        users_col: Колонка кількості користувачів
+        converters_col: Колонка кількості конвертерів
+
+    Returns:
+        Tuple (segments_index, groups, users, converters)
+    """
+    if by is None:
+        by = [name for name in counts.index.names if name not in (None, 'ab_group')]
+
+    frame = counts.reset_index() if 'ab_group' not in counts.columns else counts.copy()
+    frame['ab_group'] = frame['ab_group'].astype(str)
+
+    if users_col is None or converters_col is None:
+        for default_users, default_converters in COUNT_COLUMNS:
+            if default_users in frame.columns and default_converters in frame.columns:
+                users_col = users_col or default_users
+                converters_col = converters_col or default_converters
+                break
+        else:
+            raise ValueError("Не знайдено колонок з кількістю користувачів та конвертерів")
+
+    segments = list(by) if by else ['segment']
+    if not by:
+        frame['segment'] = 'all'
+
+    users = frame.pivot_table(index=segments, columns='ab_group', values=users_col,
+                              aggfunc='sum', fill_value=0)
+    converters = frame.pivot_table(index=segments, columns='ab_group', values=converters_col,
+                                   aggfunc='sum', fill_value=0).reindex_like(users).fillna(0)
+
+    return users.index, list(users.columns), users.to_numpy(dtype=float), converters.to_numpy(dtype=float)
+
+
+def two_proportion_ztest(x_a: np.ndarray, n_a: np.ndarray,
+                         x_b: np.ndarray, n_b: np.ndarray) -> tuple:
+    """
+    Двосторонній z-тест двох пропорцій з pooled-дисперсією (як proportions_ztest)
+
+    Returns:
+        Tuple (z_stat, p_value); NaN там, де тест невизначений
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_a = x_a / n_a
+        p_b = x_b / n_b
+        pooled = (x_a + x_b) / (n_a + n_b)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+        z_stat = (p_a - p_b) / se
+
+    z_stat = np.where((n_a > 0) & (n_b > 0) & (se > 0), z_stat, np.nan)
+    p_value = 2 * stats.norm.sf(np.abs(z_stat))
+    return z_stat, p_value
+
+
+def chi_square_segments(users: np.ndarray, converters: np.ndarray) -> tuple:
+    """
+    Chi-square тест незалежності (групи × конверсія) для кожного сегменту
+
+    Відповідає scipy.stats.chi2_contingency з поправкою Єйтса при dof = 1.
+
+    Returns:
+        Tuple (chi2, p_value, dof, cramers_v) - масиви по сегментах
+    """
+    observed = np.stack([converters, users - converters], axis=2)  # (S, G, 2)
+    present = users > 0
+    total = users.sum(axis=1)
+    col_totals = observed.sum(axis=1)  # (S, 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = users[:, :, None] * col_totals[:, None, :] / total[:, None, None]
+
+    n_groups = present.sum(axis=1)
+    n_cols = (col_totals > 0).sum(axis=1)
+    dof = (n_groups - 1) * (n_cols - 1)
+
+    diff = np.abs(observed - expected)
+    yates = np.where(dof == 1, 0.5, 0.0)[:, None, None]
+    diff = diff - np.minimum(yates, diff)
+
+    cells = present[:, :, None] & (col_totals[:, None, :] > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi2 = np.where(cells, diff ** 2 / expected, 0.0).sum(axis=(1, 2))
+
+    valid = dof > 0
+    chi2 = np.where(valid, chi2, np.nan)
+    p_value = stats.chi2.sf(chi2, np.maximum(dof, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cramers_v = np.sqrt(chi2 / (total * (np.minimum(n_groups, n_cols) - 1)))
+
+    return chi2, p_value, dof, cramers_v
+
+
+def significance_tests(counts: pd.DataFrame,
+                       control_group: str,
+                       by: Optional[List[str]] = None,
+                       users_col: Optional[str] = None,
+                       converters_col: Optional[str] = None,
+                       method: str = 'fdr_bh',
+                       alpha: float = 0.05) -> Dict[str, pd.DataFrame]:
+    """
+    Всі попарні та контрольні тести для всіх сегментів за один виклик
+
+    Args:
+        counts: Таблиця лічильників (ab_analysis, geo_analysis, PushCube.rollup)
+        control_group: Ідентифікатор контрольної групи
+        by: Колонки сегментації
+        users_col: Колонка кількості користувачів
+        converters_col: Колонка кількості конвертерів
+        method: Метод корекції ('bonferroni', 'holm', 'fdr_bh')
+        alpha: Рівень значущості
+
+    Returns:
+        {'omnibus': chi-square по сегментах, 'pairwise': попарні та vs-control тести}
+    """
+    segments, groups, users, converters = counts_matrix(counts, by, users_col, converters_col)
+    segment_frame = segments.to_frame(index=False)
+
+    # Omnibus chi-square
+    chi2, chi2_p, dof, cramers_v = chi_square_segments(users, converters)
+    omnibus = segment_frame.assign(
+        groups=(users > 0).sum(axis=1),
+        users=users.sum(axis=1).astype(int),
+        chi2=chi2,
+        dof=dof,
+        p_value=chi2_p,
+        cramers_v=cramers_v,
+        significant=chi2_p < alpha
+    )
+
+    # Пари груп: усі попарні + push-групи проти контролю
+    ia, ib = np.triu_indices(len(groups), k=1)
+    families = [('pairwise', ia, ib)]
+    if control_group in groups:
+        control_idx = groups.index(control_group)
+        push_idx = np.array([i for i in range(len(groups)) if i != control_idx], dtype=int)
+        families.append(('vs_control', push_idx, np.full(len(push_idx), control_idx)))
+
+    frames = []
+    for comparison, idx_a, idx_b in families:
+        if len(idx_a) == 0:
+            continue
+        n_a, n_b = users[:, idx_a], users[:, idx_b]
+        x_a, x_b = converters[:, idx_a], converters[:, idx_b]
+
+        z_stat, p_value = two_proportion_ztest(x_a, n_a, x_b, n_b)
+        p_adjusted = adjust_pvalues(p_value, method)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            conv_a = x_a / n_a * 100
+            conv_b = x_b / n_b * 100
+
+        n_segments, n_pairs = p_value.shape
+        frame = segment_frame.loc[np.repeat(np.arange(n_segments), n_pairs)].reset_index(drop=True)
+        frame = frame.assign(
+            comparison=comparison,
+            group_a=np.tile(np.array(groups, dtype=object)[idx_a], n_segments),
+            group_b=np.tile(np.array(groups, dtype=object)[idx_b], n_segments),
+            users_a=n_a.ravel().astype(int),
+            users_b=n_b.ravel().astype(int),
+            conversion_a=conv_a.ravel(),
+            conversion_b=conv_b.ravel(),
+            diff_pp=(conv_a - conv_b).ravel(),
+            z_stat=z_stat.ravel(),
+            p_value=p_value.ravel(),
+            p_adjusted=p_adjusted.ravel()
+        )
+        frame['significant'] = frame['p_adjusted'] < alpha
+        frames.append(frame[(frame['users_a'] > 0) & (frame['users_b'] > 0)])
+
+    pairwise = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    return {'omnibus': omnibus, 'pairwise': pairwise}
@@ -0,0 +1,304 @@
+"""
+Мергабельні квантильні скетчі для доходу та кількості push-ів
+
+Скетч - логарифмічна гістограма (DDSketch): значення x потрапляє в бін
+ceil(log_γ |x|), γ = (1 + α) / (1 - α). Будь-який квантиль повертається з
+відносною похибкою не більше α, нулі рахуються точно окремим лічильником.
+Скетчі зливаються додаванням лічильників, тому їх можна будувати по
+чанках, днях чи сегментах і зберігати поруч з обробленими даними.
+"""
+
+import os
+from typing import List, Dict, Tuple, Optional, Iterable
+
+import numpy as np
+import pandas as pd
+
+SKETCH_DIMENSIONS = ['ab_group', 'tier']
+SKETCH_METRICS = ['total_revenue', 'push_count']
+DEFAULT_SKETCHES_PATH = 'data/processed/quantile_sketches.parquet'
+
+
+class QuantileSketch:
+    """Квантильний скетч з гарантованою відносною похибкою"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        """
+        Args:
+            relative_accuracy: Максимальна відносна похибка квантилів (α)
+        """
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        """Кількість значень у скетчі"""
+        return self.zero_count + sum(self.positive.values()) + sum(self.negative.values())
+
+    def bin_index(self, magnitudes: np.ndarray) -> np.ndarray:
+        """Індекси бінів для додатних значень"""
+        return np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64)
+
+    def bin_value(self, index: np.ndarray) -> np.ndarray:
+        """Представницьке значення біну (з похибкою не більше α)"""
+        return 2 * self.gamma ** np.asarray(index, dtype=float) / (self.gamma + 1)
+
+    def add_bins(self, sign: int, bins: Iterable[int], counts: Iterable[int]) -> None:
+        """Додати лічильники бінів (sign: 1, -1 або 0 для нулів)"""
+        if sign == 0:
+            self.zero_count += int(sum(counts))
+            return
+        store = self.positive if sign > 0 else self.negative
+        for index, count in zip(bins, counts):
+            store[int(index)] = store.get(int(index), 0) + int(count)
+
+    def update(self, values: np.ndarray) -> 'QuantileSketch':
+        """
+        Додати масив значень (векторизовано)
+
+        Returns:
+            self
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+
+        zeros = values == 0
+        self.zero_count += int(zeros.sum())
+
+        for sign, mask in ((1, values > 0), (-1, values < 0)):
+            if mask.any():
+                bins, counts = np.unique(self.bin_index(np.abs(values[mask])), return_counts=True)
+                self.add_bins(sign, bins, counts)
+        return self
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Злити з іншим скетчем тієї ж точності
+
+        Returns:
+            Новий QuantileSketch
+        """
+        if not np.isclose(self.relative_accuracy, other.relative_accuracy):
+            raise ValueError("Скетчі з різною точністю не можна зливати")
+
+        merged = QuantileSketch(self.relative_accuracy)
+        for sketch in (self, other):
+            merged.add_bins(1, sketch.positive.keys(), sketch.positive.values())
+            merged.add_bins(-1, sketch.negative.keys(), sketch.negative.values())
+            merged.zero_count += sketch.zero_count
+        return merged
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Розподіл у вигляді (value, count), відсортований за значенням
+
+        Підходить для побудови гістограм без доступу до сирих даних.
+        """
+        negative = sorted(self.negative.items(), reverse=True)
+        positive = sorted(self.positive.items())
+
+        values = np.concatenate([
+            -self.bin_value([index for index, _ in negative]),
+            [0.0] if self.zero_count else [],
+            self.bin_value([index for index, _ in positive])
+        ])
+        counts = np.concatenate([
+            [count for _, count in negative],
+            [self.zero_count] if self.zero_count else [],
+            [count for _, count in positive]
+        ]).astype(np.int64)
+
+        return pd.DataFrame({'value': values, 'count': counts})
+
+    def quantiles(self, qs: List[float]) -> np.ndarray:
+        """
+        Квантилі розподілу
+
+        Args:
+            qs: Рівні квантилів у [0, 1]
+
+        Returns:
+            Масив значень (відносна похибка не більше α)
+        """
+        distribution = self.to_frame()
+        if distribution.empty:
+            return np.full(len(qs), np.nan)
+
+        cumulative = distribution['count'].cumsum().to_numpy()
+        ranks = np.asarray(qs, dtype=float) * (cumulative[-1] - 1)
+        positions = np.searchsorted(cumulative, ranks, side='right')
+        return distribution['value'].to_numpy()[np.minimum(positions, len(cumulative) - 1)]
+
+    def quantile(self, q: float) -> float:
+        """Один квантиль"""
+        return float(self.quantiles([q])[0])
+
+
+class SegmentSketches:
+    """
+    Набір квантильних скетчів по сегментах (напр. ab_group × tier) та метриках
+    """
+
+    def __init__(self,
+                 dims: List[str] = None,
+                 metrics: List[str] = None,
+                 relative_accuracy: float = 0.01):
+        """
+        Args:
+            dims: Виміри сегментації
+            metrics: Метрики зі скетчами
+            relative_accuracy: Відносна похибка квантилів
+        """
+        self.dims = list(dims or SKETCH_DIMENSIONS)
+        self.metrics = list(metrics or SKETCH_METRICS)
+        self.relative_accuracy = relative_accuracy
+        self.sketches: Dict[Tuple, Dict[str, QuantileSketch]] = {}
+
+    def _sketch(self, key: Tuple, metric: str) -> QuantileSketch:
+        """Скетч сегменту та метрики (створюється за потреби)"""
+        segment = self.sketches.setdefault(key, {})
+        if metric not in segment:
+            segment[metric] = QuantileSketch(self.relative_accuracy)
+        return segment[metric]
+
+    def _add_bins(self, bins: pd.DataFrame) -> None:
+        """Додати довгу таблицю [*dims, metric, sign, bin, count]"""
+        for (*key, metric, sign), group in bins.groupby(self.dims + ['metric', 'sign'], sort=False):
+            self._sketch(tuple(key), metric).add_bins(sign, group['bin'], group['count'])
+
+    def update(self, df: pd.DataFrame) -> 'SegmentSketches':
+        """
+        Додати чанк даних: один векторизований прохід на метрику
+
+        Returns:
+            self
+        """
+        log_gamma = QuantileSketch(self.relative_accuracy).log_gamma
+        keys = df[self.dims].astype(str)
+
+        frames = []
+        for metric in self.metrics:
+            values = df[metric].astype(float)
+            valid = values.notna().to_numpy()
+            values = values.to_numpy()[valid]
+            magnitudes = np.abs(values)
+
+            with np.errstate(divide='ignore'):
+                bins = np.where(magnitudes > 0, np.ceil(np.log(magnitudes) / log_gamma), 0)
+
+            frames.append(
+                keys[valid].assign(metric=metric, sign=np.sign(values).astype(int),
+                                   bin=bins.astype(np.int64))
+                .groupby(self.dims + ['metric', 'sign', 'bin'], sort=False)
+                .size()
+                .reset_index(name='count')
+            )
+
+        if frames:
+            self._add_bins(pd.concat(frames, ignore_index=True))
+        return self
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs) -> 'SegmentSketches':
+        """Побудувати скетчі з датасету за один прохід"""
+        return cls(**kwargs).update(df)
+
+    def merge(self, other: 'SegmentSketches') -> 'SegmentSketches':
+        """
+        Злити з іншим набором скетчів (чанк, день, сегмент)
+
+        Returns:
+            Новий SegmentSketches
+        """
+        if self.dims != other.dims:
+            raise ValueError("Скетчі з різними вимірами не можна зливати")
+        if not np.isclose(self.relative_accuracy, other.relative_accuracy):
+            raise ValueError("Скетчі з різною точністю не можна зливати")
+
+        merged = SegmentSketches(self.dims, sorted(set(self.metrics) | set(other.metrics)),
+                                 self.relative_accuracy)
+        merged._add_bins(pd.concat([self.to_bins(), other.to_bins()], ignore_index=True))
+        return merged
+
+    def rollup(self, by: List[str], metric: str) -> Dict[Tuple, QuantileSketch]:
+        """
+        Злити скетчі сегментів до заданих вимірів
+
+        Args:
+            by: Підмножина self.dims (порожній список - загальний скетч)
+            metric: Метрика
+
+        Returns:
+            {ключ: QuantileSketch}
+        """
+        positions = [self.dims.index(dim) for dim in by]
+        rolled = {}
+        for key, segment in self.sketches.items():
+            if metric not in segment:
+                continue
+            target = tuple(key[i] for i in positions)
+            rolled[target] = rolled[target].merge(segment[metric]) if target in rolled else segment[metric]
+        return rolled
+
+    def percentile_table(self,
+                         metric: str,
+                         by: Optional[List[str]] = None,
+                         quantiles: List[float] = None) -> pd.DataFrame:
+        """
+        Таблиця перцентилів метрики по сегментах
+
+        Args:
+            metric: Метрика (напр. total_revenue)
+            by: Виміри (за замовчуванням усі виміри скетчів)
+            quantiles: Рівні (за замовчуванням медіана, p75, p90, p95, p99)
+
+        Returns:
+            DataFrame: рядок на сегмент, колонки p50, p75, ... та count
+        """
+        by = self.dims if by is None else list(by)
+        quantiles = quantiles or [0.5, 0.75, 0.9, 0.95, 0.99]
+
+        rows = []
+        for key, sketch in sorted(self.rollup(by, metric).items()):
+            values = sketch.quantiles(quantiles)
+            row = dict(zip(by, key))
+            row['count'] = sketch.count
+            row.update({f"p{q * 100:g}": value for q, value in zip(quantiles, values)})
+            rows.append(row)
+
+        table = pd.DataFrame(rows)
+        return table.set_index(by) if by and not table.empty else table
+
+    def to_bins(self) -> pd.DataFrame:
+        """Довга таблиця бінів [*dims, metric, sign, bin, count] для зберігання"""
+        rows = []
+        for key, segment in self.sketches.items():
+            for metric, sketch in segment.items():
+                base = dict(zip(self.dims, key), metric=metric)
+                if sketch.zero_count:
+                    rows.append({**base, 'sign': 0, 'bin': 0, 'count': sketch.zero_count})
+                for sign, store in ((1, sketch.positive), (-1, sketch.negative)):
+                    rows.extend({**base, 'sign': sign, 'bin': index, 'count': count}
+                                for index, count in store.items())
+        return pd.DataFrame(rows, columns=self.dims + ['metric', 'sign', 'bin', 'count'])
+
+    def save(self, path: str = DEFAULT_SKETCHES_PATH) -> None:
+        """Зберегти скетчі в parquet"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.to_bins().assign(relative_accuracy=self.relative_accuracy).to_parquet(path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SKETCHES_PATH, dims: List[str] = None) -> 'SegmentSketches':
+        """Завантажити скетчі з parquet"""
+        bins = pd.read_parquet(path)
+        dims = dims or [c for c in bins.columns
+                        if c not in ('metric', 'sign', 'bin', 'count', 'relative_accuracy')]
+        relative_accuracy = float(bins['relative_accuracy'].iloc[0]) if len(bins) else 0.01
+
+        sketches = cls(dims, sorted(bins['metric'].unique()), relative_accuracy)
+        sketches._add_bins(bins.drop(columns='relative_accuracy'))
+        return sketches
@@ -0,0 +1,73 @@
+"""
+Діалекти SQL для PushDatabase: ClickHouse (сервери) та DuckDB (локальні parquet-знімки)
+
+Запити PushDatabase логічно однакові для обох бекендів - відрізняються лише
+функції дат, рядків та хешування, які беруться з об'єкта діалекту.
+"""
+
+from typing import Dict
+
+from src.budget import CLICKHOUSE_HASH, DUCKDB_HASH
+
+# Одиниці часових зрізів для breakdown-запитів
+TIME_UNITS = ['day', 'hour']
+
+
+class SQLDialect:
+    """Функції ClickHouse (діалект за замовчуванням)"""
+
+    name = 'clickhouse'
+
+    # Сімейство хешу партицій (див. src.budget)
+    hash_family = CLICKHOUSE_HASH
+
+    def to_date(self, expr: str) -> str:
+        return f"toDate({expr})"
+
+    def to_string(self, expr: str) -> str:
+        return f"toString({expr})"
+
+    def hash(self, expr: str) -> str:
+        return f"cityHash64({expr})"
+
+    def hour(self, expr: str) -> str:
+        """Година доби (0-23)"""
+        return f"toHour({expr})"
+
+    def count_rows(self) -> str:
+        return "count()"
+
+
+class DuckDBDialect(SQLDialect):
+    """Функції DuckDB"""
+
+    name = 'duckdb'
+    hash_family = DUCKDB_HASH
+
+    def to_date(self, expr: str) -> str:
+        return f"CAST({expr} AS DATE)"
+
+    def to_string(self, expr: str) -> str:
+        return f"CAST({expr} AS VARCHAR)"
+
+    def hash(self, expr: str) -> str:
+        return f"hash({expr})"
+
+    def hour(self, expr: str) -> str:
+        return f"hour({expr})"
+
+    def count_rows(self) -> str:
+        return "count(*)"
+
+
+DIALECTS: Dict[str, SQLDialect] = {
+    'clickhouse': SQLDialect(),
+    'duckdb': DuckDBDialect()
+}
+
+
+def get_dialect(backend: str) -> SQLDialect:
+    """Діалект бекенду PushDatabase"""
+    if backend not in DIALECTS:
+        raise ValueError(f"Невідомий бекенд: {backend} (доступні: {', '.join(DIALECTS)})")
+    return DIALECTS[backend]
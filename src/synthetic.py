@@ -0,0 +1,297 @@
+"""
+Синтетичні push-, control- та conversion-дані реалістичної форми
+
+Фрейми мають ту ж схему, що й результати PushDatabase (get_push_data,
+get_control_group_data, get_conversion_data), тому їх можна подавати в
+DataLoader, PushAnalyzer та пайплайн без ClickHouse. Форма даних: 6 A/B груп
+(5 push-груп з різною інтенсивністю + контроль), мікс країн по tier-ах,
+zero-inflated revenue та кілька рядків кампаній на gadid. Генерація повністю
+векторизована і відтворювана за seed - від 100k до 40M користувачів.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.constants import (
+    CONTROL_GROUP,
+    COUNTRY_NAME_TO_CODE,
+    TIER_1_COUNTRIES,
+    TIER_2_COUNTRIES,
+    TIER_3_COUNTRIES,
+    PUSH_START_DATE,
+    PUSH_END_DATE,
+    CONVERSION_END_DATE,
+    get_country_tier
+)
+
+# Push-групи -> середня кількість push-ів на користувача
+PUSH_GROUP_MEANS = {'1': 1.5, '2': 3.0, '3': 5.0, '4': 8.0, '5': 14.0}
+
+AB_GROUPS = list(PUSH_GROUP_MEANS) + [CONTROL_GROUP]
+
+# Частка користувачів по tier-ах
+TIER_MIX = {'Tier 1': 0.25, 'Tier 2': 0.30, 'Tier 3': 0.35, 'Other': 0.10}
+
+# Базова ймовірність конверсії (реєстрація або депозит) по tier-ах
+TIER_CONVERSION_RATES = {'Tier 1': 0.060, 'Tier 2': 0.040, 'Tier 3': 0.025, 'Other': 0.020}
+
+# Медіанний депозит по tier-ах (lognormal)
+TIER_MEDIAN_REVENUE = {'Tier 1': 60.0, 'Tier 2': 30.0, 'Tier 3': 12.0, 'Other': 10.0}
+
+# Відносний приріст ймовірності конверсії на log(1 + push_count)
+PUSH_LIFT = 0.15
+
+# Ймовірність депозиту в рядку конверсії
+DEPOSIT_SHARE = 0.35
+
+# Кількість кампаній keitaro та ймовірність зупинитись на кожному наступному рядку
+N_CAMPAIGNS = 40
+CAMPAIGN_ROWS_P = 0.6
+
+_HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+_UUID_DIGIT_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+
+def tier_countries() -> Dict[str, List[str]]:
+    """
+    Повні назви країн (як у statistic) для кожного tier
+
+    Returns:
+        Словник tier -> список назв (перша назва на кожен код)
+    """
+    tier_codes = {'Tier 1': TIER_1_COUNTRIES, 'Tier 2': TIER_2_COUNTRIES, 'Tier 3': TIER_3_COUNTRIES}
+    known_codes = set(TIER_1_COUNTRIES) | set(TIER_2_COUNTRIES) | set(TIER_3_COUNTRIES)
+
+    names = {}
+    for name, code in COUNTRY_NAME_TO_CODE.items():
+        names.setdefault(code, name)
+
+    countries = {tier: [names[code] for code in codes if code in names] for tier, codes in tier_codes.items()}
+    countries['Other'] = [name for code, name in names.items() if code not in known_codes]
+    return countries
+
+
+def random_gadids(rng: np.random.Generator, n: int, chunk_size: int = 1_000_000) -> pd.Series:
+    """
+    Випадкові gadid у форматі UUID (8-4-4-4-12, нижній регістр)
+
+    Args:
+        rng: Генератор випадкових чисел
+        n: Кількість ідентифікаторів
+        chunk_size: Розмір блоку (обмежує проміжні масиви)
+
+    Returns:
+        Series рядків
+    """
+    chunks = []
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+        chars = np.full((size, 36), ord('-'), dtype=np.uint8)
+        chars[:, _UUID_DIGIT_POSITIONS] = _HEX_DIGITS[rng.integers(0, 16, size=(size, 32), dtype=np.uint8)]
+        chunks.append(pd.Series(chars.view('S36').ravel()).str.decode('ascii'))
+
+    if not chunks:
+        return pd.Series([], dtype=str)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _sample_countries(rng: np.random.Generator, n: int) -> tuple:
+    """Tier та країна кожного користувача (Zipf-подібна частота країн у tier)"""
+    tiers = np.array(list(TIER_MIX))
+    tier_index = rng.choice(len(tiers), size=n, p=np.array(list(TIER_MIX.values())))
+
+    countries = np.empty(n, dtype=object)
+    for i, (tier, names) in enumerate(tier_countries().items()):
+        mask = tier_index == i
+        weights = 1.0 / np.arange(1, len(names) + 1)
+        countries[mask] = np.array(names, dtype=object)[
+            rng.choice(len(names), size=int(mask.sum()), p=weights / weights.sum())
+        ]
+
+    return tiers[tier_index], countries
+
+
+def _random_times(rng: np.random.Generator, n: int, start_date: str, end_date: str) -> pd.Series:
+    """Рівномірні моменти часу в межах [start_date, end_date + 1 день)"""
+    start = pd.Timestamp(start_date).value
+    end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).value
+    return pd.Series(pd.to_datetime(rng.integers(start, end, size=n)).floor('s'))
+
+
+def generate_push_data(n_users: int,
+                       seed: int = 42,
+                       control_share: float = 1 / 6,
+                       start_date: str = PUSH_START_DATE,
+                       end_date: str = PUSH_END_DATE) -> Dict[str, pd.DataFrame]:
+    """
+    Синтетичні push-користувачі та контрольна група
+
+    Args:
+        n_users: Загальна кількість користувачів (push + контроль)
+        seed: Насіння для відтворюваності
+        control_share: Частка контрольної групи
+        start_date: Початок push-кампанії
+        end_date: Кінець push-кампанії
+
+    Returns:
+        Словник {'push_df': схема get_push_data, 'control_df': схема get_control_group_data}
+    """
+    rng = np.random.default_rng(seed)
+    n_control = int(round(n_users * control_share))
+    n_push = n_users - n_control
+
+    gadids = random_gadids(rng, n_users)
+    _, countries = _sample_countries(rng, n_users)
+
+    # Push-групи рівномірно, інтенсивність - негативний біноміальний розподіл
+    push_groups = np.array(list(PUSH_GROUP_MEANS))
+    group_index = rng.integers(0, len(push_groups), size=n_push)
+    means = np.array(list(PUSH_GROUP_MEANS.values()))[group_index]
+    push_count = 1 + rng.negative_binomial(2, 2 / (2 + means - 1))
+
+    n_days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days + 1
+    push_days = np.minimum(push_count, rng.integers(1, n_days + 1, size=n_push))
+
+    first_push = _random_times(rng, n_push, start_date, end_date)
+    window = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).value - first_push.to_numpy().astype('int64')
+    offsets = np.where(push_count > 1, (rng.random(n_push) * window).astype('int64'), 0)
+    last_push = first_push + pd.to_timedelta(offsets)
+
+    push_df = pd.DataFrame({
+        'gadid': gadids[:n_push].to_numpy(),
+        'ab_group': push_groups[group_index],
+        'country': countries[:n_push],
+        'push_count': push_count,
+        'first_push': first_push.to_numpy(),
+        'last_push': last_push.dt.floor('s').to_numpy(),
+        'push_days': push_days,
+        'avg_success_rate': rng.beta(8, 2, size=n_push).round(4)
+    }).sort_values('push_count', ascending=False, ignore_index=True)
+
+    control_df = pd.DataFrame({
+        'gadid': gadids[n_push:].to_numpy(),
+        'ab_group': CONTROL_GROUP,
+        'country': countries[n_push:],
+        'push_count': 0,
+        'first_push': pd.NaT,
+        'last_push': pd.NaT,
+        'push_days': 0,
+        'avg_success_rate': np.nan
+    })
+
+    return {'push_df': push_df, 'control_df': control_df}
+
+
+def generate_conversion_data(push_df: pd.DataFrame,
+                             control_df: Optional[pd.DataFrame] = None,
+                             seed: int = 43,
+                             unmatched_share: float = 0.2,
+                             conversion_end_date: str = CONVERSION_END_DATE) -> pd.DataFrame:
+    """
+    Синтетичні конверсії keitaro для push- та контрольних користувачів
+
+    Ймовірність конверсії залежить від tier та логарифмічно зростає з
+    кількістю push-ів. Конвертер має 1+ рядків кампаній (геометричний
+    розподіл), revenue ненульовий лише в рядках з депозитом (lognormal).
+
+    Args:
+        push_df: Результат generate_push_data()['push_df']
+        control_df: Контрольна група (конверсії без push-lift)
+        seed: Насіння для відтворюваності
+        unmatched_share: Частка конвертерів поза push-даними (не матчаться)
+        conversion_end_date: Кінець вікна конверсій
+
+    Returns:
+        DataFrame зі схемою get_conversion_data
+    """
+    rng = np.random.default_rng(seed)
+    users = push_df[['gadid', 'country', 'push_count', 'first_push']]
+    if control_df is not None and not control_df.empty:
+        users = pd.concat([users, control_df[['gadid', 'country', 'push_count', 'first_push']]],
+                          ignore_index=True)
+
+    # Ймовірність конверсії: tier × push-lift
+    country_tiers = {country: get_country_tier(country) for country in users['country'].unique()}
+    tiers = users['country'].map(country_tiers).to_numpy()
+    base = pd.Series(tiers).map(TIER_CONVERSION_RATES).fillna(TIER_CONVERSION_RATES['Other']).to_numpy()
+    probability = base * (1 + PUSH_LIFT * np.log1p(users['push_count'].fillna(0).to_numpy()))
+    converters = users[rng.random(len(users)) < probability]
+    converter_tiers = tiers[converters.index.to_numpy()]
+
+    # Конвертери без push-даних
+    n_unmatched = int(round(len(converters) * unmatched_share / max(1 - unmatched_share, 1e-9)))
+    unmatched_tiers, unmatched_countries = _sample_countries(rng, n_unmatched)
+    gadids = np.concatenate([converters['gadid'].to_numpy(dtype=object),
+                             random_gadids(rng, n_unmatched).to_numpy(dtype=object)])
+    countries = np.concatenate([converters['country'].to_numpy(dtype=object), unmatched_countries])
+    user_tiers = np.concatenate([converter_tiers, unmatched_tiers])
+
+    # Старт конверсій: після першого push-у або випадковий момент у вікні
+    start = _random_times(rng, len(gadids), PUSH_START_DATE, PUSH_END_DATE).to_numpy()
+    first_push = np.concatenate([converters['first_push'].to_numpy(dtype='datetime64[ns]'),
+                                 np.full(n_unmatched, np.datetime64('NaT'), dtype='datetime64[ns]')])
+    start = np.where(np.isnat(first_push), start, first_push)
+
+    # Кілька рядків кампаній на gadid
+    rows_per_user = rng.geometric(CAMPAIGN_ROWS_P, size=len(gadids))
+    user_index = np.repeat(np.arange(len(gadids)), rows_per_user)
+    n_rows = len(user_index)
+
+    campaign_weights = 1.0 / np.arange(1, N_CAMPAIGNS + 1)
+    campaign_id = 1000 + rng.choice(N_CAMPAIGNS, size=n_rows, p=campaign_weights / campaign_weights.sum())
+
+    # Кожен рядок - реєстрація та/або депозит (фільтр is_sale > 0 OR is_lead > 0)
+    has_deposit = rng.random(n_rows) < DEPOSIT_SHARE
+    total_deposits = np.where(has_deposit, rng.geometric(0.5, size=n_rows), 0)
+    total_registrations = np.where(has_deposit, (rng.random(n_rows) < 0.7).astype(int), 1)
+
+    # Zero-inflated revenue: ненульовий лише для депозитів
+    median_revenue = pd.Series(user_tiers[user_index]).map(TIER_MEDIAN_REVENUE).fillna(10.0).to_numpy()
+    revenue = np.where(has_deposit,
+                       total_deposits * median_revenue * rng.lognormal(0, 1, size=n_rows), 0.0).round(2)
+
+    delay_hours = rng.exponential(48, size=n_rows)
+    span_hours = np.where(total_deposits + total_registrations > 1, rng.exponential(24, size=n_rows), 0)
+    conversion_end = (pd.Timestamp(conversion_end_date) + pd.Timedelta(days=1)).to_datetime64()
+    first_conversion = np.minimum(start[user_index] + (delay_hours * 3.6e12).astype('timedelta64[ns]'),
+                                  conversion_end - np.timedelta64(1, 's'))
+    last_conversion = np.minimum(first_conversion + (span_hours * 3.6e12).astype('timedelta64[ns]'),
+                                 conversion_end - np.timedelta64(1, 's'))
+
+    country_codes = pd.Series(countries[user_index]).map(COUNTRY_NAME_TO_CODE)
+
+    return pd.DataFrame({
+        'gadid': gadids[user_index],
+        'total_deposits': total_deposits,
+        'total_registrations': total_registrations,
+        'first_conversion': pd.to_datetime(first_conversion).floor('s'),
+        'last_conversion': pd.to_datetime(last_conversion).floor('s'),
+        'conversion_events': total_deposits + total_registrations + rng.poisson(1.0, size=n_rows),
+        'total_revenue': revenue,
+        'country': country_codes.to_numpy(),
+        'campaign_id': campaign_id
+    })
+
+
+def generate_dataset(n_users: int,
+                     seed: int = 42,
+                     control_share: float = 1 / 6,
+                     unmatched_share: float = 0.2) -> Dict[str, pd.DataFrame]:
+    """
+    Повний синтетичний датасет у форматі PushDatabase
+
+    Args:
+        n_users: Загальна кількість користувачів (push + контроль)
+        seed: Насіння для відтворюваності
+        control_share: Частка контрольної групи
+        unmatched_share: Частка конвертерів поза push-даними
+
+    Returns:
+        Словник {'push_df', 'control_df', 'conversions_df'} сирих фреймів
+    """
+    frames = generate_push_data(n_users, seed=seed, control_share=control_share)
+    frames['conversions_df'] = generate_conversion_data(frames['push_df'], frames['control_df'],
+                                                        seed=seed + 1, unmatched_share=unmatched_share)
+    return frames
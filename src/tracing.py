@@ -0,0 +1,357 @@
+"""
+Трасування етапів: вкладені спани з часом, пам'яттю та розміром даних
+
+Публічні методи PushDatabase, DataLoader, PushAnalyzer та PushVisualizer
+обгорнуті декоратором instrument. Коли трасування увімкнено, кожен виклик
+записує спан: wall/CPU час, рядки та пам'ять фреймів на вході й виході,
+піковий RSS процесу. Спани вкладаються (окремий стек на потік) та
+експортуються в JSON або Chrome trace (chrome://tracing, Perfetto).
+
+Вимкнене трасування коштує одну перевірку прапорця на виклик. Увімкнути:
+    with tracing('outputs/trace.json'):
+        ...
+або змінна оточення PUSH_TRACE=1.
+"""
+
+import os
+import sys
+import json
+import time
+import inspect
+import threading
+import functools
+import itertools
+import contextlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+TRACE_ENV = 'PUSH_TRACE'
+
+SPAN_COLUMNS = ['id', 'parent', 'depth', 'name', 'thread', 'start_s', 'wall_s', 'cpu_s',
+                'rows_in', 'rows_out', 'frame_mb_in', 'frame_mb_out',
+                'peak_rss_mb', 'peak_rss_delta_mb', 'error']
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Піковий RSS процесу в MB (None без модуля resource)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux повертає KB, macOS - байти
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def frame_stats(value: Any) -> Tuple[int, int]:
+    """
+    Рядки та пам'ять фреймів у значенні (memory_usage(deep=True) - з рядками object-колонок)
+
+    Враховуються DataFrame/Series, об'єкти з фреймом у .data (PushCube) та
+    вміст dict/list/tuple на один рівень. Ітератори не споживаються.
+
+    Returns:
+        (rows, bytes)
+    """
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return len(value), int(value.memory_usage(index=True, deep=True))
+    if isinstance(getattr(value, 'data', None), pd.DataFrame):
+        return frame_stats(value.data)
+
+    if isinstance(value, dict):
+        items = value.values()
+    elif isinstance(value, (list, tuple)):
+        items = value
+    else:
+        return 0, 0
+
+    rows = size = 0
+    for item in items:
+        if isinstance(item, (pd.DataFrame, pd.Series)) or isinstance(getattr(item, 'data', None), pd.DataFrame):
+            item_rows, item_size = frame_stats(item)
+            rows += item_rows
+            size += item_size
+    return rows, size
+
+
+class _Span:
+    """Контекст одного спану (створюється лише при увімкненому трасуванні)"""
+
+    __slots__ = ('tracer', 'record', '_start', '_cpu', '_rss')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.record = {'name': name, 'rows_in': 0, 'rows_out': 0,
+                       'frame_mb_in': 0.0, 'frame_mb_out': 0.0, 'error': None, **attributes}
+
+    def set_inputs(self, values: Any) -> None:
+        rows, size = frame_stats(values)
+        self.record['rows_in'] += rows
+        self.record['frame_mb_in'] += size / 1024 ** 2
+
+    def set_outputs(self, value: Any) -> None:
+        rows, size = frame_stats(value)
+        self.record['rows_out'] += rows
+        self.record['frame_mb_out'] += size / 1024 ** 2
+
+    def __enter__(self) -> '_Span':
+        stack = self.tracer._stack()
+        self.record['id'] = next(self.tracer._ids)
+        self.record['parent'] = stack[-1].record['id'] if stack else None
+        self.record['depth'] = len(stack)
+        self.record['thread'] = threading.current_thread().name
+        stack.append(self)
+
+        self._rss = peak_rss_mb()
+        self._cpu = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        end = time.perf_counter()
+        cpu = time.process_time()
+        rss = peak_rss_mb()
+
+        self.tracer._stack().pop()
+        self.record.update({
+            'start_s': self._start - self.tracer.origin,
+            'wall_s': end - self._start,
+            'cpu_s': cpu - self._cpu,
+            'peak_rss_mb': rss,
+            'peak_rss_delta_mb': None if rss is None else rss - self._rss
+        })
+        if exc_type is not None:
+            self.record['error'] = f"{exc_type.__name__}: {exc}"
+        self.tracer._finish(self.record)
+        return False
+
+
+class _NullSpan:
+    """Спан-заглушка для вимкненого трасування"""
+
+    __slots__ = ()
+
+    def set_inputs(self, values: Any) -> None:
+        pass
+
+    def set_outputs(self, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Збирач спанів з експортом у DataFrame, JSON та Chrome trace"""
+
+    def __init__(self, enabled: bool = False, max_spans: int = 100_000):
+        """
+        Args:
+            enabled: Записувати спани
+            max_spans: Ліміт збережених спанів (надлишок рахується в dropped)
+        """
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.origin = time.perf_counter()
+        self.origin_epoch = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        """Видалити записані спани та почати відлік часу заново"""
+        with self._lock:
+            self.spans = []
+            self.dropped = 0
+            self.origin = time.perf_counter()
+            self.origin_epoch = time.time()
+
+    def span(self, name: str, **attributes) -> Any:
+        """
+        Контекст спану
+
+        Args:
+            name: Назва (напр. 'PushAnalyzer.merge_data')
+            **attributes: Додаткові поля запису
+
+        Returns:
+            Контекстний менеджер з методами set_inputs/set_outputs
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, attributes)
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _finish(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(record)
+            else:
+                self.dropped += 1
+
+    def to_frame(self) -> pd.DataFrame:
+        """Спани в порядку старту"""
+        frame = pd.DataFrame(self.spans, columns=SPAN_COLUMNS)
+        frame['parent'] = frame['parent'].astype('Int64')
+        return frame.sort_values('start_s', ignore_index=True)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Зведення по назвах спанів
+
+        Returns:
+            DataFrame [name, calls, wall_s, self_s, cpu_s, rows_in, rows_out,
+            max_peak_rss_delta_mb], відсортований за власним часом (без дочірніх спанів)
+        """
+        spans = self.to_frame()
+        if spans.empty:
+            return pd.DataFrame(columns=['name', 'calls', 'wall_s', 'self_s', 'cpu_s',
+                                         'rows_in', 'rows_out', 'max_peak_rss_delta_mb'])
+
+        children = spans.groupby('parent')['wall_s'].sum()
+        spans['self_s'] = spans['wall_s'] - spans['id'].map(children).fillna(0)
+
+        summary = spans.groupby('name').agg(
+            calls=('id', 'count'),
+            wall_s=('wall_s', 'sum'),
+            self_s=('self_s', 'sum'),
+            cpu_s=('cpu_s', 'sum'),
+            rows_in=('rows_in', 'sum'),
+            rows_out=('rows_out', 'sum'),
+            max_peak_rss_delta_mb=('peak_rss_delta_mb', 'max')
+        )
+        return summary.sort_values('self_s', ascending=False).reset_index()
+
+    def export_json(self, path: str) -> None:
+        """Зберегти спани як JSON {'origin', 'dropped', 'spans': [...]}"""
+        data = {'origin': self.origin_epoch, 'dropped': self.dropped,
+                'spans': self.to_frame().astype(object).where(lambda df: df.notna(), None).to_dict('records')}
+        _write_json(path, data)
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Зберегти у форматі Chrome trace (chrome://tracing, ui.perfetto.dev)"""
+        pid = os.getpid()
+        threads = {}
+        events = []
+
+        for span in self.to_frame().to_dict('records'):
+            tid = threads.setdefault(span['thread'], len(threads) + 1)
+            start_us = span['start_s'] * 1e6
+            args = {key: span[key] for key in ('cpu_s', 'rows_in', 'rows_out', 'frame_mb_in',
+                                               'frame_mb_out', 'peak_rss_mb', 'peak_rss_delta_mb', 'error')
+                    if span[key] is not None and not pd.isna(span[key])}
+            events.append({'name': span['name'], 'cat': span['name'].split('.')[0], 'ph': 'X',
+                           'ts': start_us, 'dur': span['wall_s'] * 1e6, 'pid': pid, 'tid': tid, 'args': args})
+            if span['peak_rss_mb'] is not None and not pd.isna(span['peak_rss_mb']):
+                events.append({'name': 'peak_rss_mb', 'ph': 'C', 'ts': start_us + span['wall_s'] * 1e6,
+                               'pid': pid, 'args': {'peak_rss_mb': span['peak_rss_mb']}})
+
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                   for name, tid in threads.items()]
+        _write_json(path, {'traceEvents': events, 'displayTimeUnit': 'ms'})
+
+    def export(self, path: str) -> None:
+        """Експорт за розширенням: *.trace.json / *.json - Chrome trace, *.spans.json - JSON спанів"""
+        if path.endswith('.spans.json'):
+            self.export_json(path)
+        else:
+            self.export_chrome_trace(path)
+
+
+def _write_json(path: str, data: Any) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+
+
+# Глобальний трасувальник, яким користуються всі інструментовані класи
+TRACER = Tracer(enabled=os.environ.get(TRACE_ENV, '') not in ('', '0'))
+
+
+def span(name: str, **attributes) -> Any:
+    """Спан глобального трасувальника (див. Tracer.span)"""
+    return TRACER.span(name, **attributes)
+
+
+@contextlib.contextmanager
+def tracing(path: Optional[str] = None, clear: bool = True):
+    """
+    Увімкнути трасування на час блоку
+
+    Args:
+        path: Файл експорту після блоку (див. Tracer.export)
+        clear: Почати з порожнього списку спанів
+
+    Yields:
+        Глобальний Tracer
+    """
+    was_enabled = TRACER.enabled
+    if clear:
+        TRACER.clear()
+    TRACER.enable()
+    try:
+        yield TRACER
+    finally:
+        TRACER.enabled = was_enabled
+        if path:
+            TRACER.export(path)
+
+
+def traced(name: str) -> Callable:
+    """
+    Декоратор функції/методу: спан з рядками та пам'яттю фреймів на вході й виході
+
+    Args:
+        name: Назва спану
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return func(*args, **kwargs)
+
+            with TRACER.span(name) as current:
+                current.set_inputs(args)
+                current.set_inputs(kwargs)
+                result = func(*args, **kwargs)
+                current.set_outputs(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def instrument(cls: type) -> type:
+    """
+    Декоратор класу: обгорнути публічні методи (без '_' на початку) у спани '<Клас>.<метод>'
+
+    Статичні методи, класові методи та властивості не змінюються.
+    """
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith('_') or not inspect.isfunction(value):
+            continue
+        setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
@@ -1,22 +1,176 @@
+import importlib.util
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+from typing import Union, List, Dict, Any, Optional, Tuple
+from config.constants import PUSH_BUCKET_BINS, PUSH_BUCKET_LABELS, CONTROL_GROUP
+from src.cube import PushCube
+from src.rendering import render_charts
+from src.chart_cache import ChartCache, cached_chart
+from src.tracing import instrument
 
 # Українська локалізація для matplotlib
 plt.rcParams['font.family'] = ['DejaVu Sans']
 sns.set_style("whitegrid")
 sns.set_palette("husl")
 
+# Ряди з більшою кількістю точок малюються WebGL-трейсами та проріджуються
+WEBGL_MIN_POINTS = 1000
+MAX_SERIES_POINTS = 2000
+
+
+def push_bucket_conversion(df: Union[pd.DataFrame, PushCube]) -> pd.DataFrame:
+    """
+    Конверсія по tier × бакет кількості push-ів без зміни вхідного датасету
+    
+    Args:
+        df: Matched-датасет, PushCube або вже агрегована таблиця
+        
+    Returns:
+        DataFrame [tier, push_bucket, gadid, has_deposit, conversion_rate]
+    """
+    if isinstance(df, PushCube):
+        return df.push_bucket_stats(by='tier')
+    if {'push_bucket', 'conversion_rate'}.issubset(df.columns):
+        return df
+    
+    # Групування по Series-ключах - читаються лише потрібні колонки
+    keys = [df['tier'], pd.cut(df['push_count'], bins=PUSH_BUCKET_BINS,
+                               labels=PUSH_BUCKET_LABELS).rename('push_bucket')]
+    conversion_by_pushes = pd.DataFrame({
+        'gadid': df['gadid'].groupby(keys, observed=False).count(),
+        'has_deposit': df['has_deposit'].groupby(keys, observed=False).sum()
+    }).reset_index()
+    
+    conversion_by_pushes['conversion_rate'] = (
+        conversion_by_pushes['has_deposit'] / conversion_by_pushes['gadid'] * 100
+    )
+    return conversion_by_pushes
+
+
+def timeline_stats(df: Union[pd.DataFrame, PushCube], freq: str = 'D') -> pd.DataFrame:
+    """
+    Користувачі та депозити по періоду першого push-у та A/B групі
+    
+    Args:
+        df: Matched-датасет, PushCube або вже агрегована таблиця
+        freq: Крок часової лінії (pandas offset: 'D', 'h', '15min')
+        
+    Returns:
+        DataFrame [first_push_date, ab_group, gadid, has_deposit]
+    """
+    if isinstance(df, PushCube):
+        return df.daily_stats()
+    if 'first_push_date' in df.columns and 'first_push' not in df.columns:
+        return df
+    
+    first_push = df['first_push']
+    if not pd.api.types.is_datetime64_any_dtype(first_push):
+        first_push = pd.to_datetime(first_push)
+    
+    keys = [first_push.dt.floor(freq).rename('first_push_date'), df['ab_group']]
+    return pd.DataFrame({
+        'gadid': df['gadid'].groupby(keys, observed=True).count(),
+        'has_deposit': df['has_deposit'].groupby(keys, observed=True).sum()
+    }).reset_index()
+
+
+def downsample_minmax(x: np.ndarray, y: np.ndarray, max_points: int = MAX_SERIES_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Проріджування ряду: мінімум і максимум у кожному з max_points / 2 кошиків
+    
+    Зберігає піки та провали, тому форма лінії не змінюється візуально.
+    
+    Args:
+        x: Відсортовані значення осі X
+        y: Значення ряду
+        max_points: Максимальна кількість точок
+        
+    Returns:
+        Tuple (x, y) прорідженого ряду
+    """
+    n = len(x)
+    if n <= max_points:
+        return x, y
+    
+    buckets = max(max_points // 2, 1)
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    
+    keep = np.unique(np.concatenate([order[starts], order[ends], [0, n - 1]]))
+    return x[keep], y[keep]
+
+@instrument
 class PushVisualizer:
     """Клас для створення візуалізацій аналізу push-сповіщень"""
     
-    def __init__(self, figsize=(12, 8)):
+    def __init__(self, figsize=(12, 8), headless: bool = False, dpi: int = 300,
+                 cache_enabled: bool = False, cache: Optional[ChartCache] = None,
+                 include_plotlyjs: Union[bool, str] = 'cdn'):
+        """
+        Args:
+            figsize: Розмір графіків за замовчуванням
+            headless: Без показу графіків (фігури закриваються одразу після збереження)
+            dpi: Роздільна здатність PNG
+            cache_enabled: Не перемальовувати графіки з незмінними даними (outputs/charts/.store)
+            cache: Готовий ChartCache зі своєю директорією сховища
+            include_plotlyjs: Як підключати plotly.js у HTML ('cdn' - малі файли, True - офлайн)
+        """
         self.figsize = figsize
+        self.headless = headless
+        self.dpi = dpi
+        self.include_plotlyjs = include_plotlyjs
+        self.cache = cache if cache is not None else (ChartCache() if cache_enabled else None)
+        self.last_render = None
+    
+    def _finish_figure(self, fig, save_path: str = None):
+        """Зберегти matplotlib-фігуру та показати або закрити її"""
+        if save_path:
+            fig.savefig(save_path, dpi=self.dpi, bbox_inches='tight')
+        if self.headless:
+            plt.close(fig)
+        else:
+            plt.show()
+    
+    def _finish_plotly(self, fig, save_path: str = None):
+        """Зберегти plotly-фігуру (HTML або статичний експорт) та показати її"""
+        if save_path:
+            if save_path.endswith('.html'):
+                fig.write_html(save_path, include_plotlyjs=self.include_plotlyjs)
+            else:
+                # Статичний експорт (png/svg/pdf) потребує kaleido
+                if importlib.util.find_spec('kaleido') is None:
+                    raise ImportError("Статичний експорт plotly потребує kaleido: pip install -e .[export]")
+                fig.write_image(save_path)
+        if not self.headless:
+            fig.show()
+    
+    def render_batch(self,
+                     jobs: List[Dict[str, Any]],
+                     output_dir: str = 'outputs/charts',
+                     n_jobs: Optional[int] = None) -> pd.DataFrame:
+        """
+        Пакетний headless-рендер графіків у пулі процесів
         
+        Args:
+            jobs: Завдання [{'chart': 'ab_conversion_comparison', 'args': (ab_stats,),
+                  'filename': 'ab_analysis.png'}, ...] (див. standard_chart_jobs)
+            output_dir: Директорія для файлів
+            n_jobs: Кількість процесів (None - всі ядра, 1 - без пулу)
+            
+        Returns:
+            DataFrame [chart, path, seconds, cached, status] - шляхи та час рендеру кожного графіка
+        """
+        return render_charts(jobs, output_dir=output_dir, n_jobs=n_jobs,
+                             figsize=self.figsize, dpi=self.dpi,
+                             cache_dir=self.cache.store_dir if self.cache is not None else None)
+        
+    @cached_chart
     def plot_ab_conversion_comparison(self, ab_stats: pd.DataFrame, save_path: str = None):
         """Порівняння конверсій між A/B групами"""
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
@@ -47,10 +201,9 @@ class PushVisualizer:
         axes[1,1].tick_params(axis='x', rotation=45)
         
         plt.tight_layout()
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        self._finish_figure(fig, save_path)
     
+    @cached_chart
     def plot_geo_tier_analysis(self, geo_stats: pd.DataFrame, save_path: str = None):
         """Аналіз по географічних tier-ах"""
         fig = make_subplots(
@@ -89,33 +242,26 @@ class PushVisualizer:
         fig.update_layout(height=800, showlegend=False, 
                          title_text="Аналіз по географічних Tier-ах")
         
-        if save_path:
-            fig.write_html(save_path)
-        fig.show()
+        self._finish_plotly(fig, save_path)
     
-    def plot_optimal_pushes_by_tier(self, df: pd.DataFrame, save_path: str = None):
-        """Графік оптимальної кількості push-ів по tier"""
-        # Аналіз конверсії залежно від кількості push-ів
-        push_bins = [1, 2, 3, 5, 10, 20, float('inf')]
-        push_labels = ['1', '2', '3', '4-5', '6-10', '11-20', '20+']
-        
-        df['push_bucket'] = pd.cut(df['push_count'], bins=push_bins, labels=push_labels, include_lowest=True)
+    @cached_chart
+    def plot_optimal_pushes_by_tier(self, df: Union[pd.DataFrame, PushCube], save_path: str = None):
+        """
+        Графік оптимальної кількості push-ів по tier
         
-        conversion_by_pushes = df.groupby(['tier', 'push_bucket']).agg({
-            'gadid': 'count',
-            'has_deposit': 'sum'
-        }).reset_index()
-        
-        conversion_by_pushes['conversion_rate'] = (
-            conversion_by_pushes['has_deposit'] / conversion_by_pushes['gadid'] * 100
-        )
+        Args:
+            df: Matched-датасет (не змінюється), PushCube або результат push_bucket_conversion
+            save_path: Шлях для збереження
+        """
+        # Аналіз конверсії залежно від кількості push-ів
+        conversion_by_pushes = push_bucket_conversion(df)
         
         # Створюємо heatmap
         pivot_data = conversion_by_pushes.pivot(index='push_bucket', 
                                                columns='tier', 
                                                values='conversion_rate')
         
-        plt.figure(figsize=(12, 8))
+        fig = plt.figure(figsize=(12, 8))
         sns.heatmap(pivot_data, annot=True, fmt='.2f', cmap='RdYlBu_r', 
                    cbar_kws={'label': 'Конверсія в депозити (%)'})
         plt.title('Конверсія залежно від кількості push-ів по Tier-ах', fontweight='bold')
@@ -123,31 +269,67 @@ class PushVisualizer:
         plt.ylabel('Кількість push-ів')
         plt.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        self._finish_figure(fig, save_path)
         
         return conversion_by_pushes
     
-    def plot_push_timeline(self, df: pd.DataFrame, save_path: str = None):
-        """Часова лінія відправки push-ів та конверсій"""
-        # Конвертуємо дати
-        df['first_push_date'] = pd.to_datetime(df['first_push'])
+    @cached_chart
+    def plot_push_timeline(self, df: Union[pd.DataFrame, PushCube], save_path: str = None,
+                           freq: str = 'D', max_points: int = MAX_SERIES_POINTS):
+        """
+        Часова лінія відправки push-ів та конверсій
         
-        daily_stats = df.groupby([df['first_push_date'].dt.date, 'ab_group']).agg({
-            'gadid': 'count',
-            'has_deposit': 'sum'
-        }).reset_index()
+        Args:
+            df: Matched-датасет (не змінюється), PushCube або результат timeline_stats
+            save_path: Шлях для збереження
+            freq: Крок часової лінії для сирого датасету ('D', 'h', '15min')
+            max_points: Максимум точок на ряд (щільні ряди проріджуються)
+        """
+        daily_stats = timeline_stats(df, freq=freq).sort_values('first_push_date')
         
-        fig = px.line(daily_stats, x='first_push_date', y='gadid', 
-                     color='ab_group', title='Динаміка відправки push-ів по днях')
-        fig.update_layout(xaxis_title='Дата', yaxis_title='Кількість користувачів')
+        fig = go.Figure()
+        for group, series in daily_stats.groupby('ab_group', sort=True, observed=True):
+            x, y = downsample_minmax(series['first_push_date'].to_numpy(),
+                                     series['gadid'].to_numpy(), max_points)
+            # Щільні ряди - WebGL, щоб браузер не малював тисячі SVG-вузлів
+            trace = go.Scattergl if len(series) > WEBGL_MIN_POINTS else go.Scatter
+            fig.add_trace(trace(x=x, y=y, mode='lines', name=str(group)))
         
-        if save_path:
-            fig.write_html(save_path)
-        fig.show()
+        fig.update_layout(title='Динаміка відправки push-ів по днях', legend_title_text='ab_group',
+                          xaxis_title='Дата', yaxis_title='Кількість користувачів')
+        
+        self._finish_plotly(fig, save_path)
+    
+    @cached_chart
+    def plot_conversion_curves(self, curves: pd.DataFrame, save_path: str = None):
+        """
+        Кумулятивна конверсія по днях від першого push-у з довірчими інтервалами
+        
+        Args:
+            curves: Результат PushAnalyzer.conversion_curves (by=['ab_group', 'tier'] або ['ab_group'])
+            save_path: Шлях для збереження
+        """
+        panels = sorted(curves['tier'].unique()) if 'tier' in curves.columns else [None]
+        fig, axes = plt.subplots(1, len(panels), figsize=(6 * len(panels), 5), sharey=True, squeeze=False)
+        fig.suptitle('Кумулятивна конверсія по днях від першого push-у', fontsize=16, fontweight='bold')
+        
+        for ax, panel in zip(axes[0], panels):
+            panel_curves = curves if panel is None else curves[curves['tier'] == panel]
+            for group, curve in panel_curves.groupby('ab_group', sort=True, observed=True):
+                line, = ax.plot(curve['day'], curve['cumulative_conversion'], marker='o', markersize=3,
+                                label=str(group), linestyle='--' if str(group) == CONTROL_GROUP else '-')
+                ax.fill_between(curve['day'], curve['ci_lower'], curve['ci_upper'],
+                                color=line.get_color(), alpha=0.15)
+            ax.set_title(panel or 'Усі користувачі')
+            ax.set_xlabel('Днів від першого push-у')
+            ax.legend(title='ab_group')
+        axes[0, 0].set_ylabel('Кумулятивна конверсія (%)')
+        
+        plt.tight_layout()
+        self._finish_figure(fig, save_path)
     
-    def create_summary_dashboard(self, ab_stats: pd.DataFrame, geo_stats: pd.DataFrame):
+    @cached_chart
+    def create_summary_dashboard(self, ab_stats: pd.DataFrame, geo_stats: pd.DataFrame, save_path: str = None):
         """Створює підсумковий dashboard"""
         fig = make_subplots(
             rows=3, cols=2,
@@ -183,6 +365,6 @@ class PushVisualizer:
         
         fig.update_layout(height=1200, showlegend=False,
                          title_text="Підсумковий Dashboard Аналізу Push-сповіщень")
-        fig.show()
+        self._finish_plotly(fig, save_path)
         
         return fig
\ No newline at end of file